@@ -0,0 +1,83 @@
+import threading
+
+import pytest
+
+pytest.importorskip("pyaudio")
+
+from voice_assistant.audio_output import RingBuffer
+
+
+def start_writer(buffer, data):
+    writer = threading.Thread(target=buffer.write, args=(data,), daemon=True)
+    writer.start()
+    return writer
+
+
+def test_reads_return_writes_in_order():
+    buffer = RingBuffer(16)
+    buffer.write(b"abc")
+    buffer.write(b"def")
+    assert len(buffer) == 6
+    assert buffer.read(4) == b"abcd"
+    assert buffer.read(100) == b"ef"
+    assert buffer.read(100) == b""
+
+
+def test_write_and_read_wrap_around_the_end():
+    buffer = RingBuffer(8)
+    buffer.write(b"012345")
+    assert buffer.read(5) == b"01234"
+    # Starts at offset 6, so it wraps after two bytes
+    buffer.write(b"abcdefg")
+    assert len(buffer) == 8
+    assert buffer.read(8) == b"5abcdefg"
+    assert len(buffer) == 0
+
+
+def test_read_keeps_partial_frames():
+    buffer = RingBuffer(16)
+    buffer.write(b"abcdefg")
+    assert buffer.read(100, align=4) == b"abcd"
+    assert buffer.read(100, align=4) == b""
+    buffer.write(b"h")
+    assert buffer.read(100, align=4) == b"efgh"
+
+
+def test_write_larger_than_capacity_blocks_until_read():
+    buffer = RingBuffer(4)
+    data = bytes(range(10))
+    writer = start_writer(buffer, data)
+    writer.join(0.1)
+    assert writer.is_alive()
+    assert len(buffer) == 4
+    out = b""
+    while len(out) < len(data):
+        out += buffer.read(3)
+    writer.join(1)
+    assert not writer.is_alive()
+    assert out == data
+
+
+def test_clear_abandons_a_blocked_write():
+    buffer = RingBuffer(4)
+    writer = start_writer(buffer, b"0123456789")
+    writer.join(0.1)
+    buffer.clear()
+    writer.join(1)
+    assert not writer.is_alive()
+    assert len(buffer) == 0
+    # Later writes are not affected
+    buffer.write(b"ok")
+    assert buffer.read(10) == b"ok"
+
+
+def test_close_wakes_a_blocked_writer_and_discards_later_writes():
+    buffer = RingBuffer(4)
+    buffer.write(b"0123")
+    writer = start_writer(buffer, b"4567")
+    writer.join(0.1)
+    buffer.close()
+    writer.join(1)
+    assert not writer.is_alive()
+    buffer.write(b"more")
+    assert buffer.read(10) == b"0123"
@@ -0,0 +1,125 @@
+import pytest
+
+from voice_assistant import health
+from voice_assistant.config import Config
+from voice_assistant.health import CLOSED, HALF_OPEN, OPEN, ProviderHealth, backoff_delay
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(health, "time", clock)
+    return clock
+
+
+def breaker(**options):
+    defaults = dict(failure_rate=0.5, min_requests=4, consecutive_failures=3, window=30.0,
+                    open_seconds=5.0, max_open_seconds=20.0)
+    return ProviderHealth("test", **dict(defaults, **options))
+
+
+def test_consecutive_failures_open_the_circuit(clock):
+    h = breaker()
+    for _ in range(2):
+        h.record_failure()
+    assert h.state == CLOSED and h.allow_request()
+    h.record_failure()
+    assert h.state == OPEN
+    assert not h.allow_request()
+    assert h.retry_after() == 5.0
+
+
+def test_error_rate_opens_the_circuit(clock):
+    h = breaker(consecutive_failures=10)
+    h.record_success(0.1)
+    h.record_failure()
+    h.record_success(0.1)
+    # Below min_requests the rate is not trusted yet
+    assert h.state == CLOSED
+    h.record_failure()
+    assert h.state == OPEN
+
+
+def test_old_outcomes_leave_the_window(clock):
+    h = breaker(consecutive_failures=10)
+    h.record_failure()
+    h.record_failure()
+    clock.now += 31
+    h.record_success(0.1)
+    assert h.error_rate() == 0.0
+
+
+def test_half_open_allows_one_probe_and_success_closes(clock):
+    h = breaker()
+    for _ in range(3):
+        h.record_failure()
+    clock.now += 5
+    assert h.allow_request()
+    assert h.state == HALF_OPEN
+    assert not h.allow_request()
+    h.record_success(0.1)
+    assert h.state == CLOSED
+    assert h.allow_request()
+
+
+def test_failed_probe_reopens_with_doubled_cooldown_up_to_the_cap(clock):
+    h = breaker()
+    for _ in range(3):
+        h.record_failure()
+    for cooldown in (10.0, 20.0, 20.0):
+        clock.now += h.retry_after()
+        assert h.allow_request()
+        h.record_failure()
+        assert h.state == OPEN
+        assert h.retry_after() == cooldown
+
+
+def test_success_resets_the_cooldown(clock):
+    h = breaker()
+    for _ in range(3):
+        h.record_failure()
+    clock.now += 5
+    h.allow_request()
+    h.record_failure()
+    clock.now += 10
+    h.allow_request()
+    h.record_success(0.1)
+    for _ in range(3):
+        h.record_failure()
+    assert h.retry_after() == 5.0
+
+
+def test_probe_that_never_reports_back_does_not_block_forever(clock):
+    h = breaker()
+    for _ in range(3):
+        h.record_failure()
+    clock.now += 5
+    assert h.allow_request()
+    clock.now += 4
+    assert not h.allow_request()
+    clock.now += 1
+    assert h.allow_request()
+
+
+def test_backoff_delay_grows_exponentially_with_full_jitter():
+    for attempt in range(4):
+        delays = [backoff_delay(attempt, base=0.5, cap=100.0) for _ in range(200)]
+        assert all(0 <= d <= 0.5 * 2 ** attempt for d in delays)
+        # Full jitter: spread over the whole range, not clustered at the top
+        assert min(delays) < 0.1 * 0.5 * 2 ** attempt < 0.9 * 0.5 * 2 ** attempt < max(delays)
+
+
+def test_backoff_delay_is_capped_and_uses_config_defaults(monkeypatch):
+    assert all(backoff_delay(30, base=1.0, cap=2.0) <= 2.0 for _ in range(100))
+    monkeypatch.setattr(Config, "RETRY_BACKOFF_BASE", 1.0)
+    monkeypatch.setattr(Config, "RETRY_BACKOFF_MAX", 3.0)
+    assert all(backoff_delay(5) <= 3.0 for _ in range(100))
+    assert max(backoff_delay(5) for _ in range(200)) > 2.0
@@ -0,0 +1,53 @@
+import asyncio
+import time
+
+import pytest
+
+from voice_assistant import health
+from voice_assistant.hedging import HedgePolicy, hedged_call, hedged_call_async
+
+
+@pytest.fixture(autouse=True)
+def fresh_health(monkeypatch):
+    monkeypatch.setattr(health, "_health", {})
+
+
+def outcomes(model):
+    return [ok for _, ok in health.get_health("test", model)._outcomes]
+
+
+def test_timed_out_call_is_recorded_once():
+    def slow():
+        time.sleep(0.2)
+        return "late"
+
+    with pytest.raises(TimeoutError):
+        hedged_call("test", [("slow", slow)], HedgePolicy(delay=10.0, timeout=0.05, percentile=None))
+    # Let the abandoned call finish in the background
+    time.sleep(0.3)
+    assert outcomes("slow") == [False]
+
+
+def test_failure_and_backup_are_each_recorded_once():
+    def broken():
+        raise RuntimeError("down")
+
+    result = hedged_call("test", [("broken", broken), ("backup", lambda: "ok")],
+                         HedgePolicy(delay=10.0, timeout=1.0, percentile=None))
+    assert result == "ok"
+    assert outcomes("broken") == [False]
+    assert outcomes("backup") == [True]
+
+
+def test_async_timed_out_call_is_recorded_once():
+    async def slow():
+        await asyncio.sleep(0.2)
+        return "late"
+
+    async def main():
+        with pytest.raises(TimeoutError):
+            await hedged_call_async("test", [("slow", slow)], HedgePolicy(delay=10.0, timeout=0.05, percentile=None))
+        await asyncio.sleep(0.3)
+
+    asyncio.run(main())
+    assert outcomes("slow") == [False]
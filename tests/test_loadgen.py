@@ -0,0 +1,39 @@
+import asyncio
+import json
+
+import pytest
+
+pytest.importorskip("pyaudio")
+httpx = pytest.importorskip("httpx")
+
+from voice_assistant import loadgen
+
+
+def serve(monkeypatch):
+    requests = []
+
+    def handler(request):
+        requests.append((request.url.path, json.loads(request.content)))
+        if request.url.path == "/stream-audio/":
+            return httpx.Response(200, content=b"\0\0" * 768)
+        return httpx.Response(200, json={"file_path": "x.wav"})
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(loadgen, "get_async_client", lambda provider: client)
+    return requests
+
+
+def test_tts_level_streams_by_default_without_server_files(monkeypatch):
+    requests = serve(monkeypatch)
+    result = asyncio.run(loadgen.run_tts_level(2, 0.1, "http://tts/stream-audio/", texts=["Hello there."], think=0))
+    assert result["completed"] == len(requests) > 0
+    assert result["errors"] == 0
+    assert all(path == "/stream-audio/" and "filename" not in body for path, body in requests)
+
+
+def test_tts_level_file_mode_names_a_file_per_request(monkeypatch):
+    requests = serve(monkeypatch)
+    result = asyncio.run(loadgen.run_tts_level(1, 0.1, "http://tts/generate-audio/", texts=["Hello there."],
+                                               think=0, stream=False))
+    assert result["completed"] == len(requests) > 0
+    assert all(body["filename"].startswith("loadtest-") for _, body in requests)
@@ -0,0 +1,173 @@
+import asyncio
+import os
+import queue
+import sys
+import time
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+# The TTS server runs as a script from voice_assistant/, importing its siblings top-level
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "voice_assistant"))
+
+import local_tts_api  # noqa: E402
+from local_tts_api import PoolOverloaded, ReplicaPool, TextToSpeechRequest  # noqa: E402
+
+SAMPLE_RATE = 24000
+
+
+def stub_replica(index, cores, pin_cores, models, preload, memory_budget_mb, tasks, cancels, results):
+    """
+    Stand-in for _replica_main: every word of a job takes `speed` seconds to "synthesize".
+
+    Each word is logged to models['EN']['log'] as 'replica word start end'; the word
+    'crash' kills the process.
+    """
+    log = models["EN"]["log"]
+    results.put(("loaded", index, {"language": "EN", "speaker_ids": {"EN-US": 0}, "sample_rate": SAMPLE_RATE,
+                                   "memory_mb": 1}))
+    results.put(("ready", index, None))
+    cancelled = set()
+    while True:
+        batch = tasks.get()
+        if batch is None:
+            return
+        for job_id, text, language, accent, speed, filename in batch:
+            if not filename:
+                results.put(("start", job_id, SAMPLE_RATE))
+            for word in text.split():
+                while True:
+                    try:
+                        cancelled.add(cancels.get_nowait())
+                    except queue.Empty:
+                        break
+                if job_id in cancelled:
+                    break
+                if word == "crash":
+                    os._exit(1)
+                start = time.time()
+                time.sleep(speed)
+                with open(log, "a") as f:
+                    f.write(f"{index} {word} {start} {time.time()}\n")
+                if not filename:
+                    results.put(("chunk", job_id, word.encode()))
+            results.put(("done", job_id, filename))
+
+
+@pytest.fixture
+def log(tmp_path):
+    return tmp_path / "synthesized.log"
+
+
+def entries(log):
+    if not log.exists():
+        return []
+    rows = [line.split() for line in log.read_text().splitlines()]
+    return [(int(index), word, float(start), float(end)) for index, word, start, end in rows]
+
+
+def run(log, monkeypatch, scenario, **options):
+    monkeypatch.setattr(local_tts_api, "_replica_main", stub_replica)
+    pool = ReplicaPool(pin_cores=False, models={"EN": {"log": str(log)}}, **options)
+
+    async def main():
+        await pool.start()
+        try:
+            return await scenario(pool)
+        finally:
+            await pool.stop()
+
+    return asyncio.run(main())
+
+
+def test_requests_only_go_to_idle_replicas(log, monkeypatch):
+    async def scenario(pool):
+        started = time.monotonic()
+        slow = asyncio.create_task(pool.submit("slow", "EN", "EN-US", 0.8, "slow.wav"))
+        await asyncio.sleep(0.05)
+        quick = [pool.submit(f"quick{i}", "EN", "EN-US", 0.1, f"quick{i}.wav") for i in range(3)]
+        assert await asyncio.gather(*quick) == ["quick0.wav", "quick1.wav", "quick2.wav"]
+        # None of them waited behind the slow request
+        assert time.monotonic() - started < 0.7
+        assert await slow == "slow.wav"
+
+    run(log, monkeypatch, scenario, replicas=2)
+    synthesized = entries(log)
+    assert len(synthesized) == 4
+    for replica in (0, 1):
+        spans = sorted((start, end) for index, _, start, end in synthesized if index == replica)
+        # One request at a time per replica
+        assert all(end <= next_start for (_, end), (next_start, _) in zip(spans, spans[1:]))
+
+
+def test_full_queue_sheds_with_503(log, monkeypatch):
+    async def scenario(pool):
+        running = asyncio.create_task(pool.submit("running", "EN", "EN-US", 0.3, "a.wav"))
+        await asyncio.sleep(0.1)
+        queued = asyncio.create_task(pool.submit("queued", "EN", "EN-US", 0.01, "b.wav"))
+        await asyncio.sleep(0)
+        with pytest.raises(PoolOverloaded):
+            await pool.submit("rejected", "EN", "EN-US", 0.01, "c.wav")
+        monkeypatch.setattr(local_tts_api, "pool", pool)
+        with pytest.raises(local_tts_api.HTTPException) as error:
+            await local_tts_api.generate_audio(TextToSpeechRequest(text="rejected", filename="d.wav"))
+        assert error.value.status_code == 503
+        assert error.value.headers == {"Retry-After": "1"}
+        assert await running == "a.wav"
+        assert await queued == "b.wav"
+        return pool.shed
+
+    assert run(log, monkeypatch, scenario, replicas=1, queue_size=1) == 2
+    assert [word for _, word, _, _ in entries(log)] == ["running", "queued"]
+
+
+def test_request_that_waited_too_long_is_dropped(log, monkeypatch):
+    async def scenario(pool):
+        running = asyncio.create_task(pool.submit("running", "EN", "EN-US", 0.3, "a.wav"))
+        await asyncio.sleep(0.05)
+        with pytest.raises(PoolOverloaded):
+            await pool.submit("stale", "EN", "EN-US", 0.01, "b.wav")
+        await running
+        return pool.shed
+
+    assert run(log, monkeypatch, scenario, replicas=1, queue_timeout=0.1) == 1
+    assert [word for _, word, _, _ in entries(log)] == ["running"]
+
+
+def test_abandoned_stream_is_cancelled_and_holds_its_replica_until_stopped(log, monkeypatch):
+    words = "one two three four five six seven eight"
+
+    async def scenario(pool):
+        sample_rate, chunks = await pool.stream(words, "EN", "EN-US", 0.05)
+        assert sample_rate == SAMPLE_RATE
+        assert await chunks.__anext__() == b"one"
+        # The client goes away after the first sentence
+        await chunks.aclose()
+        assert await pool.submit("next", "EN", "EN-US", 0.01, "next.wav") == "next.wav"
+
+    run(log, monkeypatch, scenario, replicas=1)
+    synthesized = entries(log)
+    streamed = synthesized[:-1]
+    assert len(streamed) < len(words.split())
+    # The next request only started once the replica had stopped the abandoned one
+    assert synthesized[-1][1] == "next"
+    assert synthesized[-1][2] >= streamed[-1][3]
+
+
+def test_replica_that_dies_fails_its_request_and_is_restarted(log, monkeypatch):
+    async def scenario(pool):
+        # The replica dies right after sending the stream's start message, which may or
+        # may not have left the process
+        with pytest.raises(RuntimeError, match="crashed"):
+            sample_rate, chunks = await pool.stream("crash", "EN", "EN-US", 0.01)
+            async for _ in chunks:
+                pass
+        with pytest.raises(RuntimeError, match="crashed"):
+            await pool.submit("crash", "EN", "EN-US", 0.01, "a.wav")
+        assert await asyncio.wait_for(pool.submit("fine", "EN", "EN-US", 0.01, "b.wav"), 10) == "b.wav"
+        return pool.status()
+
+    status = run(log, monkeypatch, scenario, replicas=1)
+    assert status["replicas_alive"] == 1
+    assert [word for _, word, _, _ in entries(log)] == ["fine"]
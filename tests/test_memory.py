@@ -0,0 +1,129 @@
+import threading
+import time
+
+import pytest
+
+from voice_assistant import memory
+from voice_assistant.memory import MESSAGE_OVERHEAD_TOKENS, ConversationMemory
+
+
+@pytest.fixture(autouse=True)
+def word_tokens(monkeypatch):
+    monkeypatch.setattr(memory, "count_tokens", lambda text: len(text.split()))
+
+
+def turn(i):
+    # With one token per word, a turn costs 6 + MESSAGE_OVERHEAD_TOKENS = 10 tokens
+    return {"role": "user" if i % 2 == 0 else "assistant", "content": f"{i} two three four five six"}
+
+
+def wait_until(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+class FakeSummarize:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.calls = []
+
+    def __call__(self, previous, turns):
+        self.calls.append((previous, [m["content"] for m in turns]))
+        if self.fail:
+            raise RuntimeError("model down")
+        return f"summary of {len(turns)}"
+
+
+def test_system_prompt_costs_its_words_plus_overhead():
+    conversation = ConversationMemory("be brief")
+    assert conversation.token_count == 2 + MESSAGE_OVERHEAD_TOKENS
+
+
+def test_messages_keep_the_newest_turns_within_the_budget():
+    # keep_recent is high enough that nothing is summarized
+    conversation = ConversationMemory("sys", max_tokens=45, keep_recent=100)
+    for i in range(6):
+        conversation.append(turn(i))
+    messages = conversation.messages
+    assert messages[0] == conversation.system_message
+    # 5 tokens of system prompt leave room for four 10-token turns
+    assert [m["content"][0] for m in messages[1:]] == ["2", "3", "4", "5"]
+    assert sum(memory.message_tokens(m) for m in messages) <= 45
+    # The full history is still held
+    assert conversation.token_count == 5 + 6 * 10
+
+
+def test_latest_message_is_sent_even_if_it_alone_exceeds_the_budget():
+    conversation = ConversationMemory("sys", max_tokens=10, keep_recent=100)
+    conversation.append(turn(0))
+    conversation.append({"role": "user", "content": "word " * 50})
+    assert [m["role"] for m in conversation.messages] == ["system", "user"]
+    assert conversation.messages[-1]["content"].startswith("word")
+
+
+def test_older_turns_are_folded_into_a_summary():
+    summarize = FakeSummarize()
+    conversation = ConversationMemory("sys", max_tokens=45, keep_recent=2, summarize=summarize)
+    for i in range(5):
+        conversation.append(turn(i))
+    wait_until(lambda: conversation.summary)
+    assert summarize.calls == [("", [turn(i)["content"] for i in range(3)])]
+    messages = conversation.messages
+    assert messages[1] == {"role": "system", "content": "Summary of the conversation so far: summary of 3"}
+    assert [m["content"][0] for m in messages[2:]] == ["3", "4"]
+    assert conversation.token_count <= 45
+
+
+def test_next_summary_builds_on_the_previous_one():
+    summarize = FakeSummarize()
+    conversation = ConversationMemory("sys", max_tokens=45, keep_recent=2, summarize=summarize)
+    for i in range(5):
+        conversation.append(turn(i))
+    wait_until(lambda: len(summarize.calls) == 1 and not conversation._summarizing)
+    for i in range(5, 8):
+        conversation.append(turn(i))
+    wait_until(lambda: len(summarize.calls) == 2 and not conversation._summarizing)
+    assert summarize.calls[1][0] == "summary of 3"
+
+
+def test_failed_summary_keeps_the_turns_and_retries_on_the_next_append():
+    summarize = FakeSummarize(fail=True)
+    conversation = ConversationMemory("sys", max_tokens=45, keep_recent=2, summarize=summarize)
+    for i in range(5):
+        conversation.append(turn(i))
+    wait_until(lambda: len(summarize.calls) == 1 and not conversation._summarizing)
+    assert conversation.summary == ""
+    assert conversation.token_count == 5 + 5 * 10
+    summarize.fail = False
+    conversation.append(turn(5))
+    wait_until(lambda: conversation.summary)
+    assert len(summarize.calls) == 2
+
+
+def test_without_a_summarizer_old_turns_are_dropped():
+    conversation = ConversationMemory("sys", max_tokens=45, keep_recent=2, summarize=None)
+    for i in range(5):
+        conversation.append(turn(i))
+    wait_until(lambda: not conversation._summarizing)
+    assert conversation.summary == ""
+    assert [m["content"][0] for m in conversation.messages[1:]] == ["3", "4"]
+
+
+def test_appends_during_a_summary_are_kept():
+    release = threading.Event()
+
+    def slow_summarize(previous, turns):
+        release.wait(2)
+        return "slow summary"
+
+    conversation = ConversationMemory("sys", max_tokens=45, keep_recent=2, summarize=slow_summarize)
+    for i in range(5):
+        conversation.append(turn(i))
+    conversation.append(turn(5))
+    release.set()
+    wait_until(lambda: conversation.summary)
+    # Turn 5 came after the folded turns, so it is still held
+    assert [m["content"][0] for m in conversation._turns] == ["3", "4", "5"]
+    assert conversation.messages[-1] == turn(5)
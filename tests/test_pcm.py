@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+
+from voice_assistant.pcm import PcmConverter, convert_sample_format, nearest_rate
+
+
+def int16_pcm(values):
+    return np.asarray(values, dtype=np.int16).tobytes()
+
+
+def split(data, sizes):
+    chunks, offset = [], 0
+    for size in sizes:
+        chunks.append(data[offset:offset + size])
+        offset += size
+    chunks.append(data[offset:])
+    return chunks
+
+
+def run(converter, chunks):
+    return b"".join(converter.process(chunk) for chunk in chunks)
+
+
+def test_format_conversion_round_trip():
+    pcm = int16_pcm([0, 16384, -16384, 32767, -32768])
+    floats = convert_sample_format(pcm, "int16", "float32")
+    assert np.frombuffer(floats, dtype=np.float32)[1] == pytest.approx(0.5)
+    back = np.frombuffer(convert_sample_format(floats, "float32", "int16"), dtype=np.int16)
+    assert np.abs(back.astype(int) - np.frombuffer(pcm, dtype=np.int16)).max() <= 1
+
+
+def test_nearest_rate_prefers_higher_on_tie():
+    assert nearest_rate(22050, (16000, 24000)) == 24000
+    assert nearest_rate(20000, (16000, 24000)) == 24000
+    assert nearest_rate(44100, (44100, 48000)) == 44100
+
+
+@pytest.mark.parametrize("sizes", [[1], [3, 5], [1, 1, 1], [7, 2, 9]])
+def test_odd_sized_chunks_format_only(sizes):
+    pcm = int16_pcm(range(-500, 500, 7))
+    converter = PcmConverter(16000, "int16", 16000, "float32")
+    assert run(converter, split(pcm, sizes)) == convert_sample_format(pcm, "int16", "float32")
+
+
+@pytest.mark.parametrize("sizes", [[1], [3, 5], [7, 2, 9]])
+def test_odd_sized_chunks_passthrough_yield_whole_samples(sizes):
+    pcm = int16_pcm(range(100))
+    converter = PcmConverter(44100, "int16", 44100, "int16")
+    outputs = [converter.process(chunk) for chunk in split(pcm, sizes)]
+    assert all(len(out) % 2 == 0 for out in outputs)
+    assert b"".join(outputs) == pcm
+
+
+def test_aligned_passthrough_returns_input_unchanged():
+    pcm = int16_pcm(range(10))
+    assert PcmConverter(22050, "int16", 22050, "int16").process(pcm) is pcm
+
+
+def test_resampling_matches_across_chunk_boundaries():
+    pcm = int16_pcm((np.sin(np.arange(2000) / 10) * 10000).astype(np.int16))
+    whole = PcmConverter(44100, "int16", 22050, "int16").process(pcm)
+    chunked = run(PcmConverter(44100, "int16", 22050, "int16"), split(pcm, [333, 1, 700, 5]))
+    assert chunked == whole
+    assert len(whole) // 2 == pytest.approx(1000, abs=1)
+
+
+def test_reset_drops_pending_bytes():
+    converter = PcmConverter(16000, "int16", 16000, "float32")
+    converter.process(b"\x01")
+    converter.reset()
+    assert converter.process(int16_pcm([0, 0])) == bytes(8)
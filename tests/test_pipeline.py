@@ -0,0 +1,162 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("pyaudio")
+
+from voice_assistant import pipeline
+from voice_assistant.memory import ConversationMemory
+from voice_assistant.pipeline import END, MicrophoneSource, VoicePipeline
+from voice_assistant.tracing import LLM_COMPLETE, LLM_FIRST_TOKEN, Tracer
+
+
+def generate(monkeypatch, stream):
+    monkeypatch.setattr(pipeline, "hedged_response_stream_async", stream)
+    monkeypatch.setattr(pipeline, "backoff_delay", lambda attempt: 0)
+    tracer = Tracer()
+    turn = tracer.start_turn()
+    voice = VoicePipeline(None, None, None, ConversationMemory("Be brief."), queue_size=16, tracer=tracer)
+
+    async def scenario():
+        tokens = asyncio.Queue(16)
+        await voice._generate(tokens, turn)
+        items = []
+        while not tokens.empty():
+            items.append(tokens.get_nowait())
+        return items
+
+    return asyncio.run(scenario()), turn.durations()
+
+
+def test_stream_that_breaks_off_still_ends_llm_complete(monkeypatch):
+    async def stream(model, messages):
+        yield "Hello"
+        yield " there"
+        raise RuntimeError("connection reset")
+
+    items, durations = generate(monkeypatch, stream)
+    assert items == ["Hello", " there", END]
+    assert LLM_FIRST_TOKEN in durations
+    assert LLM_COMPLETE in durations
+
+
+def test_stream_that_never_produces_falls_back_without_llm_complete(monkeypatch):
+    async def stream(model, messages):
+        raise RuntimeError("provider down")
+        yield
+
+    items, durations = generate(monkeypatch, stream)
+    assert items == [pipeline.FALLBACK_RESPONSE, END]
+    assert LLM_COMPLETE not in durations
+
+
+class BlockingCapture:
+    sample_rate = 16000
+
+    def __init__(self):
+        self.watching = threading.Event()
+        self.released = threading.Event()
+
+    def wait_for_speech(self, stop_event, threshold_multiplier, min_speech_ms):
+        self.watching.set()
+        while not stop_event.wait(0.05):
+            pass
+        time.sleep(0.05)
+        self.released.set()
+        return None
+
+
+def test_cancelled_microphone_watch_waits_for_the_capture_thread():
+    capture = BlockingCapture()
+
+    async def scenario():
+        stop = threading.Event()
+        watch = asyncio.create_task(MicrophoneSource(capture).wait_for_speech(stop))
+        await asyncio.to_thread(capture.watching.wait, 1)
+        watch.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await watch
+        # The next read would otherwise compete with the old thread for frames
+        assert stop.is_set()
+        assert capture.released.is_set()
+
+    asyncio.run(scenario())
+
+
+class BrokenMicrophoneSource:
+    sample_rate = 16000
+
+    async def wait_for_speech(self, stop_event):
+        await asyncio.sleep(0.02)
+        raise RuntimeError("Microphone stopped delivering audio")
+
+
+class PacedTTS:
+    sample_rate = 16000
+    sample_format = "int16"
+
+    async def stream(self, clauses):
+        async for clause in clauses:
+            await asyncio.sleep(0.02)
+            yield clause.encode("utf-8").ljust(64, b" ")
+
+
+class CollectingSink:
+    sample_rate = 16000
+    sample_format = "int16"
+
+    def __init__(self):
+        self.chunks = []
+        self.drained = False
+        self.cleared = False
+
+    async def write(self, chunk):
+        self.chunks.append(chunk)
+
+    async def drain(self):
+        self.drained = True
+
+    def clear(self):
+        self.cleared = True
+
+
+def test_reply_completes_when_barge_in_detection_fails(monkeypatch):
+    sentences = [f"This is sentence number {i} of the reply." for i in range(5)]
+
+    async def stream(model, messages):
+        for sentence in sentences:
+            yield sentence + " "
+
+    monkeypatch.setattr(pipeline, "hedged_response_stream_async", stream)
+    sink = CollectingSink()
+    voice = VoicePipeline(BrokenMicrophoneSource(), sink, PacedTTS(), ConversationMemory("Be brief."),
+                          barge_in=True, tracer=Tracer())
+    spoken = asyncio.run(asyncio.wait_for(voice.respond(), 2))
+    assert spoken == " ".join(sentences)
+    assert len(sink.chunks) == len(sentences)
+    assert sink.drained and not sink.cleared
+
+
+def test_run_backs_off_while_turns_keep_failing(monkeypatch):
+    outcomes = [RuntimeError("down"), RuntimeError("down"), "", RuntimeError("down"), "goodbye"]
+    delays = []
+
+    async def run_turn(self):
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    monkeypatch.setattr(VoicePipeline, "run_turn", run_turn)
+    monkeypatch.setattr(pipeline, "backoff_delay", lambda attempt: delays.append(attempt) or 0)
+
+    class TTS:
+        async def connect(self):
+            pass
+
+    voice = VoicePipeline(None, None, TTS(), None, barge_in=False, tracer=Tracer())
+    asyncio.run(asyncio.wait_for(voice.run(), 2))
+    # The counter restarts after the turn that succeeded
+    assert delays == [0, 1, 0]
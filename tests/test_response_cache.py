@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+
+from voice_assistant import response_cache
+from voice_assistant.response_cache import ResponseCache, embed, normalize_query
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def monotonic(self):
+        return self.now
+
+
+def history(question, system="You are a helpful assistant."):
+    return [{"role": "system", "content": system}, {"role": "user", "content": question}]
+
+
+def similarity(a, b):
+    return float(embed(normalize_query(a)) @ embed(normalize_query(b)))
+
+
+def test_embedding_is_normalized_and_stable():
+    vector = embed("what time is it")
+    assert vector.dtype == np.float32
+    assert np.linalg.norm(vector) == pytest.approx(1.0)
+    assert np.array_equal(vector, embed("what time is it"))
+
+
+def test_near_identical_questions_are_closer_than_different_ones():
+    assert similarity("What time is it?", "What TIME is it!!") == pytest.approx(1.0)
+    near = similarity("What time is it?", "what time is it now")
+    related = similarity("What is the capital of France?", "What is the capital of Spain?")
+    unrelated = similarity("What time is it?", "What is the weather in Paris?")
+    assert near > related > unrelated
+    assert unrelated < 0.5
+
+
+def test_exact_match_ignores_case_and_punctuation():
+    cache = ResponseCache(similarity_threshold=0.99)
+    cache.store("m", history("What time is it?"), "Noon.")
+    assert cache.lookup("m", history("  what TIME is it ")) == "Noon."
+
+
+@pytest.mark.parametrize("threshold, hit", [(0.8, True), (0.9, False)])
+def test_fuzzy_hit_depends_on_the_threshold(threshold, hit):
+    cache = ResponseCache(similarity_threshold=threshold)
+    cache.store("m", history("What time is it?"), "Noon.")
+    assert cache.lookup("m", history("What time is it now?")) == ("Noon." if hit else None)
+
+
+def test_similar_but_different_question_misses_at_a_strict_threshold():
+    cache = ResponseCache(similarity_threshold=0.85)
+    cache.store("m", history("What is the capital of France?"), "Paris.")
+    assert cache.lookup("m", history("What is the capital of Spain?")) is None
+
+
+def test_fuzzy_lookup_picks_the_nearest_question():
+    cache = ResponseCache(similarity_threshold=0.5)
+    cache.store("m", history("What is the weather in Paris?"), "Sunny.")
+    cache.store("m", history("What time is it?"), "Noon.")
+    assert cache.lookup("m", history("What time is it now?")) == "Noon."
+
+
+def test_replies_are_not_shared_across_models_or_system_prompts():
+    cache = ResponseCache()
+    cache.store("m", history("What time is it?"), "Noon.")
+    assert cache.lookup("other", history("What time is it?")) is None
+    assert cache.lookup("m", history("What time is it?", system="Answer in French.")) is None
+
+
+def test_entries_expire_and_least_recently_used_are_evicted(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(response_cache, "time", clock)
+    cache = ResponseCache(similarity_threshold=0.99, ttl=10, max_entries=2)
+    cache.store("m", history("one"), "1")
+    cache.store("m", history("two"), "2")
+    assert cache.lookup("m", history("one")) == "1"
+    cache.store("m", history("three"), "3")
+    # "two" was the least recently used
+    assert cache.lookup("m", history("two")) is None
+    assert cache.lookup("m", history("one")) == "1"
+    clock.now = 11.0
+    assert cache.lookup("m", history("three")) is None
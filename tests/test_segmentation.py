@@ -0,0 +1,62 @@
+import pytest
+
+from voice_assistant.segmentation import SentenceSegmenter, segment_sentences, split_sentences
+
+ENGLISH = "Dr. Smith will see you now. Please wait in the lobby, e.g. on the sofa. Thanks a lot!"
+HINDI = "नमस्ते, आप कैसे हैं। मैं ठीक हूँ, धन्यवाद। आज मौसम अच्छा है॥ चलिए टहलने चलते हैं।"
+
+
+def test_abbreviations_do_not_end_a_sentence():
+    assert split_sentences(ENGLISH) == [
+        "Dr. Smith will see you now.",
+        "Please wait in the lobby, e.g. on the sofa.",
+        "Thanks a lot!",
+    ]
+
+
+@pytest.mark.parametrize("abbreviation", ["Mr.", "Mrs.", "vs.", "etc.", "i.e.", "No."])
+def test_abbreviation_before_a_space_is_not_a_boundary(abbreviation):
+    segmenter = SentenceSegmenter()
+    assert segmenter.feed(f"Please ask about the forms {abbreviation} ") == []
+    assert segmenter.flush() == [f"Please ask about the forms {abbreviation}"]
+
+
+def test_danda_and_double_danda_end_sentences():
+    assert split_sentences(HINDI) == [
+        "नमस्ते, आप कैसे हैं।",
+        "मैं ठीक हूँ, धन्यवाद।",
+        "आज मौसम अच्छा है॥",
+        "चलिए टहलने चलते हैं।",
+    ]
+
+
+def test_closing_quote_stays_with_its_sentence():
+    assert split_sentences('He said "It is done." Then he left the room.') == [
+        'He said "It is done."',
+        "Then he left the room.",
+    ]
+
+
+def test_short_fragments_are_merged_with_the_next_sentence():
+    assert split_sentences("Hi! How are you doing today? Fine.") == ["Hi! How are you doing today?", "Fine."]
+
+
+@pytest.mark.parametrize("text", [ENGLISH, HINDI])
+def test_streamed_tokens_split_like_the_whole_text(text):
+    tokens = [text[i:i + 3] for i in range(0, len(text), 3)]
+    assert list(segment_sentences(tokens)) == split_sentences(text)
+
+
+def test_sentence_is_released_once_whitespace_follows_the_terminator():
+    segmenter = SentenceSegmenter()
+    assert segmenter.feed("The answer is forty-two.") == []
+    assert segmenter.feed(" And") == ["The answer is forty-two."]
+    assert segmenter.flush() == ["And"]
+    assert segmenter.flush() == []
+
+
+def test_long_text_without_terminators_is_split_at_max_chars():
+    clauses = split_sentences("word " * 60, max_chars=50)
+    assert len(clauses) == 6
+    assert all(len(clause) <= 50 for clause in clauses)
+    assert " ".join(clauses) == ("word " * 60).strip()
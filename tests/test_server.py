@@ -0,0 +1,162 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("pyaudio")
+pytest.importorskip("fastapi")
+
+from voice_assistant import pipeline
+from voice_assistant.memory import ConversationMemory
+from voice_assistant.pipeline import InputClosed, VoicePipeline
+from voice_assistant.server import WebSocketSource
+from voice_assistant.tracing import Tracer
+
+
+def speech_frame(source, amplitude=8000):
+    return amplitude.to_bytes(2, "little", signed=True) * (source.frame_bytes // 2)
+
+
+class ConnectOnlyTTS:
+    async def connect(self):
+        pass
+
+
+class FakeTTS:
+    sample_rate = 16000
+    sample_format = "int16"
+
+    async def stream(self, clauses):
+        async for clause in clauses:
+            yield clause.encode("utf-8").ljust(64, b" ")
+
+
+class SlowTTS(FakeTTS):
+    def __init__(self):
+        self.cancelled = False
+
+    async def stream(self, clauses):
+        try:
+            async for clause in clauses:
+                yield clause.encode("utf-8").ljust(64, b" ")
+                await asyncio.sleep(0.05)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+
+
+class RecordingSink:
+    sample_rate = 16000
+    sample_format = "int16"
+
+    def __init__(self):
+        self.chunks = []
+        self.drained = False
+        self.cleared = False
+
+    async def write(self, chunk):
+        self.chunks.append(chunk)
+
+    async def drain(self):
+        self.drained = True
+
+    def clear(self):
+        self.cleared = True
+
+
+def test_disconnect_mid_listen_raises_input_closed():
+    async def scenario():
+        source = WebSocketSource(sample_rate=16000, frame_ms=30, queue_size=8)
+        reader = asyncio.create_task(source.read_utterance())
+        await asyncio.sleep(0)
+        for _ in range(5):
+            await source.push(speech_frame(source))
+        source.close()
+        with pytest.raises(InputClosed):
+            await asyncio.wait_for(reader, 1)
+        # Later reads fail straight away instead of returning None forever
+        with pytest.raises(InputClosed):
+            await source.read_utterance()
+
+    asyncio.run(scenario())
+
+
+def test_pipeline_run_ends_when_input_closes():
+    async def scenario():
+        source = WebSocketSource(sample_rate=16000, frame_ms=30, queue_size=8)
+        tracer = Tracer()
+        pipeline = VoicePipeline(source, None, ConnectOnlyTTS(), None, barge_in=False, tracer=tracer)
+        runner = asyncio.create_task(pipeline.run())
+        await asyncio.sleep(0.01)
+        source.close()
+        await asyncio.wait_for(runner, 1)
+        assert tracer.turns.get("closed") == 1
+
+    asyncio.run(scenario())
+
+
+def test_reply_finishes_when_the_client_sends_no_audio_during_playback(monkeypatch):
+    async def stream(model, messages):
+        yield "The weather is sunny today. "
+        yield "Enjoy your walk in the park."
+
+    monkeypatch.setattr(pipeline, "hedged_response_stream_async", stream)
+
+    async def scenario():
+        # Half-duplex client: its microphone is muted while the assistant speaks
+        source = WebSocketSource(sample_rate=16000, frame_ms=30, queue_size=8)
+        sink = RecordingSink()
+        voice = VoicePipeline(source, sink, FakeTTS(), ConversationMemory("Be brief."), barge_in=True,
+                              tracer=Tracer())
+        spoken = await asyncio.wait_for(voice.respond(), 2)
+        assert spoken == "The weather is sunny today. Enjoy your walk in the park."
+        assert sink.drained
+        # The monitor let go of the input, so the next utterance can be read
+        reader = asyncio.create_task(source.read_utterance())
+        await asyncio.sleep(0)
+        source.close()
+        with pytest.raises(InputClosed):
+            await asyncio.wait_for(reader, 1)
+
+    asyncio.run(scenario())
+
+
+def test_speech_during_the_reply_barges_in(monkeypatch):
+    sentences = [f"This is sentence number {i} of a long reply. " for i in range(20)]
+
+    async def stream(model, messages):
+        for sentence in sentences:
+            yield sentence
+
+    monkeypatch.setattr(pipeline, "hedged_response_stream_async", stream)
+
+    async def scenario():
+        source = WebSocketSource(sample_rate=16000, frame_ms=30, queue_size=8)
+        sink = RecordingSink()
+        tts = SlowTTS()
+        events = []
+
+        async def on_event(kind, text):
+            events.append(kind)
+
+        voice = VoicePipeline(source, sink, tts, ConversationMemory("Be brief."), barge_in=True,
+                              on_event=on_event, tracer=Tracer())
+        reply = asyncio.create_task(voice.respond())
+        await asyncio.sleep(0.1)
+        speech = speech_frame(source, amplitude=20000)
+        for _ in range(10):
+            await source.push(speech)
+        spoken = await asyncio.wait_for(reply, 2)
+
+        assert events == ["barge_in"]
+        assert sink.cleared and not sink.drained
+        assert tts.cancelled
+        assert len(spoken) < len("".join(sentences))
+        # The speech that interrupted the reply starts the next utterance
+        reader = asyncio.create_task(source.read_utterance())
+        await asyncio.sleep(0)
+        for _ in range(100):
+            await source.push(bytes(source.frame_bytes))
+        pcm = await asyncio.wait_for(reader, 2)
+        assert pcm.startswith(speech * 3)
+
+    asyncio.run(scenario())
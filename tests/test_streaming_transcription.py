@@ -0,0 +1,83 @@
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("pyaudio")
+
+from voice_assistant import streaming_transcription
+from voice_assistant.config import Config
+from voice_assistant.streaming_transcription import ChunkedWhisperTranscriber, create_streaming_transcriber
+
+SPEECH = (8000).to_bytes(2, "little", signed=True) * 480
+SILENCE = bytes(960)
+
+
+class FakeTranscribe:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, model, audio, local_model_path=None):
+        with self.lock:
+            self.calls += 1
+        if self.fail:
+            raise RuntimeError("provider down")
+        return f"hypothesis {self.calls}"
+
+
+def make_transcriber(monkeypatch, fake):
+    monkeypatch.setattr(streaming_transcription, "hedged_transcribe", fake)
+    transcriber = ChunkedWhisperTranscriber("groq", frame_ms=30, early_pause_ms=90)
+    transcriber.start()
+    return transcriber
+
+
+def feed(transcriber, frames, pace=0.002):
+    for frame in frames:
+        transcriber.feed(frame)
+        time.sleep(pace)
+
+
+def test_continuous_speech_is_not_transcribed_until_finish(monkeypatch):
+    fake = FakeTranscribe()
+    transcriber = make_transcriber(monkeypatch, fake)
+    feed(transcriber, [SPEECH] * 100)
+    time.sleep(0.2)
+    assert fake.calls == 0
+    assert transcriber.finish() == "hypothesis 1"
+    assert fake.calls == 1
+
+
+def test_one_request_per_pause(monkeypatch):
+    fake = FakeTranscribe()
+    transcriber = make_transcriber(monkeypatch, fake)
+    for _ in range(2):
+        feed(transcriber, [SPEECH] * 10 + [SILENCE] * 5)
+        time.sleep(0.2)
+    assert fake.calls == 2
+    # The last pause already covers all the speech
+    assert transcriber.finish() == "hypothesis 2"
+    assert fake.calls == 2
+
+
+def test_failed_partial_backs_off(monkeypatch):
+    delays = []
+    monkeypatch.setattr(streaming_transcription, "backoff_delay", lambda attempt: delays.append(attempt) or 5.0)
+    fake = FakeTranscribe(fail=True)
+    transcriber = make_transcriber(monkeypatch, fake)
+    feed(transcriber, [SPEECH] * 10 + [SILENCE] * 5)
+    time.sleep(0.5)
+    # A retry every poll would have made about ten calls by now
+    assert fake.calls == 1
+    assert delays == [0]
+    with pytest.raises(RuntimeError):
+        transcriber.finish()
+
+
+def test_chunked_transcription_is_opt_in(monkeypatch):
+    monkeypatch.setattr(Config, "CHUNKED_TRANSCRIPTION", False)
+    assert create_streaming_transcriber("groq", None) is None
+    monkeypatch.setattr(Config, "CHUNKED_TRANSCRIPTION", True)
+    assert isinstance(create_streaming_transcriber("groq", None), ChunkedWhisperTranscriber)
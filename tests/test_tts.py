@@ -0,0 +1,18 @@
+import gc
+import sys
+
+import pytest
+
+pytest.importorskip("pyaudio")
+
+from tts import TextToSpeech
+
+
+def test_missing_api_key_raises_without_breaking_cleanup(monkeypatch):
+    unraisable = []
+    monkeypatch.setattr(sys, "unraisablehook", unraisable.append)
+    with pytest.raises(ValueError, match="CARTESIA_API_KEY"):
+        TextToSpeech(api_key="")
+    gc.collect()
+    # __del__ of the half-built instance must not fail
+    assert unraisable == []
@@ -2,22 +2,32 @@
 
 # tts.py
 import os
-import pyaudio
 import logging
-import numpy as np
-from pydub import AudioSegment
+import itertools
+import threading
+import uuid
+from typing import Callable, Iterable
 from dotenv import load_dotenv
-from cartesia import Cartesia
+from voice_assistant.audio_archive import AudioArchiveWriter, open_archive
+from voice_assistant.audio_output import AudioOutputEngine, get_output_engine, negotiate_output_format
+from voice_assistant.pcm import CARTESIA_SAMPLE_RATES, PCM_ENCODINGS, PcmConverter
+from voice_assistant.clients import get_client
+from voice_assistant.tts_cache import AudioCache, get_audio_cache
 
 class TextToSpeech:
-    """A class to handle text-to-speech conversion using Cartesia's WebSocket API."""
+    """
+    A class to handle text-to-speech conversion using Cartesia's WebSocket API.
 
-    # Class-level PyAudio instance to avoid reinitialization
-    _p = None
-    _p_ref_count = 0  # Track number of active TextToSpeech instances
+    An instance is meant to live for the whole session: the Cartesia client and its
+    WebSocket are created once, kept warm by a keepalive thread, re-established
+    automatically if the connection drops, and each utterance is sent under its own
+    context ID so consecutive replies are multiplexed over the same socket.
+    """
 
     def __init__(self, api_key: str, voice_id: str = "f91ab3e6-5071-4e15-b016-cde6f2bcd222", # for hindi - f91ab3e6-5071-4e15-b016-cde6f2bcd222 for english - 32b3f3c5-7171-46aa-abe7-b598964aa793
-                 model_id: str = "sonic-2", sample_rate: int = 22050):
+                 model_id: str = "sonic-2", sample_rate: int = None, keepalive_interval: float = 20.0,
+                 player: AudioOutputEngine = None, speed: str = None, cache: AudioCache = None,
+                 sample_format: str = None):
         """
         Initialize the TextToSpeech client with Cartesia API and audio settings.
 
@@ -25,8 +35,21 @@ class TextToSpeech:
             api_key (str): Cartesia API key.
             voice_id (str): ID of the voice to use for TTS.
             model_id (str): ID of the TTS model (e.g., 'sonic-2').
-            sample_rate (int): Audio sample rate (e.g., 22050 Hz).
+            sample_rate (int): Audio sample rate (e.g., 22050 Hz). Defaults to the
+                player's rate, or the rate closest to the output device's native rate.
+            keepalive_interval (float): Seconds between pings on an idle WebSocket
+                (0 disables the keepalive thread).
+            player (AudioOutputEngine): Output engine to play through. Defaults to the
+                shared session-wide engine for this sample rate.
+            speed (str): Speaking rate ('slowest' to 'fastest'), None for the voice default.
+            cache (AudioCache): Cache for repeated phrases. Defaults to the shared cache
+                (None if Config.TTS_CACHE is disabled).
+            sample_format (str): 'int16' or 'float32' PCM. Defaults to the player's format,
+                or 'int16', which is half the size of 'float32' on the wire.
         """
+        # Nothing to clean up (e.g. in __del__) unless the constructor gets to the end
+        self._closed = True
+
         # Set up logging (only if not already configured)
         if not logging.getLogger().hasHandlers():
             logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
@@ -35,25 +58,43 @@ class TextToSpeech:
         if not api_key:
             raise ValueError("CARTESIA_API_KEY is required")
         
-        # Initialize Cartesia client
-        self.client = Cartesia(api_key=api_key)
+        # Reuse the shared Cartesia client
+        self.client = get_client("cartesia", api_key)
         self.voice_id = voice_id
         self.model_id = model_id
+        # Ask Cartesia for exactly what the device plays, so no chunk needs converting
+        if player is not None:
+            sample_rate = sample_rate or player.sample_rate
+            sample_format = sample_format or player.sample_format
+        elif sample_rate is None:
+            sample_rate, sample_format = negotiate_output_format(CARTESIA_SAMPLE_RATES, sample_format or "int16")
         self.sample_rate = sample_rate
+        self.sample_format = sample_format or "int16"
+        self.speed = speed
+        self.cache = cache or get_audio_cache()
         self.output_format = {
             "container": "raw",
-            "encoding": "pcm_f32le",
-            "sample_rate": sample_rate
+            "encoding": PCM_ENCODINGS[self.sample_format],
+            "sample_rate": self.sample_rate
         }
         
-        # Initialize or reuse PyAudio
-        if TextToSpeech._p is None:
-            TextToSpeech._p = pyaudio.PyAudio()
-            logging.info("PyAudio initialized")
-        TextToSpeech._p_ref_count += 1
-        self.stream = None
+        # The output engine outlives this instance so the device stays open between replies
+        self.player = player or get_output_engine(self.sample_rate, self.sample_format)
+        self._converter = PcmConverter(self.sample_rate, self.sample_format,
+                                       self.player.sample_rate, self.player.sample_format)
         self.ws = None
 
+        # Serializes use of the WebSocket between utterances and the keepalive thread
+        self._ws_lock = threading.RLock()
+        self.keepalive_interval = keepalive_interval
+        self._stop_keepalive = threading.Event()
+        self._keepalive_thread = None
+        self._closed = False
+        if keepalive_interval:
+            self._keepalive_thread = threading.Thread(
+                target=self._keepalive_loop, name="tts-keepalive", daemon=True)
+            self._keepalive_thread.start()
+
     def __enter__(self):
         """Support context manager for resource initialization."""
         return self
@@ -63,114 +104,330 @@ class TextToSpeech:
         self.close()
 
     def close(self):
-        """Clean up audio stream and WebSocket, but keep PyAudio alive."""
-        if self.stream:
-            self.stream.stop_stream()
-            self.stream.close()
-            logging.info("Audio stream closed")
-            self.stream = None
-        if self.ws:
-            self.ws.close()
-            logging.info("WebSocket closed")
-            self.ws = None
-        # Decrement reference count and terminate PyAudio only if no instances remain
-        TextToSpeech._p_ref_count -= 1
-        if TextToSpeech._p_ref_count == 0 and TextToSpeech._p is not None:
-            TextToSpeech._p.terminate()
-            TextToSpeech._p = None
-            logging.info("PyAudio terminated")
-
-    def generate_audio(self, transcript: str, output_file: str = "output.mp3"):
+        """Close the WebSocket, but keep the shared audio output engine running."""
+        if self._closed:
+            return
+        self._closed = True
+        self._stop_keepalive.set()
+        self._disconnect()
+
+    def connect(self):
+        """
+        Open the WebSocket if it is not already open.
+
+        Call this at startup to pay the TLS and WebSocket handshake before the first reply.
+
+        Returns:
+            The open Cartesia WebSocket.
         """
-        Generate and stream audio from text, optionally saving to an MP3 file.
+        with self._ws_lock:
+            if self.ws is None:
+                logging.info("Connecting to Cartesia WebSocket...")
+                self.ws = self.client.tts.websocket()
+                logging.info("WebSocket connected")
+            return self.ws
+
+    def _disconnect(self):
+        """Close the WebSocket, ignoring errors from an already dropped connection."""
+        with self._ws_lock:
+            if self.ws:
+                try:
+                    self.ws.close()
+                    logging.info("WebSocket closed")
+                except Exception as e:
+                    logging.debug(f"Error while closing WebSocket: {e}")
+                self.ws = None
+
+    def _keepalive_loop(self):
+        """Ping the idle WebSocket periodically and reconnect if it has dropped."""
+        while not self._stop_keepalive.wait(self.keepalive_interval):
+            # Skip this round if an utterance is in flight; it keeps the socket busy anyway
+            if not self._ws_lock.acquire(blocking=False):
+                continue
+            try:
+                if self.ws is None:
+                    continue
+                pong = self.ws.websocket.ping()
+                if not pong.wait(timeout=5):
+                    raise TimeoutError("no pong received")
+                logging.debug("WebSocket keepalive ping succeeded")
+            except Exception as e:
+                logging.warning(f"WebSocket keepalive failed ({e}), reconnecting...")
+                self._disconnect()
+                try:
+                    self.connect()
+                except Exception as e:
+                    logging.error(f"Failed to reconnect WebSocket: {e}")
+            finally:
+                self._ws_lock.release()
+
+    def generate_audio(self, transcript: str, output_file: str = "output.wav"):
+        """
+        Generate and stream audio from text, optionally saving it to a file.
+
+        Short phrases are looked up in the audio cache first; a hit is played straight
+        from memory or disk without contacting Cartesia. Saving happens on a background
+        writer, so this returns as soon as the last sample has been played.
 
         Args:
             transcript (str): Text to convert to speech.
-            output_file (str): Path to save the MP3 file (optional).
+            output_file (str): Path to save the audio to (optional; .wav, .flac, .ogg,
+                .opus or .mp3).
 
         Raises:
             ValueError: If the output buffer type is unexpected.
             RuntimeError: If WebSocket connection or TTS request fails.
         """
-        audio_buffers = []
-        
+        archive = open_archive(output_file, self.sample_rate, self.sample_format)
+        self._converter.reset()
+        key = self._cache_key(transcript)
+        cached = self.cache.get(key) if key else None
+        if cached is not None:
+            logging.info("Playing cached TTS audio")
+            try:
+                self._play(cached, archive)
+            finally:
+                self._finish(archive)
+            return
+
         try:
-            # Set up WebSocket connection
-            logging.info("Attempting to connect to WebSocket...")
-            self.ws = self.client.tts.websocket()
-            
-            # Generate and stream audio
-            logging.info("Sending TTS request...")
-            for output in self.ws.send(
-                model_id=self.model_id,
-                transcript=transcript,
-                voice={"id": self.voice_id},
-                stream=True,
-                output_format=self.output_format,
-            ):
-                # Debugging: Inspect output
-                logging.debug(f"Output type: {type(output)}")
-                logging.debug(f"Output attributes: {dir(output)}")
-                
-                # Extract audio data (assuming 'audio' attribute holds bytes)
-                buffer = getattr(output, 'audio', output)
-                
-                # Ensure buffer is bytes
-                if not isinstance(buffer, bytes):
-                    logging.warning(f"Expected bytes, got {type(buffer)}. Attempting to convert...")
-                    if isinstance(buffer, str):
-                        buffer = buffer.encode('utf-8')  # Unlikely for audio
-                    else:
-                        raise ValueError(f"Unexpected buffer type: {type(buffer)}")
-                
-                # Collect buffer for saving
-                audio_buffers.append(buffer)
-                
-                # Stream audio in real-time
-                if not self.stream:
+            # Chunks are only kept when the phrase is short enough to be cached
+            audio_buffers = self._synthesize(transcript, on_buffer=lambda buffer: self._play(buffer, archive),
+                                             collect=bool(key))
+            if key and audio_buffers:
+                self.cache.put(key, b''.join(audio_buffers))
+        finally:
+            self._finish(archive)
+
+    def prewarm(self, transcripts: Iterable[str]):
+        """
+        Synthesize phrases into the audio cache without playing them.
+
+        Call this at startup (e.g. on a background thread) for fixed phrases such as the
+        fallback response, so they can be played even when the network is failing.
+
+        Args:
+            transcripts (Iterable[str]): The phrases to cache.
+        """
+        for transcript in transcripts:
+            key = self._cache_key(transcript)
+            if not key or self.cache.get(key) is not None:
+                continue
+            try:
+                audio_buffers = self._synthesize(transcript, collect=True)
+                if audio_buffers:
+                    self.cache.put(key, b''.join(audio_buffers))
+                    logging.info(f"Cached TTS audio for: {transcript[:40]}")
+            except Exception as e:
+                logging.warning(f"Failed to prewarm TTS cache: {e}")
+
+    def _cache_key(self, transcript: str):
+        """Return the audio cache key for a transcript, or None if it should not be cached."""
+        if self.cache is None or not self.cache.cacheable(transcript):
+            return None
+        return self.cache.make_key(transcript, self.voice_id, self.model_id, self.sample_rate,
+                                   self.speed, self.output_format["encoding"])
+
+    def _voice(self) -> dict:
+        """Return the voice specification sent with each request."""
+        voice = {"id": self.voice_id}
+        if self.speed is not None:
+            voice["__experimental_controls"] = {"speed": self.speed}
+        return voice
+
+    def _synthesize(self, transcript: str, on_buffer: Callable[[bytes], None] = None, collect: bool = False):
+        """
+        Send one transcript over the WebSocket and stream its audio to `on_buffer`.
+
+        Args:
+            transcript (str): Text to convert to speech.
+            on_buffer (Callable): Called with each audio chunk as it arrives.
+            collect (bool): Whether to also return the chunks.
+
+        Returns:
+            list | None: The raw PCM chunks if `collect` is set.
+        """
+        audio_buffers = []
+        received = 0
+
+        with self._ws_lock:
+            try:
+                for attempt in range(2):
+                    ws = self.connect()
+                    context_id = f"turn-{uuid.uuid4()}"
                     try:
-                        self.stream = TextToSpeech._p.open(
-                            format=pyaudio.paFloat32,
-                            channels=1,
-                            rate=self.sample_rate,
-                            output=True
-                        )
-                        logging.info("Audio stream opened")
+                        # Generate and stream audio
+                        logging.info(f"Sending TTS request (context {context_id})...")
+                        for output in ws.send(
+                            model_id=self.model_id,
+                            transcript=transcript,
+                            voice=self._voice(),
+                            context_id=context_id,
+                            stream=True,
+                            output_format=self.output_format,
+                        ):
+                            buffer = self._extract_buffer(output)
+                            received += 1
+                            if collect:
+                                audio_buffers.append(buffer)
+                            
+                            # Stream audio in real-time
+                            if on_buffer:
+                                on_buffer(buffer)
+                        break
                     except Exception as e:
-                        logging.error(f"Failed to open audio stream: {e}")
-                        raise
-                
-                self.stream.write(buffer)
-                logging.debug(f"Streamed {len(buffer)} bytes")
-            
-            # Save to MP3 if requested
-            if audio_buffers and output_file:
-                logging.info(f"Saving audio to {output_file}...")
-                audio_data = b''.join(audio_buffers)
-                audio_array = np.frombuffer(audio_data, dtype=np.float32)
-                audio_array_int16 = (audio_array * 32767).astype(np.int16)
-                audio_segment = AudioSegment(
-                    audio_array_int16.tobytes(),
-                    frame_rate=self.sample_rate,
-                    sample_width=2,
-                    channels=1
-                )
-                audio_segment.export(output_file, format="mp3")
-                logging.info(f"Audio saved to {output_file}")
+                        # A dropped connection is only safe to retry if nothing was played yet
+                        if received or attempt == 1:
+                            raise
+                        logging.warning(f"WebSocket request failed ({e}), reconnecting...")
+                        self._disconnect()
             
-            if not audio_buffers:
-                logging.error("No audio buffers received from Cartesia API")
+            except Exception as e:
+                logging.error(f"Error during WebSocket operation: {e}")
+                self._disconnect()
+                raise
+
+        if not received:
+            logging.error("No audio buffers received from Cartesia API")
+        return audio_buffers if collect else None
+
+    def generate_audio_stream(self, transcripts: Iterable[str], output_file: str = None,
+                              on_first_audio: Callable[[], None] = None,
+                              on_first_byte: Callable[[], None] = None) -> str:
+        """
+        Stream audio for text that is still being generated.
+
+        Each clause from `transcripts` is pushed into a single Cartesia context as soon as
+        it is available (with `continue_=True`), so playback of the first sentence starts
+        while the language model is still producing the rest of the reply. Clauses are sent
+        from a feeder thread while this thread receives and plays audio.
+
+        Args:
+            transcripts (Iterable[str]): Complete clauses, e.g. from segment_sentences.
+            output_file (str): Path to save the audio to (optional, saved in the background).
+            on_first_audio (Callable): Called once when the first audio chunk is audible.
+            on_first_byte (Callable): Called once when the first audio chunk is received.
+
+        Returns:
+            str: The full text that was spoken.
+
+        Raises:
+            ValueError: If the output buffer type is unexpected.
+            RuntimeError: If WebSocket connection or TTS request fails.
+        """
+        received = 0
+        spoken = []
+        pending = iter(transcripts)
+
+        # Do not open a context for a reply that produced no text at all
+        first = next(pending, None)
+        if first is None:
+            logging.warning("No text to speak")
+            return ""
+        pending = itertools.chain([first], pending)
+
+        archive = open_archive(output_file, self.sample_rate, self.sample_format)
+        self._converter.reset()
+        if on_first_audio:
+            self.player.call_when_audio_starts(on_first_audio)
+        with self._ws_lock:
+            try:
+                for attempt in range(2):
+                    ws = self.connect()
+                    context = ws.context(f"turn-{uuid.uuid4()}")
+                    # On a retry, replay the clauses already taken from the generator
+                    clauses = itertools.chain(list(spoken), pending)
+                    spoken.clear()
+                    feeder_error = []
+
+                    def feed():
+                        try:
+                            for transcript in clauses:
+                                if not transcript.strip():
+                                    continue
+                                spoken.append(transcript)
+                                logging.debug(f"Sending clause: {transcript}")
+                                context.send(
+                                    model_id=self.model_id,
+                                    # Keep a trailing space so Cartesia does not merge words across clauses
+                                    transcript=transcript + " ",
+                                    voice=self._voice(),
+                                    continue_=True,
+                                    output_format=self.output_format,
+                                )
+                        except Exception as e:
+                            feeder_error.append(e)
+                        finally:
+                            try:
+                                context.no_more_inputs()
+                            except Exception as e:
+                                feeder_error.append(e)
+
+                    feeder = threading.Thread(target=feed, name="tts-feeder", daemon=True)
+                    feeder.start()
+                    try:
+                        for output in context.receive():
+                            buffer = self._extract_buffer(output)
+                            received += 1
+                            if received == 1 and on_first_byte:
+                                on_first_byte()
+                            self._play(buffer, archive)
+                        feeder.join()
+                        if feeder_error:
+                            raise feeder_error[0]
+                        break
+                    except Exception as e:
+                        feeder.join()
+                        if received or attempt == 1:
+                            raise
+                        logging.warning(f"WebSocket stream failed ({e}), reconnecting...")
+                        self._disconnect()
+
+                if not received:
+                    logging.error("No audio buffers received from Cartesia API")
+            except Exception as e:
+                logging.error(f"Error during streaming WebSocket operation: {e}")
+                self._disconnect()
+                raise
+            finally:
+                self._finish(archive)
+
+        return " ".join(spoken)
+
+    def _extract_buffer(self, output) -> bytes:
+        """Return the raw audio bytes carried by a Cartesia WebSocket response."""
+        # Debugging: Inspect output
+        logging.debug(f"Output type: {type(output)}")
+        logging.debug(f"Output attributes: {dir(output)}")
         
-        except Exception as e:
-            logging.error(f"Error during WebSocket operation: {e}")
-            raise
-        finally:
-            # Close stream after each generation to prepare for next use
-            if self.stream:
-                self.stream.stop_stream()
-                self.stream.close()
-                logging.info("Audio stream closed")
-                self.stream = None
+        # Extract audio data (assuming 'audio' attribute holds bytes)
+        buffer = getattr(output, 'audio', output)
+        
+        # Ensure buffer is bytes
+        if not isinstance(buffer, bytes):
+            logging.warning(f"Expected bytes, got {type(buffer)}. Attempting to convert...")
+            if isinstance(buffer, str):
+                buffer = buffer.encode('utf-8')  # Unlikely for audio
+            else:
+                raise ValueError(f"Unexpected buffer type: {type(buffer)}")
+        return buffer
+
+    def _play(self, buffer: bytes, archive: AudioArchiveWriter = None):
+        """Queue a chunk on the already-running output engine and the archive, if any."""
+        self.player.write(self._converter.process(buffer))
+        if archive:
+            archive.write(buffer)
+        logging.debug(f"Streamed {len(buffer)} bytes")
+
+    def _finish(self, archive: AudioArchiveWriter = None):
+        """Let the archive finish in the background and wait for playback to end."""
+        if archive:
+            archive.close()
+        self._wait_for_playback()
+
+    def _wait_for_playback(self):
+        """Block until the queued audio has been played, leaving the device open."""
+        self.player.wait_until_done()
 
     def __del__(self):
         """Ensure resources are cleaned up when the object is deleted."""
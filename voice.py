@@ -1,15 +1,31 @@
 # voice_assistant/main.py
 
+import asyncio
 import logging
 import os
+import threading
 import time
+# Taken before the voice_assistant imports, so the startup log line includes them
+_startup_start = time.perf_counter()
+from functools import lru_cache
 from dotenv import load_dotenv
 from colorama import Fore, init
-from voice_assistant.audio import record_audio
-from voice_assistant.transcription import transcribe_audio
-from voice_assistant.response_generation import generate_response
+from voice_assistant.audio import play_audio, record_audio
+from voice_assistant.audio_output import get_output_engine
+from voice_assistant.backends import get_response_backend, get_tts_backend, preload_backends
+from voice_assistant.capture import MicrophoneCapture, pcm_to_wav
+from voice_assistant.health import CircuitOpenError, backoff_delay, health_report
+from voice_assistant.hedging import hedged_response_stream, hedged_transcribe
+from voice_assistant.response_generation import FALLBACK_RESPONSE
+from voice_assistant.memory import create_memory
+from voice_assistant.pipeline import run_local
+from voice_assistant.response_cache import get_response_cache
+from voice_assistant.segmentation import segment_sentences
+from voice_assistant.streaming_transcription import create_streaming_transcriber
+from voice_assistant.text_to_speech import text_to_speech
+from voice_assistant.tracing import (FIRST_AUDIO, LLM_COMPLETE, LLM_FIRST_TOKEN, PLAYBACK_END, STT,
+                                     TTS_FIRST_BYTE, get_tracer)
 from voice_assistant.config import Config
-from tts import TextToSpeech
 from voice_assistant.api_key_manager import get_transcription_api_key, get_response_api_key, get_tts_api_key
 
 # Configure logging
@@ -20,75 +36,310 @@ init(autoreset=True)
 
 # Load environment variables
 load_dotenv()
-api_key = os.getenv("CARTESIA_API_KEY")
 
-def safe_transcribe():
-    """Retry transcription up to 3 times if it fails."""
+@lru_cache(maxsize=None)
+def get_tts():
+    """
+    Return the session-wide streaming TTS session, or None if the configured TTS
+    backend only synthesizes whole files.
+
+    The client and WebSocket are created once and reused across turns so each reply
+    does not pay a fresh TLS and WebSocket handshake.
+    """
+    return get_tts_backend(Config.TTS_MODEL, get_tts_api_key()).create_session(
+        keepalive_interval=Config.TTS_KEEPALIVE_INTERVAL
+    )
+
+def is_playing():
+    """Return whether the assistant is speaking through the streaming session."""
+    tts = get_tts()
+    return tts is not None and tts.player.is_playing
+
+@lru_cache(maxsize=None)
+def get_capture():
+    """Return the session-wide in-memory microphone capture."""
+    return MicrophoneCapture(
+        sample_rate=Config.CAPTURE_SAMPLE_RATE,
+        frame_ms=Config.CAPTURE_FRAME_MS,
+        energy_threshold=Config.VAD_ENERGY_THRESHOLD,
+        pause_threshold=Config.VAD_PAUSE_THRESHOLD,
+        adaptive_threshold=Config.VAD_ADAPTIVE_THRESHOLD,
+        noise_multiplier=Config.VAD_NOISE_MULTIPLIER,
+        playback_active=is_playing
+    )
+
+def record_input(turn):
+    """
+    Record the user's utterance.
+
+    Args:
+        turn (Turn): The trace of the current turn; capture ends when the utterance does.
+
+    Returns:
+        str | bytes | None: An in-memory WAV file when Config.IN_MEMORY_CAPTURE is set,
+        otherwise the path of the recorded file; None if no speech was captured.
+    """
+    if not Config.IN_MEMORY_CAPTURE:
+        record_audio(Config.INPUT_AUDIO)
+        turn.end_capture()
+        return Config.INPUT_AUDIO
+    capture = get_capture()
+    pcm = capture.record_utterance()
+    turn.end_capture(capture.last_endpoint_delay)
+    if not pcm:
+        return None
+    return pcm_to_wav(pcm, Config.CAPTURE_SAMPLE_RATE)
+
+def safe_transcribe(audio):
+    """
+    Retry transcription up to 3 times if it fails.
+
+    Each attempt is hedged: a slow or failing primary is raced against the backup
+    models in Config.TRANSCRIPTION_HEDGE_MODELS, and abandoned after Config.TRANSCRIPTION_TIMEOUT.
+    Failed attempts are retried after an exponential backoff with jitter, and not at
+    all while every backend's circuit is open.
+    """
     attempts = 0
     while attempts < 3:
         try:
-            transcription_api_key = get_transcription_api_key()
-            user_input = transcribe_audio(
-                Config.TRANSCRIPTION_MODEL,
-                transcription_api_key,
-                Config.INPUT_AUDIO,
-                Config.LOCAL_MODEL_PATH
-            )
+            user_input = hedged_transcribe(Config.TRANSCRIPTION_MODEL, audio, Config.LOCAL_MODEL_PATH)
             if user_input:
                 return user_input
+        except CircuitOpenError as e:
+            logging.warning(Fore.RED + f"Transcription unavailable: {e}" + Fore.RESET)
+            break
         except Exception as e:
             logging.warning(Fore.RED + f"Transcription attempt {attempts+1} failed: {e}" + Fore.RESET)
+            if attempts < 2:
+                time.sleep(backoff_delay(attempts))
         attempts += 1
     return ""
 
+def record_and_transcribe_streaming(turn):
+    """
+    Record the user's utterance while transcribing it incrementally.
+
+    Frames are fed to a streaming transcriber as they are captured, so the transcript is
+    ready almost as soon as the VAD endpoints the utterance. If the model cannot
+    transcribe incrementally, or streaming transcription fails, the captured audio is
+    transcribed as a whole with safe_transcribe.
+
+    Args:
+        turn (Turn): The trace of the current turn; STT covers only the time after the endpoint.
+
+    Returns:
+        str: The transcript ('' if nothing was understood).
+    """
+    capture = get_capture()
+    transcriber = create_streaming_transcriber(
+        Config.TRANSCRIPTION_MODEL,
+        get_transcription_api_key(),
+        sample_rate=Config.CAPTURE_SAMPLE_RATE,
+        on_partial=lambda text: logging.debug(f"Partial transcript: {text}"),
+        speech_threshold=lambda: capture.vad.energy_threshold,
+        frame_ms=Config.CAPTURE_FRAME_MS,
+        local_model_path=Config.LOCAL_MODEL_PATH
+    )
+
+    streaming = transcriber is not None
+    if streaming:
+        try:
+            transcriber.start()
+        except Exception as e:
+            logging.warning(Fore.RED + f"Streaming transcription unavailable: {e}" + Fore.RESET)
+            streaming = False
+
+    def on_frame(frame):
+        nonlocal streaming
+        if not streaming:
+            return
+        try:
+            transcriber.feed(frame)
+        except Exception as e:
+            logging.warning(Fore.RED + f"Streaming transcription failed: {e}" + Fore.RESET)
+            streaming = False
+
+    pcm = capture.record_utterance(on_frame=on_frame)
+    turn.end_capture(capture.last_endpoint_delay)
+
+    user_input = ""
+    with turn.span(STT):
+        if streaming:
+            try:
+                user_input = transcriber.finish()
+            except Exception as e:
+                logging.warning(Fore.RED + f"Streaming transcription failed: {e}" + Fore.RESET)
+        if not user_input and pcm:
+            user_input = safe_transcribe(pcm_to_wav(pcm, Config.CAPTURE_SAMPLE_RATE))
+    return user_input
+
 def safe_generate_response(chat_history):
-    """Retry response generation up to 3 times if it fails."""
+    """Retry response generation up to 3 times if it fails, hedging each attempt and backing off between them."""
     attempts = 0
     while attempts < 3:
         try:
-            response_api_key = get_response_api_key()
-            response_text = generate_response(
+            response_text = "".join(hedged_response_stream(
                 Config.RESPONSE_MODEL,
-                response_api_key,
                 chat_history,
                 Config.LOCAL_MODEL_PATH
-            )
+            ))
             if response_text:
                 return response_text
+        except CircuitOpenError as e:
+            logging.warning(Fore.RED + f"Response generation unavailable: {e}" + Fore.RESET)
+            break
         except Exception as e:
             logging.warning(Fore.RED + f"Response generation attempt {attempts+1} failed: {e}" + Fore.RESET)
+            if attempts < 2:
+                time.sleep(backoff_delay(attempts))
+        attempts += 1
+    return FALLBACK_RESPONSE
+
+def safe_generate_response_stream(chat_history, fallback=True):
+    """
+    Stream response tokens, retrying up to 3 times only if nothing has been produced yet.
+
+    Once tokens have been yielded they may already be playing, so a failure mid-stream
+    ends the reply instead of restarting it. Each attempt is hedged on time to first
+    token with the backup models in Config.RESPONSE_HEDGE_MODELS, and retries back off
+    exponentially with jitter.
+
+    Args:
+        chat_history (list): The chat history sent to the language model.
+        fallback (bool): Whether to yield FALLBACK_RESPONSE if every attempt failed.
+    """
+    attempts = 0
+    while attempts < 3:
+        produced = False
+        try:
+            for token in hedged_response_stream(
+                Config.RESPONSE_MODEL,
+                chat_history,
+                Config.LOCAL_MODEL_PATH
+            ):
+                produced = True
+                yield token
+            if produced:
+                return
+        except CircuitOpenError as e:
+            logging.warning(Fore.RED + f"Response generation unavailable: {e}" + Fore.RESET)
+            break
+        except Exception as e:
+            logging.warning(Fore.RED + f"Streaming response attempt {attempts+1} failed: {e}" + Fore.RESET)
+            if produced:
+                return
+            if attempts < 2:
+                time.sleep(backoff_delay(attempts))
         attempts += 1
-    return "I'm having a little technical hiccup right now, but I'm still here for you!"
+    if fallback:
+        yield FALLBACK_RESPONSE
+
+def safe_tts(response_text, turn):
+    """
+    Generate TTS safely.
 
-def safe_tts(response_text):
-    """Generate TTS safely."""
-    start = time.perf_counter()
+    Args:
+        response_text (str): The text to speak.
+        turn (Turn): The trace of the current turn (TTS first byte, first audio, playback end).
+    """
     try:
-        with TextToSpeech(api_key=api_key) as tts:
+        tts = get_tts()
+        turn.start(TTS_FIRST_BYTE)
+        if tts is not None:
+            tts.player.call_when_audio_starts(lambda: turn.stop(FIRST_AUDIO))
             tts.generate_audio(
                 transcript=response_text,
-                output_file="output.mp3"
+                output_file=Config.TTS_ARCHIVE_FILE
             )
-        tts_time = time.perf_counter() - start
-        logging.info(Fore.YELLOW + f"TTS time: {tts_time:.3f} seconds" + Fore.RESET)
+        else:
+            backend = get_tts_backend(Config.TTS_MODEL, get_tts_api_key())
+            stream = backend.synthesize_stream(response_text)
+            if stream is not None:
+                # Streaming backends without a session: play each chunk as it arrives
+                sample_rate, sample_format, chunks = stream
+                player = get_output_engine(sample_rate, sample_format)
+                player.call_when_audio_starts(lambda: turn.stop(FIRST_AUDIO))
+                for chunk in chunks:
+                    turn.stop(TTS_FIRST_BYTE)
+                    player.write(chunk)
+                player.wait_until_done()
+            else:
+                # File-based backends: synthesize the whole reply, then play it
+                output_file = os.path.splitext(Config.TTS_ARCHIVE_FILE or "output")[0] + backend.file_extension
+                text_to_speech(Config.TTS_MODEL, get_tts_api_key(), response_text, output_file, Config.LOCAL_MODEL_PATH)
+                turn.stop(TTS_FIRST_BYTE)
+                turn.stop(FIRST_AUDIO)
+                play_audio(output_file)
+        turn.stop(PLAYBACK_END)
     except Exception as e:
         logging.error(Fore.RED + f"TTS generation failed: {e}" + Fore.RESET)
 
+def safe_stream_response_and_tts(chat_history, turn):
+    """
+    Generate the response and speak it sentence by sentence as it is produced.
+
+    Args:
+        chat_history (list): The chat history sent to the language model.
+        turn (Turn): The trace of the current turn (LLM, TTS and playback stages).
+
+    Returns:
+        str: The text that was spoken.
+    """
+    cache = get_response_cache()
+    cached = cache.lookup(Config.RESPONSE_MODEL, chat_history) if cache is not None else None
+    if cached is not None:
+        # The whole reply is known up front; generate_audio can also serve it from the audio cache
+        logging.info(Fore.YELLOW + "Response cache hit" + Fore.RESET)
+        safe_tts(cached, turn)
+        return cached
+
+    def tokens():
+        turn.start(LLM_FIRST_TOKEN)
+        turn.start(LLM_COMPLETE)
+        produced = False
+        for token in safe_generate_response_stream(chat_history, fallback=False):
+            turn.stop(LLM_FIRST_TOKEN)
+            produced = True
+            yield token
+        if produced:
+            turn.stop(LLM_COMPLETE)
+
+    clauses = []
+
+    def spoken_clauses():
+        for clause in segment_sentences(tokens()):
+            turn.start(TTS_FIRST_BYTE)
+            clauses.append(clause)
+            yield clause
+
+    try:
+        get_tts().generate_audio_stream(
+            spoken_clauses(),
+            output_file=Config.TTS_ARCHIVE_FILE,
+            on_first_audio=lambda: turn.stop(FIRST_AUDIO),
+            on_first_byte=lambda: turn.stop(TTS_FIRST_BYTE)
+        )
+        if clauses:
+            turn.stop(PLAYBACK_END)
+    except Exception as e:
+        logging.error(Fore.RED + f"Streaming TTS failed: {e}" + Fore.RESET)
+
+    if not clauses:
+        # The language model failed; the fallback is usually cached so it plays without the network
+        clauses.append(FALLBACK_RESPONSE)
+        safe_tts(FALLBACK_RESPONSE, turn)
+
+    return " ".join(clauses)
+
 def main():
     print("hrl")
     """
     Main function to run the voice assistant with benchmarking and reliability.
     """
-    chat_history = [
-    {"role": "system", "content": """ 
-     You are a highly empathetic, friendly, and cheerful assistant designed to help visually impaired people users. 
-        Respond clearly, kindly, with light humor, using **no more than 20 words** per response.
-        Always be patient, encouraging, and positive.
-        Educate gently without rushing. Make your tone feel like a close, caring friend.
-        Support, guide, educate, and bring joy.
-        
-        """}
-]
+    # Bounded history: the system prompt, a rolling summary and the most recent turns
+    memory = create_memory(Config.SYSTEM_PROMPT)
+    # Import the configured providers' SDKs while the user starts talking
+    threading.Thread(target=preload_backends, name="sdk-preload", daemon=True).start()
     # hindi text -  You are a highly empathetic, friendly, and cheerful assistant designed to help visually impaired users.
     #     Always respond only in Hindi. Never use English words unless absolutely necessary (like bus numbers or place names).
     #     Your response must be short, clear, polite, positive, slightly humorous if appropriate, and within 20 words.
@@ -117,75 +368,104 @@ def main():
         # Your goal is to create an inclusive, joyful voice experience for blind users.
 
 
-    # Lists to store timing data
-    recording_times, transcription_times, response_times, tts_times, total_times = [], [], [], [], []
+    if Config.ASYNC_PIPELINE:
+        if get_tts_backend(Config.TTS_MODEL, get_tts_api_key()).capabilities.async_native:
+            asyncio.run(run_local(memory))
+            return
+        logging.warning(Fore.RED + f"{Config.TTS_MODEL} has no async TTS; using the threaded loop" + Fore.RESET)
+
+    # Reply sentence by sentence only when both the language model and the TTS can stream
+    stream_responses = (
+        Config.STREAM_RESPONSES
+        and get_response_backend(Config.RESPONSE_MODEL, get_response_api_key()).capabilities.streaming
+        and get_tts() is not None
+    )
+
+    # Open the TTS WebSocket and the output device up front so the first reply does not pay for them
+    try:
+        tts = get_tts()
+        if tts is not None:
+            tts.connect()
+            tts.player.start()
+        if Config.IN_MEMORY_CAPTURE:
+            # Start listening now so the noise floor is settled by the first turn
+            get_capture().start()
+        if tts is not None:
+            # Cache fixed phrases while the user starts talking, so they never wait on the network
+            threading.Thread(
+                target=tts.prewarm, args=([FALLBACK_RESPONSE] + Config.TTS_PREWARM_PHRASES,),
+                name="tts-prewarm", daemon=True
+            ).start()
+    except Exception as e:
+        logging.warning(Fore.RED + f"Could not pre-start audio or TTS: {e}" + Fore.RESET)
+
+    logging.info(Fore.YELLOW + f"Startup time: {time.perf_counter() - _startup_start:.3f} seconds" + Fore.RESET)
+
+    consecutive_errors = 0
+    # Per-stage latency histograms; each turn is logged, and exported if configured
+    tracer = get_tracer()
 
     while True:
+        turn = tracer.start_turn()
         try:
-            total_start = time.perf_counter()
-
-            # Record user input
-            start = time.perf_counter()
-            record_audio(Config.INPUT_AUDIO)
-            recording_time = time.perf_counter() - start
-            recording_times.append(recording_time)
-            logging.info(Fore.YELLOW + f"Recording time: {recording_time:.3f} seconds" + Fore.RESET)
-
-            # Transcribe user input
-            start = time.perf_counter()
-            user_input = safe_transcribe()
-            transcription_time = time.perf_counter() - start
-            transcription_times.append(transcription_time)
-            logging.info(Fore.YELLOW + f"Transcription time: {transcription_time:.3f} seconds" + Fore.RESET)
+            if Config.IN_MEMORY_CAPTURE and Config.STREAMING_TRANSCRIPTION:
+                # Record and transcribe concurrently
+                user_input = record_and_transcribe_streaming(turn)
+            else:
+                # Record user input
+                audio = record_input(turn)
+
+                # Transcribe user input
+                with turn.span(STT):
+                    user_input = safe_transcribe(audio) if audio else ""
 
             if not user_input:
                 logging.warning(Fore.RED + "No transcription detected. Restarting..." + Fore.RESET)
-                total_time = time.perf_counter() - total_start
-                total_times.append(total_time)
+                turn.finish("no_input")
                 continue
 
             logging.info(Fore.GREEN + f"You said: {user_input}" + Fore.RESET)
 
             if "goodbye" in user_input.lower() or "arrivederci" in user_input.lower():
+                turn.finish("goodbye")
                 logging.info(Fore.MAGENTA + "Assistant session ended. Logging summary..." + Fore.RESET)
-                if recording_times:
-                    logging.info(Fore.MAGENTA + "Benchmark Summary:" + Fore.RESET)
-                    logging.info(Fore.MAGENTA + f"Avg Recording: {sum(recording_times)/len(recording_times):.3f} sec" + Fore.RESET)
-                    logging.info(Fore.MAGENTA + f"Avg Transcription: {sum(transcription_times)/len(transcription_times):.3f} sec" + Fore.RESET)
-                    logging.info(Fore.MAGENTA + f"Avg Response: {sum(response_times)/len(response_times):.3f} sec" + Fore.RESET)
-                    logging.info(Fore.MAGENTA + f"Avg TTS: {sum(tts_times)/len(tts_times):.3f} sec" + Fore.RESET)
-                    logging.info(Fore.MAGENTA + f"Avg Total Pipeline: {sum(total_times)/len(total_times):.3f} sec" + Fore.RESET)
+                tracer.log_summary()
+                for provider, health in health_report().items():
+                    logging.info(Fore.MAGENTA + f"{provider}: {health}" + Fore.RESET)
+                if get_tts() is not None:
+                    get_tts().close()
+                    get_tts().player.close()
+                get_capture().close()
                 break
 
-            chat_history.append({"role": "user", "content": user_input})
+            memory.append({"role": "user", "content": user_input})
+
+            if stream_responses:
+                # Generate and speak the response concurrently, sentence by sentence
+                response_text = safe_stream_response_and_tts(memory.messages, turn)
+                logging.info(Fore.CYAN + f"Response: {response_text}" + Fore.RESET)
 
-            # Generate assistant response
-            start = time.perf_counter()
-            response_text = safe_generate_response(chat_history)
-            response_time = time.perf_counter() - start
-            response_times.append(response_time)
-            logging.info(Fore.CYAN + f"Response: {response_text}" + Fore.RESET)
-            logging.info(Fore.YELLOW + f"Response generation time: {response_time:.3f} seconds" + Fore.RESET)
+                memory.append({"role": "assistant", "content": response_text})
+            else:
+                # Generate assistant response
+                with turn.span(LLM_COMPLETE):
+                    response_text = safe_generate_response(memory.messages)
+                logging.info(Fore.CYAN + f"Response: {response_text}" + Fore.RESET)
 
-            chat_history.append({"role": "assistant", "content": response_text})
+                memory.append({"role": "assistant", "content": response_text})
 
-            # Convert response to speech
-            start = time.perf_counter()
-            safe_tts(response_text)
-            tts_time = time.perf_counter() - start
-            tts_times.append(tts_time)
-            
+                # Convert response to speech
+                safe_tts(response_text, turn)
 
-            # Total time
-            total_time = time.perf_counter() - total_start
-            total_times.append(total_time)
-            logging.info(Fore.YELLOW + f"Total pipeline time: {total_time:.3f} seconds" + Fore.RESET)
+            turn.finish()
+            consecutive_errors = 0
 
         except Exception as e:
             logging.error(Fore.RED + f"Critical Error: {e}" + Fore.RESET)
-            total_time = time.perf_counter() - total_start
-            total_times.append(total_time)
-            time.sleep(2)  # small pause before retrying
+            turn.finish("error")
+            # Back off further while the errors keep coming, instead of a fixed pause
+            time.sleep(backoff_delay(consecutive_errors))
+            consecutive_errors += 1
 
 if __name__ == "__main__":
     
@@ -1,32 +1,18 @@
 # voice_assistant/api_key_manager.py
 
+from voice_assistant import backends
 from voice_assistant.config import Config
 
-API_KEY_MAPPING= {
-    "transcription":{
-        "openai": Config.OPENAI_API_KEY,
-        "groq": Config.GROQ_API_KEY,
-        "deepgram": Config.DEEPGRAM_API_KEY
-    },
-    "response":{
-        "openai":Config.OPENAI_API_KEY,
-        "groq": Config.GROQ_API_KEY
-    },
-    "tts": {
-        "openai": Config.OPENAI_API_KEY,
-        "deepgram":Config.DEEPGRAM_API_KEY,
-        "elevenlabs": Config.ELEVENLABS_API_KEY
-    }
-}
-
 def get_api_key(service, model):
     """
     Select the API key for the specified service and model
-    
+
+    Each backend names the Config attribute holding its key (see voice_assistant.backends).
+
     Returns:
     str: The API key for the transcription, response or tts service.
     """
-    return API_KEY_MAPPING.get(service, {}).get(model)
+    return backends.get_api_key(service, model)
 
 def get_transcription_api_key():
     """
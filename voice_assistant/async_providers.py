@@ -0,0 +1,255 @@
+# voice_assistant/async_providers.py
+
+import asyncio
+import logging
+import uuid
+
+from voice_assistant.backends import get_response_backend, get_transcription_backend, get_tts_backend
+from voice_assistant.clients import get_async_client
+from voice_assistant.config import Config
+from voice_assistant.pcm import PCM_ENCODINGS, PcmConverter
+from voice_assistant.response_cache import get_response_cache
+
+
+async def transcribe_audio_async(model, api_key, audio, local_model_path=None):
+    """
+    Transcribe audio without blocking the event loop.
+
+    Args:
+        model (str): The model to use for transcription ('openai', 'groq', 'deepgram', 'fastwhisperapi', 'local').
+        api_key (str): The API key for the transcription service.
+        audio (str | bytes): The path to an audio file, or an in-memory WAV file.
+        local_model_path (str): The path to the local model (if applicable).
+
+    Returns:
+        str: The transcribed text.
+    """
+    return await get_transcription_backend(model, api_key, local_model_path).transcribe_async(audio)
+
+
+async def generate_response_stream_async(model, api_key, chat_history):
+    """
+    Stream response tokens without blocking the event loop.
+
+    Args:
+        model (str): The model to use for response generation ('openai', 'groq', 'ollama', 'local').
+        api_key (str): The API key for the response generation service.
+        chat_history (list): The chat history as a list of messages.
+
+    Yields:
+        str: The next piece of the generated response.
+    """
+    cache = get_response_cache()
+    if cache is not None:
+        cached = cache.lookup(model, chat_history)
+        if cached is not None:
+            logging.info("Response cache hit")
+            yield cached
+            return
+    parts = []
+    async for token in get_response_backend(model, api_key).stream_async(chat_history):
+        parts.append(token)
+        yield token
+    if cache is not None:
+        cache.store(model, chat_history, "".join(parts))
+
+
+class AsyncTTS:
+    """
+    Base class for async TTS adapters.
+
+    Attributes:
+        sample_rate (int): Sample rate of the PCM produced by `stream`.
+        sample_format (str): 'float32' or 'int16'.
+    """
+
+    sample_rate = 22050
+    sample_format = "int16"
+
+    async def connect(self):
+        """Open any long-lived connection ahead of the first utterance."""
+
+    async def stream(self, clauses):
+        """
+        Synthesize clauses as they arrive.
+
+        Args:
+            clauses (AsyncIterator[str]): Complete clauses of one reply.
+
+        Yields:
+            bytes: Raw PCM chunks in `sample_format` at `sample_rate`.
+        """
+        raise NotImplementedError
+        yield
+
+    async def close(self):
+        """Release any long-lived connection."""
+
+
+class CartesiaAsyncTTS(AsyncTTS):
+    """
+    Cartesia over a persistent async WebSocket, one context per reply.
+
+    Clauses are sent with continue_=True from a feeder task while audio is received on
+    the calling task, so synthesis of the first clause overlaps generation of the rest.
+    """
+
+    def __init__(self, api_key, voice_id=None, model_id=None, sample_rate=22050, sample_format="int16"):
+        self.api_key = api_key
+        self.voice_id = voice_id or Config.CARTESIA_VOICE_ID
+        self.model_id = model_id or Config.CARTESIA_MODEL_ID
+        self.sample_rate = sample_rate
+        self.sample_format = sample_format
+        self.output_format = {
+            "container": "raw",
+            "encoding": PCM_ENCODINGS[sample_format],
+            "sample_rate": sample_rate
+        }
+        self._ws = None
+        self._lock = asyncio.Lock()
+
+    async def connect(self):
+        async with self._lock:
+            if self._ws is None:
+                client = get_async_client("cartesia", self.api_key)
+                self._ws = await client.tts.websocket()
+                logging.info("Cartesia async WebSocket connected")
+            return self._ws
+
+    async def _disconnect(self):
+        if self._ws is not None:
+            try:
+                await self._ws.close()
+            except Exception as e:
+                logging.debug(f"Error while closing Cartesia WebSocket: {e}")
+            self._ws = None
+
+    async def stream(self, clauses):
+        ws = await self.connect()
+        context = ws.context(f"turn-{uuid.uuid4()}")
+
+        async def feed():
+            try:
+                async for clause in clauses:
+                    if clause.strip():
+                        await context.send(
+                            model_id=self.model_id,
+                            transcript=clause + " ",
+                            voice={"id": self.voice_id},
+                            continue_=True,
+                            output_format=self.output_format,
+                        )
+            finally:
+                await context.no_more_inputs()
+
+        feeder = asyncio.create_task(feed())
+        try:
+            async for output in context.receive():
+                audio = getattr(output, "audio", None)
+                if audio:
+                    yield audio
+            await feeder
+        except (Exception, asyncio.CancelledError, GeneratorExit):
+            # Interrupted (e.g. barge-in) or failed: stop Cartesia generating this context
+            await self._cancel_context(context)
+            raise
+        finally:
+            if not feeder.done():
+                feeder.cancel()
+
+    async def _cancel_context(self, context):
+        """Cancel an in-flight context, dropping the connection if that is not possible."""
+        cancel = getattr(context, "cancel", None)
+        try:
+            if cancel is not None:
+                await cancel()
+                return
+        except Exception as e:
+            logging.debug(f"Failed to cancel Cartesia context: {e}")
+        # Without a cancel the socket would keep receiving the abandoned audio
+        await self._disconnect()
+
+    async def close(self):
+        await self._disconnect()
+
+
+class PlayHTAsyncTTS(AsyncTTS):
+    """
+    Play.ht through its async streaming client, one request per clause.
+
+    Play.ht does not accept incremental text within one request, so each clause is
+    synthesized as soon as it is complete and its audio streamed in order.
+    """
+
+    sample_format = "int16"
+
+    def __init__(self, api_key, voice=None, sample_rate=24000):
+        self.api_key = api_key
+        self.voice = voice or Config.PLAY_HT_VOICE
+        self.sample_rate = sample_rate
+
+    async def stream(self, clauses):
+        from pyht.client import Format, TTSOptions
+        client = get_async_client("playht", self.api_key)
+        options = TTSOptions(voice=self.voice, sample_rate=self.sample_rate, format=Format.FORMAT_RAW)
+        async for clause in clauses:
+            if not clause.strip():
+                continue
+            async for chunk in client.tts(clause, options):
+                if chunk:
+                    yield chunk
+
+
+class MeloAsyncTTS(AsyncTTS):
+    """
+    A MeloTTS server (see local_tts_api.py) over its chunked /stream-audio/ endpoint.
+
+    Each clause is one request; the server streams it back a sentence at a time, and the
+    audio is converted to the requested format and rate if the server's differs.
+    """
+
+    def __init__(self, language=None, accent=None, sample_rate=44100, sample_format="int16"):
+        self.language = language or Config.MELOTTS_LANGUAGE
+        self.accent = accent or Config.MELOTTS_ACCENT
+        self.sample_rate = sample_rate
+        self.sample_format = sample_format
+        self.url = f"http://{Config.MELOTTS_HOST}:{Config.TTS_PORT_LOCAL}/stream-audio/"
+
+    async def stream(self, clauses):
+        client = get_async_client("httpx")
+        converter = None
+        async for clause in clauses:
+            if not clause.strip():
+                continue
+            payload = {"text": clause, "language": self.language, "accent": self.accent, "speed": 1.0}
+            async with client.stream("POST", self.url, json=payload) as response:
+                response.raise_for_status()
+                from_rate = int(response.headers.get("X-Sample-Rate", self.sample_rate))
+                if converter is None or converter.from_rate != from_rate:
+                    converter = PcmConverter(from_rate, "int16", self.sample_rate, self.sample_format)
+                async for chunk in response.aiter_bytes():
+                    audio = converter.process(chunk)
+                    if audio:
+                        yield audio
+
+
+def create_async_tts(model, api_key, sample_rate=22050, sample_format="int16"):
+    """
+    Create the async TTS adapter for the configured model.
+
+    Args:
+        model (str): 'cartesia', 'playht' or 'melotts'.
+        api_key (str): The API key for the TTS service.
+        sample_rate (int): Preferred output sample rate.
+        sample_format (str): Preferred output sample format.
+
+    Returns:
+        AsyncTTS: The adapter.
+
+    Raises:
+        ValueError: If the model has no async adapter.
+    """
+    tts = get_tts_backend(model, api_key).create_async(sample_rate, sample_format)
+    if tts is None:
+        raise ValueError(f"No async TTS adapter for model: {model}")
+    return tts
@@ -1,14 +1,13 @@
 # voice_assistant/audio.py
 
-import speech_recognition as sr
-import pygame
 import time
 import logging
-import pydub
 from io import BytesIO
-from pydub import AudioSegment
 from functools import lru_cache
 
+# speech_recognition, pydub and pygame are imported on first use: with in-memory capture
+# and streaming playback the main loop never needs them
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
@@ -17,8 +16,25 @@ def get_recognizer():
     """
     Return a cached speech recognizer instance
     """
+    import speech_recognition as sr
     return sr.Recognizer()
 
+@lru_cache(maxsize=None)
+def get_microphone_source(calibration_duration=1):
+    """
+    Return a cached, already opened microphone source.
+
+    The microphone stays open across turns and ambient noise is calibrated only once;
+    after that the recognizer's dynamic energy threshold keeps tracking the noise floor
+    from the audio it hears, so no turn pays the calibration pause again.
+    """
+    import speech_recognition as sr
+    source = sr.Microphone()
+    source.__enter__()
+    logging.info("Calibrating for ambient noise...")
+    get_recognizer().adjust_for_ambient_noise(source, duration=calibration_duration)
+    return source
+
 def record_audio(file_path, timeout=10, phrase_time_limit=None, retries=3, energy_threshold=2000, 
                  pause_threshold=1, phrase_threshold=0.1, dynamic_energy_threshold=True, 
                  calibration_duration=1):
@@ -34,29 +50,32 @@ def record_audio(file_path, timeout=10, phrase_time_limit=None, retries=3, energ
     pause_threshold (float): How much silence the recognizer interprets as the end of a phrase (in seconds).
     phrase_threshold (float): Minimum length of a phrase to consider for recording (in seconds).
     dynamic_energy_threshold (bool): Whether to enable dynamic energy threshold adjustment.
-    calibration_duration (float): Duration of the ambient noise calibration (in seconds).
+    calibration_duration (float): Duration of the one-off ambient noise calibration (in seconds).
     """
+    import pydub
+    import speech_recognition as sr
+
     recognizer = get_recognizer()
-    recognizer.energy_threshold = energy_threshold
+    if get_microphone_source.cache_info().currsize == 0:
+        # Only the starting point; calibration and the dynamic threshold take over from here
+        recognizer.energy_threshold = energy_threshold
     recognizer.pause_threshold = pause_threshold
     recognizer.phrase_threshold = phrase_threshold
     recognizer.dynamic_energy_threshold = dynamic_energy_threshold
     
     for attempt in range(retries):
         try:
-            with sr.Microphone() as source:
-                logging.info("Calibrating for ambient noise...")
-                recognizer.adjust_for_ambient_noise(source, duration=calibration_duration)
-                logging.info("Recording started")
-                # Listen for the first phrase and extract it into audio data
-                audio_data = recognizer.listen(source, timeout=timeout, phrase_time_limit=phrase_time_limit)
-                logging.info("Recording complete")
+            source = get_microphone_source(calibration_duration)
+            logging.info("Recording started")
+            # Listen for the first phrase and extract it into audio data
+            audio_data = recognizer.listen(source, timeout=timeout, phrase_time_limit=phrase_time_limit)
+            logging.info("Recording complete")
 
-                # Convert the recorded audio data to an MP3 file
-                wav_data = audio_data.get_wav_data()
-                audio_segment = pydub.AudioSegment.from_wav(BytesIO(wav_data))
-                mp3_data = audio_segment.export(file_path, format="mp3", bitrate="128k", parameters=["-ar", "22050", "-ac", "1"])
-                return
+            # Convert the recorded audio data to an MP3 file
+            wav_data = audio_data.get_wav_data()
+            audio_segment = pydub.AudioSegment.from_wav(BytesIO(wav_data))
+            mp3_data = audio_segment.export(file_path, format="mp3", bitrate="128k", parameters=["-ar", "22050", "-ac", "1"])
+            return
         except sr.WaitTimeoutError:
             logging.warning(f"Listening timed out, retrying... ({attempt + 1}/{retries})")
         except Exception as e:
@@ -73,6 +92,8 @@ def play_audio(file_path):
     Args:
     file_path (str): The path to the audio file to play.
     """
+    import pygame
+
     try:
         print("Playing audio from: ", file_path)
         pygame.mixer.init()
@@ -0,0 +1,151 @@
+# voice_assistant/audio_archive.py
+
+import itertools
+import logging
+import os
+import queue
+import threading
+import wave
+from collections import defaultdict
+
+from voice_assistant.pcm import convert_sample_format
+
+# Writers for the same path run one after another, so overlapping turns never interleave
+_path_locks = defaultdict(threading.Lock)
+_path_locks_guard = threading.Lock()
+
+
+def _lock_for(path):
+    with _path_locks_guard:
+        return _path_locks[os.path.abspath(path)]
+
+
+class AudioArchiveWriter:
+    """
+    Save a stream of PCM chunks to an audio file on a background thread.
+
+    `write` only hands the chunk (the same bytes object, not a copy) to a queue, so
+    playback never waits on encoding or disk I/O, and `close` returns immediately unless
+    asked to wait. The container is chosen from the file extension:
+
+        - .wav: 16-bit PCM through the standard library `wave` module.
+        - .flac, .ogg, .opus: through soundfile (Opus needs libsndfile 1.0.29 or later).
+        - .mp3: through pydub and ffmpeg; MP3 cannot be appended to, so the chunks are
+          collected and encoded when the writer is closed (still off the caller's thread).
+    """
+
+    def __init__(self, path, sample_rate, sample_format="float32"):
+        """
+        Args:
+            path (str): Output file.
+            sample_rate (int): Sample rate of the chunks.
+            sample_format (str): Format of the chunks, 'float32' or 'int16'.
+        """
+        self.path = path
+        self.sample_rate = sample_rate
+        self.sample_format = sample_format
+        self.extension = os.path.splitext(path)[1].lower()
+        self._queue = queue.Queue()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="audio-archive", daemon=True)
+        self._thread.start()
+
+    def write(self, chunk):
+        """
+        Queue a chunk of PCM for the file.
+
+        Args:
+            chunk (bytes): Mono PCM in `sample_format`.
+        """
+        if chunk and not self._closed:
+            self._queue.put(chunk)
+
+    def close(self, wait=False, timeout=None):
+        """
+        Finish the file.
+
+        Args:
+            wait (bool): Block until the file is complete.
+            timeout (float): Maximum time to wait (in seconds).
+        """
+        if not self._closed:
+            self._closed = True
+            self._queue.put(None)
+        if wait:
+            self._thread.join(timeout)
+
+    def _chunks(self):
+        while True:
+            chunk = self._queue.get()
+            if chunk is None:
+                return
+            yield chunk
+
+    def _run(self):
+        with _lock_for(self.path):
+            try:
+                # Wait for the first chunk, so a reply without audio leaves no empty file behind
+                first = self._queue.get()
+                if first is None:
+                    logging.debug(f"No audio written to {self.path}")
+                    return
+                chunks = itertools.chain([first], self._chunks())
+                if self.extension == ".wav":
+                    self._write_wav(chunks)
+                elif self.extension in (".flac", ".ogg", ".opus"):
+                    self._write_soundfile(chunks)
+                elif self.extension == ".mp3":
+                    self._write_mp3(chunks)
+                else:
+                    raise ValueError(f"Unsupported archive format: {self.extension}")
+                logging.info(f"Audio saved to {self.path}")
+            except Exception as e:
+                logging.error(f"Failed to save audio to {self.path}: {e}")
+                # Drain so writers never block on an abandoned queue
+                for _ in self._chunks():
+                    pass
+
+    def _write_wav(self, chunks):
+        with wave.open(self.path, "wb") as f:
+            f.setnchannels(1)
+            f.setsampwidth(2)
+            f.setframerate(self.sample_rate)
+            for chunk in chunks:
+                f.writeframes(convert_sample_format(chunk, self.sample_format, "int16"))
+
+    def _write_soundfile(self, chunks):
+        import numpy as np
+        import soundfile as sf
+        dtype = np.float32 if self.sample_format == "float32" else np.int16
+        file_format, subtype = {
+            ".flac": ("FLAC", "PCM_16"),
+            ".ogg": ("OGG", "VORBIS"),
+            ".opus": ("OGG", "OPUS"),
+        }[self.extension]
+        # libsndfile only encodes Opus at 8, 12, 16, 24 or 48 kHz
+        with sf.SoundFile(self.path, "w", samplerate=self.sample_rate, channels=1,
+                          format=file_format, subtype=subtype) as f:
+            for chunk in chunks:
+                f.write(np.frombuffer(chunk, dtype=dtype))
+
+    def _write_mp3(self, chunks):
+        from pydub import AudioSegment
+        pcm = b"".join(convert_sample_format(chunk, self.sample_format, "int16") for chunk in chunks)
+        AudioSegment(pcm, frame_rate=self.sample_rate, sample_width=2, channels=1).export(self.path, format="mp3")
+
+
+def open_archive(path, sample_rate, sample_format="float32"):
+    """
+    Open a background archive writer, or return None if `path` is empty.
+
+    Args:
+        path (str): Output file (None or '' disables archiving).
+        sample_rate (int): Sample rate of the chunks.
+        sample_format (str): Format of the chunks, 'float32' or 'int16'.
+
+    Returns:
+        AudioArchiveWriter | None: The writer.
+    """
+    if not path:
+        return None
+    return AudioArchiveWriter(path, sample_rate, sample_format)
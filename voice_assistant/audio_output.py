@@ -0,0 +1,312 @@
+# voice_assistant/audio_output.py
+
+import logging
+import threading
+import time
+from functools import lru_cache
+
+import pyaudio
+
+from voice_assistant.pcm import nearest_rate
+
+# Bytes per sample and PyAudio format for each supported sample format
+SAMPLE_FORMATS = {
+    "float32": (4, pyaudio.paFloat32),
+    "int16": (2, pyaudio.paInt16),
+}
+
+
+class RingBuffer:
+    """
+    A fixed-capacity byte ring buffer shared between a producer and the player thread.
+
+    Writers block while the buffer is full, which gives natural backpressure on the
+    TTS stream; readers never block and get whatever is available.
+    """
+
+    def __init__(self, capacity):
+        self._data = bytearray(capacity)
+        self._capacity = capacity
+        self._read_pos = 0
+        self._size = 0
+        self._closed = False
+        self._generation = 0  # bumped by clear() so writes already in progress are abandoned
+        self._cond = threading.Condition()
+
+    def __len__(self):
+        with self._cond:
+            return self._size
+
+    def write(self, data):
+        """
+        Append bytes, blocking while the buffer is full.
+
+        Args:
+            data (bytes): The bytes to append.
+        """
+        view = memoryview(data)
+        with self._cond:
+            generation = self._generation
+        while view:
+            with self._cond:
+                while self._size == self._capacity and not self._closed and generation == self._generation:
+                    self._cond.wait()
+                if self._closed or generation != self._generation:
+                    return
+                write_pos = (self._read_pos + self._size) % self._capacity
+                n = min(len(view), self._capacity - self._size, self._capacity - write_pos)
+                self._data[write_pos:write_pos + n] = view[:n]
+                self._size += n
+                self._cond.notify_all()
+            view = view[n:]
+
+    def read(self, max_bytes, align=1):
+        """
+        Remove and return up to `max_bytes` bytes, rounded down to a multiple of `align`.
+
+        Args:
+            max_bytes (int): Maximum number of bytes to return.
+            align (int): Frame size in bytes; partial frames are left in the buffer.
+
+        Returns:
+            bytes: The data read (possibly empty).
+        """
+        with self._cond:
+            n = min(max_bytes, self._size)
+            n -= n % align
+            if n == 0:
+                return b""
+            first = min(n, self._capacity - self._read_pos)
+            out = bytes(self._data[self._read_pos:self._read_pos + first])
+            if first < n:
+                out += bytes(self._data[:n - first])
+            self._read_pos = (self._read_pos + n) % self._capacity
+            self._size -= n
+            self._cond.notify_all()
+            return out
+
+    def clear(self):
+        """Drop all buffered data, including the rest of any write currently in progress."""
+        with self._cond:
+            self._read_pos = 0
+            self._size = 0
+            self._generation += 1
+            self._cond.notify_all()
+
+    def close(self):
+        """Wake up any blocked writer; further writes are discarded."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+
+class AudioOutputEngine:
+    """
+    A persistent audio output device fed by a ring buffer.
+
+    The PyAudio stream is opened once and kept running by a player thread for the whole
+    session; while there is nothing to play it writes silence, so the first chunk of each
+    reply goes to an already-running device instead of paying PortAudio start-up time.
+    """
+
+    def __init__(self, sample_rate=22050, sample_format="float32", channels=1,
+                 frames_per_buffer=1024, buffer_seconds=30):
+        """
+        Args:
+            sample_rate (int): Output sample rate in Hz.
+            sample_format (str): 'float32' or 'int16'.
+            channels (int): Number of output channels.
+            frames_per_buffer (int): Frames written to the device per iteration.
+            buffer_seconds (float): Capacity of the ring buffer in seconds of audio.
+        """
+        if sample_format not in SAMPLE_FORMATS:
+            raise ValueError(f"Unsupported sample format: {sample_format}")
+        self.sample_rate = sample_rate
+        self.sample_format = sample_format
+        self.channels = channels
+        self.frames_per_buffer = frames_per_buffer
+        sample_width, self._pa_format = SAMPLE_FORMATS[sample_format]
+        self.frame_size = sample_width * channels
+        self._chunk_bytes = frames_per_buffer * self.frame_size
+        self._silence = bytes(self._chunk_bytes)
+        self._ring_capacity = int(sample_rate * buffer_seconds) * self.frame_size
+        self._ring = RingBuffer(self._ring_capacity)
+
+        self._pyaudio = None
+        self._stream = None
+        self._thread = None
+        self._running = threading.Event()
+        self._idle = threading.Event()
+        self._idle.set()
+        self._lock = threading.Lock()
+        self._on_audio_start = None
+
+    def call_when_audio_starts(self, callback):
+        """
+        Call `callback` once, on the player thread, right after the next queued audio
+        has been written to the device (i.e. when it is audible, not when it is queued).
+
+        Args:
+            callback (Callable): Called with no arguments.
+        """
+        self._on_audio_start = callback
+
+    def start(self):
+        """Open the output device and start the player thread if not already running."""
+        with self._lock:
+            if self._running.is_set():
+                return
+            self._pyaudio = pyaudio.PyAudio()
+            self._stream = self._pyaudio.open(
+                format=self._pa_format,
+                channels=self.channels,
+                rate=self.sample_rate,
+                output=True,
+                frames_per_buffer=self.frames_per_buffer
+            )
+            self._running.set()
+            self._thread = threading.Thread(target=self._run, name="audio-output", daemon=True)
+            self._thread.start()
+            logging.info(f"Audio output engine started ({self.sample_rate} Hz, {self.sample_format})")
+
+    def _run(self):
+        while self._running.is_set():
+            chunk = self._ring.read(self._chunk_bytes, align=self.frame_size)
+            if chunk:
+                self._idle.clear()
+            else:
+                self._idle.set()
+                chunk = self._silence
+            try:
+                self._stream.write(chunk)
+            except Exception as e:
+                logging.error(f"Audio output write failed: {e}")
+                self._running.clear()
+            if self._on_audio_start is not None and chunk is not self._silence:
+                callback, self._on_audio_start = self._on_audio_start, None
+                try:
+                    callback()
+                except Exception as e:
+                    logging.debug(f"Audio start callback failed: {e}")
+        self._idle.set()
+
+    def write(self, data):
+        """
+        Queue audio for playback, starting the engine on first use.
+
+        Args:
+            data (bytes): Raw PCM in the engine's sample format.
+        """
+        if not self._running.is_set():
+            self.start()
+        self._idle.clear()
+        self._ring.write(data)
+        self._idle.clear()
+
+    def wait_until_done(self, timeout=None):
+        """
+        Block until everything queued so far has been handed to the device.
+
+        Args:
+            timeout (float): Maximum time to wait in seconds.
+
+        Returns:
+            bool: True if playback drained, False on timeout.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._running.is_set():
+            remaining = None if deadline is None else max(0, deadline - time.monotonic())
+            if not self._idle.wait(remaining):
+                return False
+            # The player may have gone idle just before the last write landed
+            if len(self._ring) < self.frame_size:
+                return True
+            time.sleep(0.005)
+        return True
+
+    def clear(self):
+        """Discard any audio that has been queued but not yet played."""
+        self._ring.clear()
+
+    @property
+    def is_playing(self):
+        """Whether queued audio is still being played."""
+        return self._running.is_set() and not self._idle.is_set()
+
+    def close(self):
+        """Stop the player thread and release the device."""
+        with self._lock:
+            if not self._running.is_set() and self._stream is None:
+                return
+            self._running.clear()
+            self._ring.close()
+            if self._thread:
+                self._thread.join(timeout=2)
+                self._thread = None
+            if self._stream:
+                self._stream.stop_stream()
+                self._stream.close()
+                self._stream = None
+            if self._pyaudio:
+                self._pyaudio.terminate()
+                self._pyaudio = None
+            # A fresh buffer lets the engine be started again after closing
+            self._ring = RingBuffer(self._ring_capacity)
+            logging.info("Audio output engine closed")
+
+
+@lru_cache(maxsize=None)
+def get_output_engine(sample_rate=22050, sample_format="float32", channels=1):
+    """
+    Return the shared output engine for the given audio settings.
+
+    Args:
+        sample_rate (int): Output sample rate in Hz.
+        sample_format (str): 'float32' or 'int16'.
+        channels (int): Number of output channels.
+
+    Returns:
+        AudioOutputEngine: A cached, lazily started engine.
+    """
+    return AudioOutputEngine(sample_rate=sample_rate, sample_format=sample_format, channels=channels)
+
+
+@lru_cache(maxsize=None)
+def negotiate_output_format(supported_rates, sample_format="int16", fallback_rate=22050):
+    """
+    Pick the output format that needs no conversion between the TTS provider and the device.
+
+    The default output device's native rate is used when the provider can synthesize at
+    it; otherwise the nearest rate the provider supports and the device accepts.
+
+    Args:
+        supported_rates (tuple): Sample rates the provider can produce.
+        sample_format (str): Preferred sample format ('int16' halves the payload of 'float32').
+        fallback_rate (int): Rate used if the device cannot be queried.
+
+    Returns:
+        tuple: (sample_rate, sample_format).
+    """
+    pa = None
+    try:
+        pa = pyaudio.PyAudio()
+        device = pa.get_default_output_device_info()
+        native_rate = int(device["defaultSampleRate"])
+
+        def accepted(rate):
+            try:
+                return pa.is_format_supported(rate, output_device=device["index"], output_channels=1,
+                                              output_format=SAMPLE_FORMATS[sample_format][1])
+            except ValueError:
+                return False
+
+        candidates = [rate for rate in supported_rates if accepted(rate)] or list(supported_rates)
+        rate = nearest_rate(native_rate, candidates)
+        logging.info(f"Output device runs at {native_rate} Hz, using {rate} Hz {sample_format}")
+        return rate, sample_format
+    except Exception as e:
+        logging.warning(f"Could not query the output device ({e}), using {fallback_rate} Hz {sample_format}")
+        return fallback_rate, sample_format
+    finally:
+        if pa is not None:
+            pa.terminate()
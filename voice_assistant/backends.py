@@ -0,0 +1,362 @@
+# voice_assistant/backends.py
+
+import asyncio
+import importlib
+import logging
+import threading
+import time
+
+from voice_assistant.config import Config
+
+# Modules that register the built-in backends when imported
+BUILTIN_BACKEND_MODULES = {
+    "transcription": "voice_assistant.transcription",
+    "response": "voice_assistant.response_generation",
+    "tts": "voice_assistant.text_to_speech",
+}
+
+# Configured model for each kind of backend
+CONFIG_MODELS = {
+    "transcription": "TRANSCRIPTION_MODEL",
+    "response": "RESPONSE_MODEL",
+    "tts": "TTS_MODEL",
+}
+
+_registry = {kind: {} for kind in BUILTIN_BACKEND_MODULES}
+_instances = {}
+_lock = threading.RLock()
+
+
+class Capabilities:
+    """
+    What a backend can do, so callers can pick the fastest path it supports.
+
+    Attributes:
+        streaming (bool): Transcription: accepts audio while the user is talking.
+            Response: yields tokens as they are generated. TTS: synthesizes clauses
+            as they arrive and streams audio back.
+        async_native (bool): Has an asyncio implementation rather than a worker thread.
+        sample_formats (tuple): Raw PCM formats produced (TTS) or accepted (transcription).
+        sample_rates (tuple): Sample rates produced (TTS); empty if not applicable.
+        languages (tuple): Supported language codes; None for any.
+    """
+
+    def __init__(self, streaming=False, async_native=False, sample_formats=(), sample_rates=(), languages=None):
+        self.streaming = streaming
+        self.async_native = async_native
+        self.sample_formats = tuple(sample_formats)
+        self.sample_rates = tuple(sample_rates)
+        self.languages = tuple(languages) if languages is not None else None
+
+    def supports_language(self, language):
+        """Return whether `language` (e.g. 'en') is supported."""
+        return self.languages is None or language in self.languages
+
+    def __repr__(self):
+        return (f"Capabilities(streaming={self.streaming}, async_native={self.async_native}, "
+                f"sample_formats={self.sample_formats}, sample_rates={self.sample_rates}, "
+                f"languages={self.languages})")
+
+
+class Backend:
+    """
+    Base class for provider backends.
+
+    Subclasses set `name`, `capabilities` and, if the provider needs a key, the Config
+    attribute holding it in `api_key_setting`. Instances are created lazily on first
+    use by the get_*_backend functions and shared afterwards.
+
+    Provider SDKs are imported inside the methods that use them, never at module level,
+    so only the configured providers are ever loaded; `sdk_modules` lists them so
+    `preload` can import them ahead of the first request.
+    """
+
+    name = None
+    capabilities = Capabilities()
+    api_key_setting = None
+    sdk_modules = ()
+
+    def __init__(self, api_key=None, local_model_path=None):
+        """
+        Args:
+            api_key (str): The API key for the provider, if it needs one.
+            local_model_path (str): The path to the local model (if applicable).
+        """
+        self.api_key = api_key
+        self.local_model_path = local_model_path
+
+    def preload(self):
+        """
+        Import the provider's SDK modules.
+
+        Returns:
+            dict: Seconds spent importing each module.
+        """
+        timings = {}
+        for module in self.sdk_modules:
+            start = time.perf_counter()
+            importlib.import_module(module)
+            timings[module] = time.perf_counter() - start
+        return timings
+
+
+class TranscriptionBackend(Backend):
+    """A speech-to-text provider."""
+
+    def transcribe(self, audio):
+        """
+        Transcribe a complete utterance.
+
+        Args:
+            audio (str | bytes): The path to an audio file, or an in-memory WAV file.
+
+        Returns:
+            str: The transcribed text.
+        """
+        raise NotImplementedError
+
+    async def transcribe_async(self, audio):
+        """Transcribe without blocking the event loop (on a worker thread by default)."""
+        return await asyncio.to_thread(self.transcribe, audio)
+
+    def create_streaming(self, sample_rate=16000, on_partial=None, speech_threshold=None, frame_ms=30):
+        """
+        Create a transcriber that accepts audio while the user is still talking.
+
+        Backends without a native streaming API are wrapped in a ChunkedWhisperTranscriber
+        that re-transcribes the audio captured so far at each pause, if
+        Config.CHUNKED_TRANSCRIPTION allows it (it costs one request per pause).
+
+        Args:
+            sample_rate (int): Sample rate of the 16-bit mono PCM frames.
+            on_partial (Callable): Called with each new partial transcript.
+            speech_threshold (Callable): Returns the current RMS speech threshold.
+            frame_ms (int): Duration of each fed frame in milliseconds.
+
+        Returns:
+            StreamingTranscriber: An unstarted transcriber, or None if the backend cannot
+            transcribe incrementally.
+        """
+        if not Config.CHUNKED_TRANSCRIPTION:
+            return None
+        from voice_assistant.streaming_transcription import ChunkedWhisperTranscriber
+        return ChunkedWhisperTranscriber(
+            self.name, sample_rate=sample_rate, on_partial=on_partial,
+            speech_threshold=speech_threshold, frame_ms=frame_ms, local_model_path=self.local_model_path
+        )
+
+
+class ResponseBackend(Backend):
+    """A language model provider. Subclasses implement `stream`, `generate`, or both."""
+
+    def generate(self, chat_history):
+        """
+        Generate a complete reply.
+
+        Args:
+            chat_history (list): The chat history as a list of messages.
+
+        Returns:
+            str: The generated response text.
+        """
+        return "".join(self.stream(chat_history))
+
+    def stream(self, chat_history):
+        """
+        Yield the reply as it is generated; errors propagate to the caller.
+
+        Args:
+            chat_history (list): The chat history as a list of messages.
+
+        Yields:
+            str: The next piece of the generated response.
+        """
+        yield self.generate(chat_history)
+
+    async def stream_async(self, chat_history):
+        """Yield the reply without blocking the event loop (one worker-thread call by default)."""
+        yield await asyncio.to_thread(self.generate, chat_history)
+
+
+class TTSBackend(Backend):
+    """
+    A text-to-speech provider.
+
+    Attributes:
+        model_id (str): Provider model; with `voice` it is part of the audio cache key
+            (None disables caching).
+        voice (str): Provider voice.
+        file_extension (str): Container written by `synthesize_to_file`.
+    """
+
+    model_id = None
+    voice = None
+    file_extension = ".wav"
+
+    def synthesize_to_file(self, text, output_file_path):
+        """
+        Synthesize `text` into an audio file.
+
+        Args:
+            text (str): The text to convert to speech.
+            output_file_path (str): The path to save the generated speech audio file.
+        """
+        raise NotImplementedError
+
+    def create_session(self, **kwargs):
+        """
+        Create a long-lived streaming synthesizer (see tts.TextToSpeech).
+
+        Returns:
+            The session, or None if the backend only synthesizes whole files.
+        """
+        return None
+
+    def synthesize_stream(self, text):
+        """
+        Synthesize `text`, returning the audio as it is produced instead of as a file.
+
+        Returns:
+            tuple: (sample_rate, sample_format, chunks) where chunks iterates over raw PCM,
+                or None if the backend only synthesizes whole files.
+        """
+        return None
+
+    def create_async(self, sample_rate=22050, sample_format="int16"):
+        """
+        Create an asyncio streaming adapter (see async_providers.AsyncTTS).
+
+        Returns:
+            AsyncTTS: The adapter, or None if the backend has none.
+        """
+        return None
+
+
+_BASE_CLASSES = {
+    "transcription": TranscriptionBackend,
+    "response": ResponseBackend,
+    "tts": TTSBackend,
+}
+
+
+def register_backend(kind, name):
+    """
+    Class decorator registering a backend under a model name.
+
+    Usage:
+        @register_backend("tts", "mytts")
+        class MyTTS(TTSBackend):
+            ...
+
+    Args:
+        kind (str): 'transcription', 'response' or 'tts'.
+        name (str): The model name used in Config (e.g. Config.TTS_MODEL).
+    """
+    def decorator(cls):
+        if not issubclass(cls, _BASE_CLASSES[kind]):
+            raise TypeError(f"{cls.__name__} is not a {_BASE_CLASSES[kind].__name__}")
+        cls.name = name
+        with _lock:
+            _registry[kind][name] = cls
+        return cls
+    return decorator
+
+
+def _load_builtin(kind):
+    importlib.import_module(BUILTIN_BACKEND_MODULES[kind])
+
+
+def backend_class(kind, name):
+    """
+    Return the backend class registered for a model.
+
+    Raises:
+        ValueError: If no backend is registered under `name`.
+    """
+    _load_builtin(kind)
+    cls = _registry[kind].get(name)
+    if cls is None:
+        raise ValueError(f"Unsupported {kind} model: {name}")
+    return cls
+
+
+def available_backends(kind):
+    """Return the model names registered for a kind of backend."""
+    _load_builtin(kind)
+    return sorted(_registry[kind])
+
+
+def get_api_key(kind, name):
+    """Return the API key a backend is configured with, or None."""
+    try:
+        setting = backend_class(kind, name).api_key_setting
+    except ValueError:
+        return None
+    return getattr(Config, setting, None) if setting else None
+
+
+def get_backend(kind, name=None, api_key=None, local_model_path=None):
+    """
+    Return the shared backend instance for a model, creating it on first use.
+
+    Args:
+        kind (str): 'transcription', 'response' or 'tts'.
+        name (str): The model name; defaults to the configured model.
+        api_key (str): Defaults to the key named by the backend's `api_key_setting`.
+        local_model_path (str): Defaults to Config.LOCAL_MODEL_PATH.
+
+    Returns:
+        Backend: The backend.
+
+    Raises:
+        ValueError: If no backend is registered under `name`.
+    """
+    name = name or getattr(Config, CONFIG_MODELS[kind])
+    cls = backend_class(kind, name)
+    if api_key is None:
+        api_key = get_api_key(kind, name)
+    if local_model_path is None:
+        local_model_path = Config.LOCAL_MODEL_PATH
+    key = (kind, name, api_key, local_model_path)
+    backend = _instances.get(key)
+    if backend is None:
+        with _lock:
+            backend = _instances.get(key)
+            if backend is None:
+                backend = cls(api_key=api_key, local_model_path=local_model_path)
+                _instances[key] = backend
+    return backend
+
+
+def get_transcription_backend(name=None, api_key=None, local_model_path=None):
+    """Return the transcription backend (the configured one by default)."""
+    return get_backend("transcription", name, api_key, local_model_path)
+
+
+def get_response_backend(name=None, api_key=None, local_model_path=None):
+    """Return the response backend (the configured one by default)."""
+    return get_backend("response", name, api_key, local_model_path)
+
+
+def get_tts_backend(name=None, api_key=None, local_model_path=None):
+    """Return the TTS backend (the configured one by default)."""
+    return get_backend("tts", name, api_key, local_model_path)
+
+
+def preload_backends():
+    """
+    Import the SDKs of the configured transcription, response and TTS backends.
+
+    Run it on a background thread at startup so the first request does not pay for
+    the imports; failures are only logged, the request will raise them again.
+
+    Returns:
+        dict: Seconds spent importing each module.
+    """
+    timings = {}
+    for kind in CONFIG_MODELS:
+        try:
+            timings.update(get_backend(kind).preload())
+        except Exception as e:
+            logging.warning(f"Could not preload the {kind} backend: {e}")
+    return timings
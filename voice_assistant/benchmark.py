@@ -0,0 +1,356 @@
+# voice_assistant/benchmark.py
+
+import argparse
+import asyncio
+import glob
+import json
+import logging
+import os
+import sys
+import time
+import wave
+
+from voice_assistant.async_providers import AsyncTTS
+from voice_assistant.backends import backend_class
+from voice_assistant.capture import EnergyVAD, UtteranceEndpointer
+from voice_assistant.clients import get_async_client
+from voice_assistant.config import Config
+from voice_assistant.memory import create_memory
+from voice_assistant.mock_providers import Latency, MockProviderServer
+from voice_assistant.pcm import PcmConverter
+from voice_assistant.pipeline import VoicePipeline
+from voice_assistant.tracing import STAGES, get_tracer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_SAMPLES = os.path.join(ROOT, "voice_samples", "*.mp3")
+
+# Providers the mock server can stand in for, per stage
+MOCKED_MODELS = {
+    "transcription": ("openai", "groq", "deepgram"),
+    "response": ("openai", "groq"),
+}
+
+
+def load_clip(path, sample_rate=16000):
+    """
+    Decode an audio file to mono 16-bit PCM at `sample_rate`.
+
+    WAV files are read with the standard library; anything else (e.g. the MP3s in
+    voice_samples/) goes through pydub, which needs ffmpeg.
+
+    Args:
+        path (str): The audio file.
+        sample_rate (int): Sample rate of the returned PCM.
+
+    Returns:
+        bytes: Little-endian int16 samples.
+    """
+    if path.lower().endswith(".wav"):
+        with wave.open(path, "rb") as wav_file:
+            if wav_file.getnchannels() == 1 and wav_file.getsampwidth() == 2:
+                pcm = wav_file.readframes(wav_file.getnframes())
+                return PcmConverter(wav_file.getframerate(), "int16", sample_rate, "int16").process(pcm)
+    from pydub import AudioSegment
+    segment = AudioSegment.from_file(path).set_channels(1).set_sample_width(2).set_frame_rate(sample_rate)
+    return segment.raw_data
+
+
+class ReplaySource:
+    """
+    Audio source replaying recorded clips as if they were spoken into the microphone.
+
+    Each clip is framed, padded with silence and run through the same VAD endpointing
+    as live capture, one clip per utterance (cycling through the clips).
+    """
+
+    def __init__(self, clips, sample_rate=16000, frame_ms=30, speed=0.0, energy_threshold=None, first_clip=0):
+        """
+        Args:
+            clips (list): int16 PCM of each clip, at `sample_rate`.
+            sample_rate (int): Sample rate of the clips.
+            frame_ms (int): Duration of each VAD frame in milliseconds.
+            speed (float): 1.0 replays in real time, 2.0 twice as fast; 0 as fast as possible.
+            energy_threshold (float): VAD threshold (defaults to Config.VAD_ENERGY_THRESHOLD).
+            first_clip (int): Index of the clip replayed first.
+        """
+        self.clips = clips
+        self.sample_rate = sample_rate
+        self.frame_ms = frame_ms
+        self.frame_bytes = sample_rate * frame_ms // 1000 * 2
+        self.speed = speed
+        self.vad = EnergyVAD(
+            energy_threshold=energy_threshold or Config.VAD_ENERGY_THRESHOLD,
+            start_frames=max(1, 90 // frame_ms),
+            end_frames=max(1, int(Config.VAD_PAUSE_THRESHOLD * 1000) // frame_ms)
+        )
+        self.pre_roll_frames = max(1, 300 // frame_ms)
+        self.last_endpoint_delay = 0.0
+        self._next = first_clip
+
+    def _frames(self, pcm):
+        lead_in = bytes(self.frame_bytes * self.pre_roll_frames)
+        # Enough trailing silence for the VAD to endpoint
+        tail = bytes(self.frame_bytes * (self.vad.end_frames + 2))
+        audio = lead_in + pcm + tail
+        for offset in range(0, len(audio) - self.frame_bytes + 1, self.frame_bytes):
+            yield audio[offset:offset + self.frame_bytes]
+
+    async def read_utterance(self):
+        """
+        Replay the next clip.
+
+        Returns:
+            bytes: The endpointed utterance, or None if the VAD heard no speech in the clip.
+        """
+        pcm = self.clips[self._next % len(self.clips)]
+        self._next += 1
+        endpointer = UtteranceEndpointer(self.vad, self.frame_ms, self.pre_roll_frames, timeout=None)
+        start = time.perf_counter()
+        for i, frame in enumerate(self._frames(pcm)):
+            if self.speed:
+                delay = start + i * self.frame_ms / 1000 / self.speed - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            if endpointer.push(frame) == "done":
+                break
+        self.last_endpoint_delay = endpointer.endpoint_delay
+        return endpointer.pcm or None
+
+
+class NullSink:
+    """
+    Audio sink that discards everything, like a sound card nobody is listening to.
+
+    With `realtime` set it takes as long as playing the audio would: writes wait while
+    more than `buffer_ms` is queued, and drain waits until the last sample would have
+    been played.
+    """
+
+    sample_format = "int16"
+
+    def __init__(self, sample_rate=22050, realtime=True, buffer_ms=200):
+        """
+        Args:
+            sample_rate (int): Sample rate of the audio written.
+            realtime (bool): Whether to simulate the playback time.
+            buffer_ms (int): Simulated device buffer in milliseconds.
+        """
+        self.sample_rate = sample_rate
+        self.realtime = realtime
+        self.buffer = buffer_ms / 1000
+        self.bytes_written = 0
+        self._play_until = 0.0
+
+    async def write(self, chunk):
+        self.bytes_written += len(chunk)
+        if not self.realtime:
+            return
+        now = time.perf_counter()
+        self._play_until = max(now, self._play_until) + len(chunk) / (self.sample_rate * 2)
+        ahead = self._play_until - now - self.buffer
+        if ahead > 0:
+            await asyncio.sleep(ahead)
+
+    async def drain(self):
+        remaining = self._play_until - time.perf_counter()
+        if remaining > 0:
+            await asyncio.sleep(remaining)
+
+    def clear(self):
+        self._play_until = 0.0
+
+    async def close(self):
+        pass
+
+
+class StandInTTS(AsyncTTS):
+    """
+    TTS adapter streaming int16 PCM from MockProviderServer's /tts/stream, one request per clause.
+
+    Stands in for Cartesia's WebSocket API, whose protocol the mock server does not
+    implement; the time to first byte and the generation speed are simulated the same way.
+    """
+
+    def __init__(self, url, sample_rate=22050):
+        """
+        Args:
+            url (str): Base URL of the mock server.
+            sample_rate (int): Sample rate to request.
+        """
+        self.url = url
+        self.sample_rate = sample_rate
+
+    async def stream(self, clauses):
+        client = get_async_client("httpx")
+        async for clause in clauses:
+            if not clause.strip():
+                continue
+            payload = {"transcript": clause, "sample_rate": self.sample_rate}
+            async with client.stream("POST", f"{self.url}/tts/stream", json=payload) as response:
+                response.raise_for_status()
+                async for chunk in response.aiter_bytes():
+                    if chunk:
+                        yield chunk
+
+
+def use_mock_providers(server, transcription_model="groq", response_model="groq"):
+    """
+    Point the configured providers at a running MockProviderServer.
+
+    Missing API keys are filled with a placeholder, the response cache is disabled (every
+    turn asks the same question) and hedging is limited to providers the server mocks.
+
+    Raises:
+        ValueError: If a model is not one the server can stand in for.
+    """
+    for stage, model in (("transcription", transcription_model), ("response", response_model)):
+        if model not in MOCKED_MODELS[stage]:
+            raise ValueError(f"No mock {stage} provider for model: {model}")
+        setting = backend_class(stage, model).api_key_setting
+        if not getattr(Config, setting):
+            setattr(Config, setting, "benchmark")
+    Config.TRANSCRIPTION_MODEL = transcription_model
+    Config.RESPONSE_MODEL = response_model
+    Config.OPENAI_BASE_URL = f"{server.url}/v1"
+    Config.GROQ_BASE_URL = server.url
+    Config.DEEPGRAM_BASE_URL = server.url
+    Config.RESPONSE_CACHE = False
+    Config.TRANSCRIPTION_HEDGE_MODELS = [
+        m for m in Config.TRANSCRIPTION_HEDGE_MODELS if m in MOCKED_MODELS["transcription"]]
+    Config.RESPONSE_HEDGE_MODELS = [m for m in Config.RESPONSE_HEDGE_MODELS if m in MOCKED_MODELS["response"]]
+
+
+async def run_benchmark(clips, server, turns=20, speed=0.0, realtime_playback=True):
+    """
+    Run turns through the asyncio pipeline against the mock providers.
+
+    Args:
+        clips (list): int16 PCM clips at Config.CAPTURE_SAMPLE_RATE, replayed in turn.
+        server (MockProviderServer): A running mock server (see use_mock_providers).
+        turns (int): Number of turns.
+        speed (float): Replay speed of the clips (0 for as fast as possible).
+        realtime_playback (bool): Whether the null sink takes as long as real playback.
+
+    Returns:
+        Tracer: The tracer holding every turn's stage timings.
+    """
+    tracer = get_tracer()
+    source = ReplaySource(clips, Config.CAPTURE_SAMPLE_RATE, Config.CAPTURE_FRAME_MS, speed)
+    tts = StandInTTS(server.url)
+    sink = NullSink(tts.sample_rate, realtime=realtime_playback)
+    pipeline = VoicePipeline(source, sink, tts, create_memory(), barge_in=False)
+    for _ in range(turns):
+        try:
+            await pipeline.run_turn()
+        except Exception as e:
+            logging.error(f"Benchmark turn failed: {e}")
+    return tracer
+
+
+def check_thresholds(summary, limits):
+    """
+    Compare p95 latencies against limits.
+
+    Args:
+        summary (dict): Output of Tracer.summary().
+        limits (dict): Stage name -> maximum p95 in seconds.
+
+    Returns:
+        list: A message for every stage over its limit (or with no samples).
+    """
+    failures = []
+    for stage, limit in limits.items():
+        p95 = summary.get(stage, {}).get("p95")
+        if p95 is None:
+            failures.append(f"{stage}: no samples")
+        elif p95 > limit:
+            failures.append(f"{stage}: p95 {p95:.3f}s > {limit:.3f}s")
+    return failures
+
+
+def format_report(summary, turns):
+    """Render a Tracer summary as a plain-text table, in pipeline order."""
+    lines = [f"Turns: {sum(turns.values())} {dict(turns)}",
+             f"  {'stage':<16}{'n':>5}{'p50':>9}{'p95':>9}{'p99':>9}{'mean':>9}"]
+    for stage in STAGES:
+        s = summary.get(stage)
+        if s:
+            lines.append(f"  {stage:<16}{s['count']:>5}{s['p50']:>9.3f}{s['p95']:>9.3f}{s['p99']:>9.3f}{s['mean']:>9.3f}")
+    return "\n".join(lines)
+
+
+def _limit(text):
+    stage, _, seconds = text.partition("=")
+    if stage not in STAGES or not seconds:
+        raise argparse.ArgumentTypeError(f"expected STAGE=SECONDS with STAGE one of {', '.join(STAGES)}")
+    return stage, float(seconds)
+
+
+def main(argv=None):
+    """
+    Benchmark the full pipeline offline: replayed clips, mock providers, a null sink.
+
+    Usage:
+        python -m voice_assistant.benchmark --turns 30
+        python -m voice_assistant.benchmark --llm-first-token 0.5:0.1 --max-p95 first_audio=1.5 --json bench.jsonl
+    """
+    parser = argparse.ArgumentParser(description="Offline latency benchmark of the voice pipeline.")
+    parser.add_argument("--samples", default=DEFAULT_SAMPLES, help="Glob of audio clips to replay (default: %(default)s)")
+    parser.add_argument("--turns", type=int, default=20, help="Number of turns")
+    parser.add_argument("--transcription-model", default="groq", choices=MOCKED_MODELS["transcription"])
+    parser.add_argument("--response-model", default="groq", choices=MOCKED_MODELS["response"])
+    parser.add_argument("--speed", type=float, default=0.0,
+                        help="Replay speed of the clips, 1 for real time (default: as fast as possible)")
+    parser.add_argument("--no-realtime-playback", action="store_true",
+                        help="Discard audio immediately instead of taking as long as playing it")
+    parser.add_argument("--stt-latency", type=Latency.parse, default=Latency(0.25, 0.05), metavar="BASE[:JITTER]")
+    parser.add_argument("--llm-first-token", type=Latency.parse, default=Latency(0.3, 0.08), metavar="BASE[:JITTER]")
+    parser.add_argument("--llm-token", type=Latency.parse, default=Latency(0.02, 0.005), metavar="BASE[:JITTER]")
+    parser.add_argument("--tts-first-byte", type=Latency.parse, default=Latency(0.15, 0.04), metavar="BASE[:JITTER]")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of mock requests that fail")
+    parser.add_argument("--trace-file", help="Append every turn's spans to this JSON Lines file")
+    parser.add_argument("--json", metavar="PATH", help="Append the summary as one JSON line, to track regressions")
+    parser.add_argument("--max-p95", type=_limit, action="append", default=[], metavar="STAGE=SECONDS",
+                        help="Exit with status 1 if the stage's p95 is above the limit (repeatable)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s - %(levelname)s - %(message)s")
+    paths = sorted(glob.glob(args.samples))
+    if not paths:
+        parser.error(f"no clips match {args.samples}")
+    clips = [load_clip(path, Config.CAPTURE_SAMPLE_RATE) for path in paths]
+
+    Config.TRACE_FILE = args.trace_file
+    server = MockProviderServer(
+        stt_latency=args.stt_latency,
+        llm_first_token=args.llm_first_token,
+        llm_token=args.llm_token,
+        tts_first_byte=args.tts_first_byte,
+        error_rate=args.error_rate
+    )
+    with server:
+        use_mock_providers(server, args.transcription_model, args.response_model)
+        tracer = asyncio.run(run_benchmark(
+            clips, server, args.turns, args.speed, realtime_playback=not args.no_realtime_playback))
+
+    summary = tracer.summary()
+    print(format_report(summary, tracer.turns))
+
+    if args.json:
+        entry = {
+            "timestamp": time.time(),
+            "turns": tracer.turns,
+            "models": {"transcription": args.transcription_model, "response": args.response_model},
+            "stages": summary,
+        }
+        with open(args.json, "a") as f:
+            f.write(json.dumps(entry) + "\n")
+
+    failures = check_thresholds(summary, dict(args.max_p95))
+    for failure in failures:
+        print(f"FAIL {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
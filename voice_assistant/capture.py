@@ -0,0 +1,489 @@
+# voice_assistant/capture.py
+
+import io
+import logging
+import queue
+import threading
+import wave
+from collections import deque
+
+import numpy as np
+import pyaudio
+
+
+def frame_energy(frame):
+    """
+    Return the RMS energy of a 16-bit PCM frame.
+
+    Args:
+        frame (bytes): Little-endian int16 samples.
+
+    Returns:
+        float: The root-mean-square amplitude.
+    """
+    samples = np.frombuffer(frame, dtype=np.int16).astype(np.float32)
+    if samples.size == 0:
+        return 0.0
+    return float(np.sqrt(np.mean(samples * samples)))
+
+
+def pcm_to_wav(pcm, sample_rate=16000, channels=1):
+    """
+    Wrap raw 16-bit PCM in an in-memory WAV container.
+
+    Args:
+        pcm (bytes): Little-endian int16 samples.
+        sample_rate (int): Sample rate of the audio in Hz.
+        channels (int): Number of interleaved channels.
+
+    Returns:
+        bytes: A complete WAV file.
+    """
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav_file:
+        wav_file.setnchannels(channels)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(sample_rate)
+        wav_file.writeframes(pcm)
+    return buffer.getvalue()
+
+
+class NoiseFloorEstimator:
+    """
+    Track the background noise level from idle microphone audio.
+
+    The floor follows quiet frames quickly and loud frames slowly, so it settles on the
+    ambient level within a second or two and drifts up if the room gets noisier, but a
+    burst of speech barely moves it. The speech threshold is a multiple of the floor.
+    """
+
+    def __init__(self, initial_floor=150, multiplier=3.0, fall_rate=0.2, rise_rate=0.01,
+                 min_threshold=150, max_threshold=4000):
+        """
+        Args:
+            initial_floor (float): Starting noise floor (RMS).
+            multiplier (float): Threshold = floor * multiplier.
+            fall_rate (float): Smoothing factor used when a frame is quieter than the floor.
+            rise_rate (float): Smoothing factor used when a frame is louder than the floor.
+            min_threshold (float): Lower bound on the returned threshold.
+            max_threshold (float): Upper bound on the returned threshold.
+        """
+        self.floor = initial_floor
+        self.multiplier = multiplier
+        self.fall_rate = fall_rate
+        self.rise_rate = rise_rate
+        self.min_threshold = min_threshold
+        self.max_threshold = max_threshold
+        self._lock = threading.Lock()
+
+    def update(self, energy):
+        """
+        Fold the energy of an idle frame into the floor estimate.
+
+        Args:
+            energy (float): RMS energy of a frame that is not part of an utterance.
+        """
+        with self._lock:
+            rate = self.fall_rate if energy < self.floor else self.rise_rate
+            self.floor += rate * (energy - self.floor)
+
+    @property
+    def threshold(self):
+        """The current speech energy threshold."""
+        with self._lock:
+            return min(self.max_threshold, max(self.min_threshold, self.floor * self.multiplier))
+
+
+class EnergyVAD:
+    """
+    A frame-level voice-activity detector based on RMS energy.
+
+    Speech starts after `start_frames` consecutive frames above the threshold and ends
+    after `end_frames` consecutive frames below it.
+    """
+
+    def __init__(self, energy_threshold=500, start_frames=3, end_frames=33, noise_floor=None):
+        """
+        Args:
+            energy_threshold (float): RMS level above which a frame counts as speech.
+                Ignored when `noise_floor` is given.
+            start_frames (int): Consecutive speech frames needed to start an utterance.
+            end_frames (int): Consecutive silent frames needed to end an utterance.
+            noise_floor (NoiseFloorEstimator): Optional tracker providing an adaptive
+                threshold; it is updated with every frame outside an utterance.
+        """
+        self._energy_threshold = energy_threshold
+        self.noise_floor = noise_floor
+        self.start_frames = start_frames
+        self.end_frames = end_frames
+        self.reset()
+
+    def reset(self):
+        """Forget any state from a previous utterance."""
+        self.triggered = False
+        self._speech_run = 0
+        self._silence_run = 0
+
+    @property
+    def energy_threshold(self):
+        """The threshold currently in use."""
+        if self.noise_floor is not None:
+            return self.noise_floor.threshold
+        return self._energy_threshold
+
+    def is_speech(self, frame):
+        """Return whether a single frame is above the energy threshold."""
+        energy = frame_energy(frame)
+        speech = energy > self.energy_threshold
+        if self.noise_floor is not None and not speech and not self.triggered:
+            self.noise_floor.update(energy)
+        return speech
+
+    def process(self, frame):
+        """
+        Update the detector with a frame.
+
+        Args:
+            frame (bytes): One frame of int16 PCM.
+
+        Returns:
+            str: 'start' when speech begins, 'end' when it finishes, otherwise None.
+        """
+        speech = self.is_speech(frame)
+        if not self.triggered:
+            self._speech_run = self._speech_run + 1 if speech else 0
+            if self._speech_run >= self.start_frames:
+                self.triggered = True
+                self._silence_run = 0
+                return "start"
+        else:
+            self._silence_run = 0 if speech else self._silence_run + 1
+            if self._silence_run >= self.end_frames:
+                self.triggered = False
+                self._speech_run = 0
+                return "end"
+        return None
+
+
+class UtteranceEndpointer:
+    """
+    Collect one utterance from a stream of frames using an EnergyVAD.
+
+    Frames are pushed one at a time from whatever source delivers them (a local
+    microphone, a network socket); push() reports when the utterance is complete.
+    """
+
+    def __init__(self, vad, frame_ms=30, pre_roll_frames=10, timeout=10, phrase_time_limit=None,
+                 on_frame=None, prefix=None):
+        """
+        Args:
+            vad (EnergyVAD): The detector used for endpointing (it is reset here).
+            frame_ms (int): Duration of each frame in milliseconds.
+            pre_roll_frames (int): Frames kept from before speech was detected.
+            timeout (float): Maximum time to wait for speech to start (in seconds).
+            phrase_time_limit (float): Maximum length of the utterance (in seconds).
+            on_frame (Callable): Called with each frame that belongs to the utterance,
+                including the pre-roll, as soon as it is known to belong to it.
+            prefix (list): Frames of speech already detected (e.g. by a BargeInDetector);
+                the utterance is treated as started and continues from them.
+        """
+        self.vad = vad
+        self.on_frame = on_frame
+        self.max_wait_frames = int(timeout * 1000) // frame_ms if timeout else None
+        self.max_phrase_frames = int(phrase_time_limit * 1000) // frame_ms if phrase_time_limit else None
+        self.frame_ms = frame_ms
+        self.pre_roll = deque(maxlen=pre_roll_frames)
+        self.utterance = []
+        self.waited = 0
+        # Trailing silence (in seconds) the VAD waited for before endpointing
+        self.endpoint_delay = 0.0
+
+        self.vad.reset()
+        if prefix:
+            self.vad.triggered = True
+            self._extend(prefix)
+
+    def _extend(self, frames):
+        self.utterance.extend(frames)
+        if self.on_frame:
+            for frame in frames:
+                self.on_frame(frame)
+
+    def push(self, frame):
+        """
+        Add the next frame.
+
+        Args:
+            frame (bytes): One frame of int16 PCM.
+
+        Returns:
+            str: 'done' when the utterance is complete, 'timeout' if speech did not start
+            in time, otherwise None.
+        """
+        event = self.vad.process(frame)
+        if not self.utterance:
+            self.pre_roll.append(frame)
+            if event == "start":
+                logging.info("Speech detected")
+                self._extend(self.pre_roll)
+                return None
+            self.waited += 1
+            if self.max_wait_frames and self.waited >= self.max_wait_frames:
+                logging.warning("Listening timed out waiting for speech")
+                return "timeout"
+            return None
+
+        self._extend([frame])
+        if event == "end":
+            logging.info("End of speech detected")
+            self.endpoint_delay = self.vad.end_frames * self.frame_ms / 1000
+            return "done"
+        if self.max_phrase_frames and len(self.utterance) >= self.max_phrase_frames:
+            logging.info("Phrase time limit reached")
+            return "done"
+        return None
+
+    @property
+    def pcm(self):
+        """The utterance captured so far as int16 PCM."""
+        return b"".join(self.utterance)
+
+
+class BargeInDetector:
+    """
+    Detect the user talking over the assistant's playback.
+
+    The microphone also hears the assistant's own voice, so a frame only counts as
+    speech above `threshold_multiplier` times the normal VAD threshold, and speech must
+    last `min_speech_ms` before it is reported.
+    """
+
+    def __init__(self, vad, frame_ms=30, threshold_multiplier=2.0, min_speech_ms=200):
+        """
+        Args:
+            vad (EnergyVAD): Provides the current speech threshold.
+            frame_ms (int): Duration of each frame in milliseconds.
+            threshold_multiplier (float): Multiple of the VAD threshold used during playback.
+            min_speech_ms (int): Duration of speech needed to report a barge-in.
+        """
+        self.vad = vad
+        self.threshold_multiplier = threshold_multiplier
+        self.needed = max(1, min_speech_ms // frame_ms)
+        self._run = []
+
+    def push(self, frame):
+        """
+        Add the next frame.
+
+        Returns:
+            list: The speech frames that triggered the barge-in (to be used as the
+            `prefix` of the next utterance), or None.
+        """
+        if frame_energy(frame) > self.vad.energy_threshold * self.threshold_multiplier:
+            self._run.append(frame)
+            if len(self._run) >= self.needed:
+                logging.info("Barge-in detected")
+                frames, self._run = self._run, []
+                return frames
+        else:
+            self._run.clear()
+        return None
+
+
+class MicrophoneCapture:
+    """
+    Capture spoken utterances from the microphone into memory.
+
+    The PyAudio input stream is opened once and read continuously by a background
+    thread. Between utterances the frames feed the noise-floor estimator, so the speech
+    threshold is always current and no per-turn calibration pause is needed; during an
+    utterance they are endpointed with EnergyVAD and returned as raw 16-bit PCM, ready to
+    hand to the transcription backend without any encoding or disk round trip.
+    """
+
+    def __init__(self, sample_rate=16000, frame_ms=30, energy_threshold=500,
+                 pause_threshold=1.0, pre_roll_ms=300, start_ms=90, adaptive_threshold=True,
+                 noise_multiplier=3.0, playback_active=None):
+        """
+        Args:
+            sample_rate (int): Capture sample rate in Hz.
+            frame_ms (int): Duration of each VAD frame in milliseconds.
+            energy_threshold (float): RMS level above which a frame counts as speech. Used
+                as-is when `adaptive_threshold` is False, otherwise as the starting point.
+            pause_threshold (float): Seconds of silence that end the utterance.
+            pre_roll_ms (int): Audio kept from before speech was detected, so the first
+                syllable is not clipped.
+            start_ms (int): Duration of speech needed to start an utterance.
+            adaptive_threshold (bool): Track the noise floor in the background instead of
+                using a fixed threshold.
+            noise_multiplier (float): Speech threshold as a multiple of the noise floor.
+            playback_active (Callable): Returns True while the assistant is speaking; the
+                noise floor is not updated then, since the microphone hears the speaker.
+        """
+        self.sample_rate = sample_rate
+        self.frame_ms = frame_ms
+        self.frame_samples = sample_rate * frame_ms // 1000
+        self.noise_floor = NoiseFloorEstimator(
+            initial_floor=energy_threshold / noise_multiplier,
+            multiplier=noise_multiplier) if adaptive_threshold else None
+        self.vad = EnergyVAD(
+            energy_threshold=energy_threshold,
+            start_frames=max(1, start_ms // frame_ms),
+            end_frames=max(1, int(pause_threshold * 1000) // frame_ms),
+            noise_floor=self.noise_floor
+        )
+        self.pre_roll_frames = max(1, pre_roll_ms // frame_ms)
+        self.playback_active = playback_active
+        # Trailing silence (in seconds) before the last utterance was endpointed
+        self.last_endpoint_delay = 0.0
+
+        self._pyaudio = None
+        self._stream = None
+        self._thread = None
+        self._running = threading.Event()
+        self._listening = threading.Event()
+        self._frames = queue.Queue(maxsize=int(60 * 1000 / frame_ms))
+        self._recent = deque(maxlen=self.pre_roll_frames)
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Open the microphone and start the background reader if not already running."""
+        with self._lock:
+            if self._running.is_set():
+                return
+            self._pyaudio = pyaudio.PyAudio()
+            self._stream = self._pyaudio.open(
+                format=pyaudio.paInt16,
+                channels=1,
+                rate=self.sample_rate,
+                input=True,
+                frames_per_buffer=self.frame_samples
+            )
+            self._running.set()
+            self._thread = threading.Thread(target=self._read_loop, name="mic-capture", daemon=True)
+            self._thread.start()
+            logging.info(f"Microphone capture started ({self.sample_rate} Hz)")
+
+    def _read_loop(self):
+        while self._running.is_set():
+            try:
+                frame = self._stream.read(self.frame_samples, exception_on_overflow=False)
+            except Exception as e:
+                logging.error(f"Microphone read failed: {e}")
+                self._running.clear()
+                break
+            if self._listening.is_set():
+                try:
+                    self._frames.put_nowait(frame)
+                except queue.Full:
+                    logging.warning("Capture queue full, dropping frame")
+                continue
+            self._recent.append(frame)
+            if self.noise_floor is not None and not (self.playback_active and self.playback_active()):
+                self.noise_floor.update(frame_energy(frame))
+
+    def close(self):
+        """Stop the background reader and release the microphone."""
+        with self._lock:
+            if not self._running.is_set() and self._stream is None:
+                return
+            self._running.clear()
+            self._listening.clear()
+            if self._thread:
+                self._thread.join(timeout=2)
+                self._thread = None
+            if self._stream:
+                self._stream.stop_stream()
+                self._stream.close()
+                self._stream = None
+            if self._pyaudio:
+                self._pyaudio.terminate()
+                self._pyaudio = None
+            logging.info("Microphone capture closed")
+
+    def frames(self, timeout=1.0, replay_recent=True):
+        """
+        Yield frames of int16 PCM from the open microphone until the generator is closed.
+
+        The most recent idle frames are yielded first, so speech that began just before
+        listening started is not lost.
+
+        Args:
+            timeout (float): Seconds to wait for each frame before giving up.
+            replay_recent (bool): Whether to start with the most recent idle frames.
+
+        Yields:
+            bytes: One frame of `frame_ms` milliseconds.
+        """
+        self.start()
+        while not self._frames.empty():
+            self._frames.get_nowait()
+        recent = list(self._recent) if replay_recent else []
+        self._recent.clear()
+        self._listening.set()
+        try:
+            yield from recent
+            while self._running.is_set():
+                try:
+                    yield self._frames.get(timeout=timeout)
+                except queue.Empty:
+                    raise RuntimeError("Microphone stopped delivering audio")
+        finally:
+            self._listening.clear()
+
+    def wait_for_speech(self, stop_event, threshold_multiplier=2.0, min_speech_ms=200):
+        """
+        Watch the microphone for the user talking over the assistant (barge-in).
+
+        Args:
+            stop_event (threading.Event): Set to stop watching.
+            threshold_multiplier (float): Multiple of the VAD threshold used during playback.
+            min_speech_ms (int): Duration of speech needed to report a barge-in.
+
+        Returns:
+            list: The speech frames that triggered the barge-in, to be passed as `prefix`
+            to record_utterance, or None if `stop_event` was set first.
+        """
+        detector = BargeInDetector(self.vad, self.frame_ms, threshold_multiplier, min_speech_ms)
+        frames = self.frames(replay_recent=False)
+        try:
+            for frame in frames:
+                if stop_event.is_set():
+                    return None
+                speech = detector.push(frame)
+                if speech:
+                    return speech
+        finally:
+            frames.close()
+        return None
+
+    def record_utterance(self, timeout=10, phrase_time_limit=None, on_frame=None, prefix=None):
+        """
+        Listen for one utterance and return it as raw PCM.
+
+        Args:
+            timeout (float): Maximum time to wait for speech to start (in seconds).
+            phrase_time_limit (float): Maximum length of the utterance (in seconds).
+            on_frame (Callable): Called with each frame that belongs to the utterance,
+                including the pre-roll, as soon as it is captured.
+            prefix (list): Frames of speech already detected (e.g. by wait_for_speech);
+                the utterance is treated as started and continues from them.
+
+        Returns:
+            bytes: The captured int16 PCM, or None if no speech started before the timeout.
+        """
+        endpointer = UtteranceEndpointer(
+            self.vad, self.frame_ms, self.pre_roll_frames, timeout, phrase_time_limit, on_frame, prefix)
+        frames = self.frames()
+        try:
+            for frame in frames:
+                status = endpointer.push(frame)
+                if status == "timeout":
+                    return None
+                if status == "done":
+                    break
+        finally:
+            frames.close()
+
+        self.last_endpoint_delay = endpointer.endpoint_delay
+        return endpointer.pcm
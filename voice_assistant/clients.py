@@ -0,0 +1,221 @@
+# voice_assistant/clients.py
+
+import importlib.util
+import logging
+import threading
+
+from voice_assistant.config import Config
+
+_clients = {}
+_async_clients = {}
+_clients_lock = threading.RLock()
+
+
+def _build_http_client():
+    """
+    Build the httpx client shared by every SDK that accepts one.
+
+    httpx keeps a separate keep-alive pool per host inside one client, so Groq and OpenAI
+    requests each reuse their own warm connections.
+    """
+    import httpx
+    http2 = Config.HTTP2 and importlib.util.find_spec("h2") is not None
+    if Config.HTTP2 and not http2:
+        logging.warning("HTTP/2 requested but the 'h2' package is not installed, using HTTP/1.1")
+    return httpx.Client(
+        http2=http2,
+        limits=httpx.Limits(
+            max_connections=Config.HTTP_POOL_SIZE,
+            max_keepalive_connections=Config.HTTP_POOL_SIZE,
+            keepalive_expiry=Config.HTTP_KEEPALIVE_EXPIRY
+        ),
+        timeout=httpx.Timeout(Config.HTTP_TIMEOUT, connect=Config.HTTP_CONNECT_TIMEOUT)
+    )
+
+
+def _build_http_session():
+    """Build the requests session used for the local FastWhisperAPI and MeloTTS services."""
+    import requests
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(
+        pool_connections=Config.HTTP_POOL_SIZE,
+        pool_maxsize=Config.HTTP_POOL_SIZE
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def _build_openai(api_key):
+    from openai import OpenAI
+    return OpenAI(api_key=api_key, base_url=Config.OPENAI_BASE_URL, http_client=get_client("httpx"))
+
+
+def _build_groq(api_key):
+    from groq import Groq
+    return Groq(api_key=api_key, base_url=Config.GROQ_BASE_URL, http_client=get_client("httpx"))
+
+
+def _build_deepgram(api_key):
+    from deepgram import DeepgramClient, DeepgramClientOptions
+    if Config.DEEPGRAM_BASE_URL:
+        return DeepgramClient(api_key, DeepgramClientOptions(url=Config.DEEPGRAM_BASE_URL))
+    return DeepgramClient(api_key)
+
+
+def _build_cartesia(api_key):
+    from cartesia import Cartesia
+    return Cartesia(api_key=api_key)
+
+
+def _build_elevenlabs(api_key):
+    from elevenlabs.client import ElevenLabs
+    return ElevenLabs(api_key=api_key)
+
+
+def _build_ollama(api_key):
+    import ollama
+    return ollama.Client(timeout=Config.HTTP_TIMEOUT)
+
+
+CLIENT_FACTORIES = {
+    "httpx": lambda api_key: _build_http_client(),
+    "requests": lambda api_key: _build_http_session(),
+    "openai": _build_openai,
+    "groq": _build_groq,
+    "deepgram": _build_deepgram,
+    "cartesia": _build_cartesia,
+    "elevenlabs": _build_elevenlabs,
+    "ollama": _build_ollama,
+}
+
+
+def get_client(provider, api_key=None):
+    """
+    Return the shared SDK client for a provider, building it on first use.
+
+    Clients are cached by (provider, api_key) so every call reuses the same connection
+    pool instead of paying DNS, TCP and TLS setup again.
+
+    Args:
+        provider (str): One of the keys of CLIENT_FACTORIES.
+        api_key (str): The API key for the provider, if it needs one.
+
+    Returns:
+        The provider's client object.
+
+    Raises:
+        ValueError: If the provider is unknown.
+    """
+    key = (provider, api_key)
+    client = _clients.get(key)
+    if client is not None:
+        return client
+    if provider not in CLIENT_FACTORIES:
+        raise ValueError(f"Unsupported client provider: {provider}")
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = CLIENT_FACTORIES[provider](api_key)
+            _clients[key] = client
+            logging.debug(f"Created {provider} client")
+    return client
+
+
+def _build_async_http_client():
+    """Build the httpx.AsyncClient shared by the async SDK clients."""
+    import httpx
+    http2 = Config.HTTP2 and importlib.util.find_spec("h2") is not None
+    return httpx.AsyncClient(
+        http2=http2,
+        limits=httpx.Limits(
+            max_connections=Config.HTTP_POOL_SIZE,
+            max_keepalive_connections=Config.HTTP_POOL_SIZE,
+            keepalive_expiry=Config.HTTP_KEEPALIVE_EXPIRY
+        ),
+        timeout=httpx.Timeout(Config.HTTP_TIMEOUT, connect=Config.HTTP_CONNECT_TIMEOUT)
+    )
+
+
+def _build_async_openai(api_key):
+    from openai import AsyncOpenAI
+    return AsyncOpenAI(api_key=api_key, base_url=Config.OPENAI_BASE_URL, http_client=get_async_client("httpx"))
+
+
+def _build_async_groq(api_key):
+    from groq import AsyncGroq
+    return AsyncGroq(api_key=api_key, base_url=Config.GROQ_BASE_URL, http_client=get_async_client("httpx"))
+
+
+def _build_async_cartesia(api_key):
+    from cartesia import AsyncCartesia
+    return AsyncCartesia(api_key=api_key)
+
+
+def _build_async_playht(api_key):
+    from pyht import AsyncClient
+    return AsyncClient(user_id=Config.PLAY_HT_USER_ID, api_key=api_key)
+
+
+def _build_async_ollama(api_key):
+    import ollama
+    return ollama.AsyncClient(timeout=Config.HTTP_TIMEOUT)
+
+
+ASYNC_CLIENT_FACTORIES = {
+    "httpx": lambda api_key: _build_async_http_client(),
+    "openai": _build_async_openai,
+    "groq": _build_async_groq,
+    # The Deepgram client serves both sync and async requests (listen.asyncrest)
+    "deepgram": lambda api_key: get_client("deepgram", api_key),
+    "cartesia": _build_async_cartesia,
+    "playht": _build_async_playht,
+    "ollama": _build_async_ollama,
+}
+
+
+def get_async_client(provider, api_key=None):
+    """
+    Return the shared asyncio SDK client for a provider, building it on first use.
+
+    Async clients hold connections bound to the event loop they were first used on, so
+    the registry assumes a single long-running loop per process (as in pipeline.py and
+    server mode).
+
+    Args:
+        provider (str): One of the keys of ASYNC_CLIENT_FACTORIES.
+        api_key (str): The API key for the provider, if it needs one.
+
+    Returns:
+        The provider's async client object.
+
+    Raises:
+        ValueError: If the provider is unknown.
+    """
+    key = (provider, api_key)
+    client = _async_clients.get(key)
+    if client is not None:
+        return client
+    if provider not in ASYNC_CLIENT_FACTORIES:
+        raise ValueError(f"Unsupported async client provider: {provider}")
+    with _clients_lock:
+        client = _async_clients.get(key)
+        if client is None:
+            client = ASYNC_CLIENT_FACTORIES[provider](api_key)
+            _async_clients[key] = client
+            logging.debug(f"Created async {provider} client")
+    return client
+
+
+def close_clients():
+    """Close every cached client that supports it and clear the registry."""
+    with _clients_lock:
+        clients = list(_clients.values())
+        _clients.clear()
+    for client in clients:
+        close = getattr(client, "close", None)
+        if callable(close):
+            try:
+                close()
+            except Exception as e:
+                logging.debug(f"Error while closing client: {e}")
@@ -20,15 +20,104 @@ class Config:
         DEEPGRAM_API_KEY (str): API key for Deepgram services.
         ELEVENLABS_API_KEY (str): API key for ElevenLabs services.
         LOCAL_MODEL_PATH (str): Path to the local model.
+        STREAM_RESPONSES (bool): Whether to overlap response generation and TTS sentence by sentence.
+        TTS_KEEPALIVE_INTERVAL (float): Seconds between pings that keep the TTS WebSocket warm.
+        TTS_ARCHIVE_FILE (str): File each reply is saved to in the background (None disables saving).
+        TTS_CACHE (bool): Whether to reuse synthesized audio for repeated phrases.
+        TTS_CACHE_DIR (str): Directory of the on-disk TTS audio cache (None for memory only).
+        TTS_CACHE_MEMORY_MB (int): Size limit of the in-memory TTS audio cache.
+        TTS_CACHE_DISK_MB (int): Size limit of the on-disk TTS audio cache.
+        TTS_CACHE_MAX_CHARS (int): Longest text stored in the TTS audio cache.
+        TTS_PREWARM_PHRASES (list): Phrases (e.g. greetings) synthesized into the TTS cache at startup.
+        MEMORY_MAX_TOKENS (int): Token budget for the chat history sent to the LLM.
+        MEMORY_KEEP_RECENT (int): Number of most recent messages always sent verbatim.
+        MEMORY_SUMMARIZE (bool): Whether older turns are summarized rather than dropped.
+        RESPONSE_CACHE (bool): Whether to reuse replies to repeated or near-identical questions.
+        RESPONSE_CACHE_SIMILARITY (float): Minimum similarity for a near-identical question to hit.
+        RESPONSE_CACHE_TTL (float): Seconds a cached reply stays valid.
+        RESPONSE_CACHE_MAX_ENTRIES (int): Maximum number of cached replies.
+        ASYNC_PIPELINE (bool): Whether to run the asyncio pipeline instead of the blocking loop.
+        PIPELINE_QUEUE_SIZE (int): Capacity of the bounded queues between pipeline stages.
+        BARGE_IN (bool): Whether user speech during a reply interrupts it (async pipeline).
+        BARGE_IN_THRESHOLD_MULTIPLIER (float): VAD threshold multiple used while the assistant speaks.
+        BARGE_IN_MIN_SPEECH_MS (int): Duration of speech needed to interrupt a reply.
+        SERVER_HOST (str): Interface the multi-session voice server binds to.
+        SERVER_PORT (int): Port of the multi-session voice server.
+        SERVER_MAX_SESSIONS (int): Maximum concurrent sessions per server process.
+        SERVER_INPUT_QUEUE_SIZE (int): Inbound audio frames buffered per session.
+        MELOTTS_HOST (str): Host running local_tts_api.py; audio is streamed back, so it can be another machine.
+        MELOTTS_REPLICAS (int): MeloTTS model replicas (worker processes) in local_tts_api.py.
+        MELOTTS_PIN_CORES (bool): Whether to pin each replica to its own share of the CPU cores.
+        MELOTTS_BATCHING (bool): Whether to hand replicas batches of requests; only useful for a model with
+            batched inference, as MeloTTS synthesizes a batch one request after another.
+        MELOTTS_MAX_BATCH_SIZE (int): Most requests handed to a replica at once when batching.
+        MELOTTS_MAX_BATCH_WAIT_MS (float): Longest wait for a batch to fill once it has one request.
+        MELOTTS_QUEUE_SIZE (int): Requests queued before new ones are rejected with a 503.
+        MELOTTS_QUEUE_TIMEOUT (float): Seconds a request may wait in the queue before it is dropped.
+        MELOTTS_MODELS (dict): Languages the MeloTTS server hosts, each mapped to melo.api.TTS options
+            ('language', 'config_path', 'ckpt_path', e.g. for a custom checkpoint) and an optional 'warmup' phrase.
+        MELOTTS_PRELOAD (list): Languages loaded at start-up; the others load on their first request.
+        MELOTTS_MEMORY_BUDGET_MB (float): Memory each replica's models may use before the least recently
+            used are evicted (None for no limit).
+        MELOTTS_MODEL_CONCURRENCY (int): Replicas that may work on one language at once (None for all).
+        MELOTTS_LANGUAGE (str): Language the assistant requests from the MeloTTS server.
+        MELOTTS_ACCENT (str): Speaker of that language's model the assistant requests (e.g. 'EN-US', 'ES').
+        TRANSCRIPTION_HEDGE_MODELS (list): Transcription models raced against a slow or failing primary.
+        RESPONSE_HEDGE_MODELS (list): Response models raced against a slow or failing primary.
+        TRANSCRIPTION_HEDGE_DELAY (float): Longest wait for a transcript before hedging (in seconds).
+        RESPONSE_HEDGE_DELAY (float): Longest wait for the first response token before hedging (in seconds).
+        HEDGE_PERCENTILE (float): Hedge earlier, at this percentile of the backend's recent latency.
+        HEDGE_MIN_SAMPLES (int): Latency samples needed before the percentile is used.
+        TRANSCRIPTION_TIMEOUT (float): Seconds after which a transcription attempt is abandoned.
+        RESPONSE_TIMEOUT (float): Seconds to wait for the first response token before giving up.
+        CIRCUIT_FAILURE_RATE (float): Error rate over the rolling window that opens a provider's circuit.
+        CIRCUIT_MIN_REQUESTS (int): Calls in the window before the error rate is trusted.
+        CIRCUIT_CONSECUTIVE_FAILURES (int): Failures in a row that open a provider's circuit.
+        CIRCUIT_WINDOW (float): Length of the rolling health window (in seconds).
+        CIRCUIT_OPEN_SECONDS (float): Cooldown before an open circuit lets a probe through.
+        CIRCUIT_MAX_OPEN_SECONDS (float): Longest cooldown; it doubles after each failed probe.
+        RETRY_BACKOFF_BASE (float): Delay before the first retry, before jitter (in seconds).
+        RETRY_BACKOFF_MAX (float): Longest delay between retries (in seconds).
+        TRACE_FILE (str): JSON Lines file each turn's stage timings are appended to (None disables).
+        METRICS_PORT (int): Port serving the latency histograms at /metrics for Prometheus (None disables).
+        METRICS_HOST (str): Interface the metrics endpoint listens on.
+        OPENAI_BASE_URL (str): OpenAI API endpoint (None for the SDK default).
+        GROQ_BASE_URL (str): Groq API endpoint (None for the SDK default).
+        DEEPGRAM_BASE_URL (str): Deepgram API endpoint (None for the SDK default).
+        HTTP2 (bool): Whether to use HTTP/2 for provider connections when 'h2' is installed.
+        HTTP_POOL_SIZE (int): Maximum pooled connections per client.
+        HTTP_KEEPALIVE_EXPIRY (float): Seconds an idle pooled connection is kept open.
+        HTTP_TIMEOUT (float): Request timeout in seconds.
+        HTTP_CONNECT_TIMEOUT (float): Connection timeout in seconds.
+        IN_MEMORY_CAPTURE (bool): Whether to capture speech into memory instead of an MP3 file.
+        CAPTURE_SAMPLE_RATE (int): Microphone sample rate for in-memory capture.
+        CAPTURE_FRAME_MS (int): VAD frame length in milliseconds.
+        VAD_ENERGY_THRESHOLD (float): RMS level above which a frame counts as speech.
+        VAD_PAUSE_THRESHOLD (float): Seconds of silence that end an utterance.
+        VAD_ADAPTIVE_THRESHOLD (bool): Whether to derive the speech threshold from a rolling noise floor.
+        VAD_NOISE_MULTIPLIER (float): Speech threshold as a multiple of the noise floor.
+        STREAMING_TRANSCRIPTION (bool): Whether to transcribe incrementally during in-memory capture.
+        CHUNKED_TRANSCRIPTION (bool): Whether models without a live API (e.g. Groq, OpenAI) transcribe
+            incrementally too, by re-uploading the utterance at each pause (one paid request per pause).
     """
     # Model selection
     TRANSCRIPTION_MODEL = 'groq'  # possible values: openai, groq, deepgram, fastwhisperapi
     RESPONSE_MODEL = 'groq'  # possible values: openai, groq, ollama
-    TTS_MODEL = 'cartesia'  # possible values: openai, deepgram, elevenlabs, melotts, cartesia
+    TTS_MODEL = 'cartesia'  # possible values: openai, deepgram, elevenlabs, melotts, cartesia, playht (async pipeline only)
 
     # currently using the MeloTTS for local models. here is how to get started:
     # https://github.com/myshell-ai/MeloTTS/blob/main/docs/install.md#linux-and-macos-install
 
+    # System prompt that starts every conversation
+    SYSTEM_PROMPT = """ 
+     You are a highly empathetic, friendly, and cheerful assistant designed to help visually impaired people users. 
+        Respond clearly, kindly, with light humor, using **no more than 20 words** per response.
+        Always be patient, encouraging, and positive.
+        Educate gently without rushing. Make your tone feel like a close, caring friend.
+        Support, guide, educate, and bring joy.
+        
+        """
+
     # LLM Selection
     OLLAMA_LLM="llama3:8b"
     GROQ_LLM="llama3-8b-8192"
@@ -41,13 +130,139 @@ class Config:
     ELEVENLABS_API_KEY = os.getenv("ELEVENLABS_API_KEY")
     LOCAL_MODEL_PATH = os.getenv("LOCAL_MODEL_PATH")
     CARTESIA_API_KEY = os.getenv("CARTESIA_API_KEY")
+    PLAY_HT_USER_ID = os.getenv("PLAY_HT_USER_ID")
+    PLAY_HT_API_KEY = os.getenv("PLAY_HT_API_KEY")
+
+    # Stream LLM tokens into TTS sentence by sentence instead of waiting for the full reply
+    STREAM_RESPONSES = True
+
+    # Seconds between keepalive pings on the idle Cartesia WebSocket (0 disables)
+    TTS_KEEPALIVE_INTERVAL = 20
+
+    # Save each spoken reply here as it plays (.wav, .flac, .ogg, .opus or .mp3; None disables)
+    TTS_ARCHIVE_FILE = "output.wav"
+
+    # Cache synthesized audio for short repeated phrases (fallbacks, greetings, common replies)
+    TTS_CACHE = True
+    TTS_CACHE_DIR = ".tts_cache"
+    TTS_CACHE_MEMORY_MB = 32
+    TTS_CACHE_DISK_MB = 256
+    TTS_CACHE_MAX_CHARS = 200
+    # The fallback response is always prewarmed; add greetings or other fixed phrases here
+    TTS_PREWARM_PHRASES = []
+
+    # Bound the chat history sent to the LLM; older turns are folded into a summary in the background
+    MEMORY_MAX_TOKENS = 1500
+    MEMORY_KEEP_RECENT = 6
+    MEMORY_SUMMARIZE = True
+
+    # Answer repeated questions from a local cache instead of the LLM. Replies only depend on
+    # the last user turn and the system prompt, so leave this off for context-heavy conversations.
+    RESPONSE_CACHE = False
+    RESPONSE_CACHE_SIMILARITY = 0.85
+    RESPONSE_CACHE_TTL = 3600
+    RESPONSE_CACHE_MAX_ENTRIES = 512
+
+    # Run the asyncio pipeline (pipeline.py) instead of the blocking loop in voice.py
+    ASYNC_PIPELINE = False
+    # Capacity of the queues between pipeline stages (tokens, clauses, audio chunks)
+    PIPELINE_QUEUE_SIZE = 32
+
+    # Barge-in (async pipeline): stop the reply as soon as the user talks over it.
+    # The microphone also hears the speaker, so speech must be louder than usual and sustained.
+    BARGE_IN = True
+    BARGE_IN_THRESHOLD_MULTIPLIER = 2.0
+    BARGE_IN_MIN_SPEECH_MS = 200
+
+    # Multi-session WebSocket server (server.py)
+    SERVER_HOST = "0.0.0.0"
+    SERVER_PORT = 8765
+    SERVER_MAX_SESSIONS = 50
+    SERVER_INPUT_QUEUE_SIZE = 200
+
+    # Hedged requests: when the primary is slower than its recent p95 (capped by the delay) or
+    # fails, the same request also goes to the next backup and the first answer wins.
+    # Backups without an API key are skipped; empty lists only apply the timeouts.
+    TRANSCRIPTION_HEDGE_MODELS = []  # e.g. ['deepgram', 'openai']
+    RESPONSE_HEDGE_MODELS = []  # e.g. ['openai', 'ollama']
+    TRANSCRIPTION_HEDGE_DELAY = 1.5
+    RESPONSE_HEDGE_DELAY = 1.0
+    HEDGE_PERCENTILE = 95
+    HEDGE_MIN_SAMPLES = 20
+    TRANSCRIPTION_TIMEOUT = 15.0
+    RESPONSE_TIMEOUT = 15.0
+
+    # Circuit breakers: a provider that keeps failing is skipped (the next hedge backend takes
+    # over) until a probe request after the cooldown succeeds
+    CIRCUIT_FAILURE_RATE = 0.5
+    CIRCUIT_MIN_REQUESTS = 4
+    CIRCUIT_CONSECUTIVE_FAILURES = 3
+    CIRCUIT_WINDOW = 30.0
+    CIRCUIT_OPEN_SECONDS = 5.0
+    CIRCUIT_MAX_OPEN_SECONDS = 60.0
+    # Exponential backoff with full jitter between retries
+    RETRY_BACKOFF_BASE = 0.25
+    RETRY_BACKOFF_MAX = 4.0
+
+    # Per-turn latency tracing (see tracing.py): a trace file and/or a Prometheus endpoint
+    TRACE_FILE = None  # e.g. "traces.jsonl"
+    METRICS_PORT = None  # e.g. 9100
+    METRICS_HOST = "127.0.0.1"
+
+    # TTS voices
+    CARTESIA_VOICE_ID = "f91ab3e6-5071-4e15-b016-cde6f2bcd222"
+    CARTESIA_MODEL_ID = "sonic-2"
+    PLAY_HT_VOICE = "s3://voice-cloning-zero-shot/775ae416-49bb-4fb6-bd45-740f205d20a1/jennifersaad/manifest.json"
+
+    # Provider endpoints, None for each SDK's default; the benchmark points them at local stand-ins
+    OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL")
+    GROQ_BASE_URL = os.getenv("GROQ_BASE_URL")
+    DEEPGRAM_BASE_URL = os.getenv("DEEPGRAM_BASE_URL")
+
+    # Shared HTTP connection pools for provider SDKs (see clients.py)
+    HTTP2 = True
+    HTTP_POOL_SIZE = 20
+    HTTP_KEEPALIVE_EXPIRY = 60
+    HTTP_TIMEOUT = 30
+    HTTP_CONNECT_TIMEOUT = 5
 
     # for serving the MeloTTS model
     TTS_PORT_LOCAL = 5150
+    MELOTTS_HOST = os.getenv("MELOTTS_HOST", "localhost")
+    # local_tts_api.py: idle replicas take requests from one queue; a full queue sheds load with a 503
+    MELOTTS_REPLICAS = 1
+    MELOTTS_PIN_CORES = True
+    MELOTTS_BATCHING = False
+    MELOTTS_MAX_BATCH_SIZE = 1
+    MELOTTS_MAX_BATCH_WAIT_MS = 10
+    MELOTTS_QUEUE_SIZE = 64
+    MELOTTS_QUEUE_TIMEOUT = 30.0
+    # Language models are loaded on first use and evicted least recently used to stay within the budget
+    MELOTTS_MODELS = {"EN": {}, "ES": {}, "FR": {}, "ZH": {}, "JP": {}, "KR": {}}
+    MELOTTS_PRELOAD = ["EN"]
+    MELOTTS_MEMORY_BUDGET_MB = 2048
+    MELOTTS_MODEL_CONCURRENCY = None
+    MELOTTS_LANGUAGE = "EN"
+    MELOTTS_ACCENT = "EN-US"
 
     # temp file generated by the initial STT model
     INPUT_AUDIO = "test.mp3"
 
+    # Capture microphone audio into memory with a frame-level VAD instead of writing INPUT_AUDIO
+    IN_MEMORY_CAPTURE = True
+    CAPTURE_SAMPLE_RATE = 16000
+    CAPTURE_FRAME_MS = 30
+    VAD_ENERGY_THRESHOLD = 500
+    VAD_PAUSE_THRESHOLD = 1.0
+    # Track the noise floor continuously from idle audio instead of calibrating every turn
+    VAD_ADAPTIVE_THRESHOLD = True
+    VAD_NOISE_MULTIPLIER = 3.0
+
+    # Transcribe while the user is still talking (Deepgram live; chunked Whisper for other models is
+    # opt-in, as it re-uploads the utterance at every pause)
+    STREAMING_TRANSCRIPTION = True
+    CHUNKED_TRANSCRIPTION = False
+
     @staticmethod
     def validate_config():
         """
@@ -61,7 +276,7 @@ class Config:
         Config._validate_model('RESPONSE_MODEL', [
             'openai', 'groq', 'ollama', 'local'])
         Config._validate_model('TTS_MODEL', [
-            'openai', 'deepgram', 'elevenlabs', 'melotts', 'cartesia', 'local'])
+            'openai', 'deepgram', 'elevenlabs', 'melotts', 'cartesia', 'playht', 'local'])
 
         Config._validate_api_key('TRANSCRIPTION_MODEL', 'openai', 'OPENAI_API_KEY')
         Config._validate_api_key('TRANSCRIPTION_MODEL', 'groq', 'GROQ_API_KEY')
@@ -75,6 +290,8 @@ class Config:
         Config._validate_api_key('TTS_MODEL', 'elevenlabs', 'ELEVENLABS_API_KEY')
         print("CARTESIA_API_KEY: ", Config.CARTESIA_API_KEY)
         Config._validate_api_key('TTS_MODEL', 'cartesia', 'CARTESIA_API_KEY')
+        Config._validate_api_key('TTS_MODEL', 'playht', 'PLAY_HT_API_KEY')
+        Config._validate_api_key('TTS_MODEL', 'playht', 'PLAY_HT_USER_ID')
 
     @staticmethod
     def _validate_model(attribute, valid_options):
@@ -0,0 +1,230 @@
+# voice_assistant/health.py
+
+import logging
+import random
+import threading
+import time
+from collections import deque
+
+from colorama import Fore
+
+from voice_assistant.config import Config
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+_health = {}
+_health_lock = threading.Lock()
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a provider whose circuit is open."""
+
+
+class LatencyTracker:
+    """Rolling window of recent latencies of one backend in one stage."""
+
+    def __init__(self, window=100):
+        """
+        Args:
+            window (int): Number of most recent samples kept.
+        """
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        """Add a latency sample (in seconds)."""
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, p):
+        """
+        Return the p-th percentile of the recent samples (nearest rank).
+
+        Returns:
+            float | None: The latency in seconds, or None if nothing was recorded yet.
+        """
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        rank = max(0, min(len(samples) - 1, round(p / 100 * len(samples)) - 1))
+        return samples[rank]
+
+    def __len__(self):
+        return len(self._samples)
+
+
+class ProviderHealth:
+    """
+    Rolling error rate and latency of one provider, with a circuit breaker.
+
+    The circuit opens when the error rate over the last `window` seconds reaches
+    `failure_rate` (over at least `min_requests` calls), or after
+    `consecutive_failures` failures in a row. While open, `allow_request` is False,
+    so callers fail over instead of waiting on a provider that is down. After the
+    cooldown one probe request is let through (half-open): success closes the
+    circuit, failure reopens it with the cooldown doubled, up to `max_open_seconds`.
+    """
+
+    def __init__(self, name, failure_rate=0.5, min_requests=4, consecutive_failures=3, window=30.0,
+                 open_seconds=5.0, max_open_seconds=60.0):
+        """
+        Args:
+            name (str): Provider name, for logs.
+            failure_rate (float): Error rate that opens the circuit.
+            min_requests (int): Calls in the window before the error rate is trusted.
+            consecutive_failures (int): Failures in a row that open the circuit.
+            window (float): Length of the rolling window (in seconds).
+            open_seconds (float): First cooldown before a probe is allowed.
+            max_open_seconds (float): Longest cooldown.
+        """
+        self.name = name
+        self.failure_rate = failure_rate
+        self.min_requests = min_requests
+        self.consecutive_failures = consecutive_failures
+        self.window = window
+        self.open_seconds = open_seconds
+        self.max_open_seconds = max_open_seconds
+        self.latency = LatencyTracker()
+        self.state = CLOSED
+        self._outcomes = deque()  # (timestamp, ok)
+        self._failures_in_a_row = 0
+        self._cooldown = open_seconds
+        self._opened_at = 0.0
+        self._probe_started = None
+        self._lock = threading.Lock()
+
+    def allow_request(self):
+        """Return whether a call may be sent now; in half-open state only one probe is allowed."""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            now = time.monotonic()
+            if self.state == OPEN:
+                if now - self._opened_at < self._cooldown:
+                    return False
+                self.state = HALF_OPEN
+                logging.info(Fore.YELLOW + f"{self.name}: circuit half-open, probing" + Fore.RESET)
+            # A probe that never reported back (e.g. a cancelled hedge) does not block forever
+            if self._probe_started is not None and now - self._probe_started < self._cooldown:
+                return False
+            self._probe_started = now
+            return True
+
+    def retry_after(self):
+        """Return the seconds until the circuit lets a probe through (0 if it does now)."""
+        with self._lock:
+            if self.state != OPEN:
+                return 0.0
+            return max(0.0, self._cooldown - (time.monotonic() - self._opened_at))
+
+    def record_success(self, latency=None):
+        """Record a successful call and its latency (in seconds)."""
+        with self._lock:
+            self._add(True)
+            self._failures_in_a_row = 0
+            if latency is not None:
+                self.latency.record(latency)
+            if self.state != CLOSED:
+                logging.info(Fore.GREEN + f"{self.name}: circuit closed" + Fore.RESET)
+                self.state = CLOSED
+                self._cooldown = self.open_seconds
+                self._probe_started = None
+
+    def record_failure(self):
+        """Record a failed or timed-out call."""
+        with self._lock:
+            self._add(False)
+            self._failures_in_a_row += 1
+            if self.state == HALF_OPEN:
+                self._cooldown = min(self._cooldown * 2, self.max_open_seconds)
+                self._open()
+            elif self.state == CLOSED and self._should_open():
+                self._open()
+
+    def error_rate(self):
+        """Return the error rate over the rolling window (0 with no calls)."""
+        with self._lock:
+            self._expire(time.monotonic())
+            if not self._outcomes:
+                return 0.0
+            return sum(1 for _, ok in self._outcomes if not ok) / len(self._outcomes)
+
+    def snapshot(self):
+        """Return the state, error rate and latency percentiles as a dict."""
+        return {
+            "state": self.state,
+            "error_rate": round(self.error_rate(), 3),
+            "p50": self.latency.percentile(50),
+            "p95": self.latency.percentile(95),
+        }
+
+    def _add(self, ok):
+        now = time.monotonic()
+        self._outcomes.append((now, ok))
+        self._expire(now)
+
+    def _expire(self, now):
+        while self._outcomes and now - self._outcomes[0][0] > self.window:
+            self._outcomes.popleft()
+
+    def _should_open(self):
+        if self._failures_in_a_row >= self.consecutive_failures:
+            return True
+        if len(self._outcomes) < self.min_requests:
+            return False
+        failures = sum(1 for _, ok in self._outcomes if not ok)
+        return failures / len(self._outcomes) >= self.failure_rate
+
+    def _open(self):
+        self.state = OPEN
+        self._opened_at = time.monotonic()
+        self._probe_started = None
+        logging.warning(Fore.RED + f"{self.name}: circuit open for {self._cooldown:.1f}s" + Fore.RESET)
+
+
+def get_health(stage, model):
+    """Return the shared health state of a backend in a stage ('transcription' or 'response')."""
+    key = (stage, model)
+    with _health_lock:
+        health = _health.get(key)
+        if health is None:
+            health = _health[key] = ProviderHealth(
+                f"{stage}/{model}",
+                failure_rate=Config.CIRCUIT_FAILURE_RATE,
+                min_requests=Config.CIRCUIT_MIN_REQUESTS,
+                consecutive_failures=Config.CIRCUIT_CONSECUTIVE_FAILURES,
+                window=Config.CIRCUIT_WINDOW,
+                open_seconds=Config.CIRCUIT_OPEN_SECONDS,
+                max_open_seconds=Config.CIRCUIT_MAX_OPEN_SECONDS
+            )
+        return health
+
+
+def health_report():
+    """Return a snapshot of every provider that has been used, keyed by 'stage/model'."""
+    with _health_lock:
+        items = list(_health.values())
+    return {health.name: health.snapshot() for health in items}
+
+
+def backoff_delay(attempt, base=None, cap=None):
+    """
+    Return the wait before retry number `attempt` (0-based): exponential backoff with full jitter.
+
+    Jitter spreads the retries of concurrent sessions, so a recovering provider is not
+    hit by all of them at once.
+
+    Args:
+        attempt (int): Number of attempts that already failed, minus one.
+        base (float): Delay of the first retry before jitter (defaults to Config.RETRY_BACKOFF_BASE).
+        cap (float): Longest delay (defaults to Config.RETRY_BACKOFF_MAX).
+
+    Returns:
+        float: Seconds to wait.
+    """
+    base = Config.RETRY_BACKOFF_BASE if base is None else base
+    cap = Config.RETRY_BACKOFF_MAX if cap is None else cap
+    return random.uniform(0, min(cap, base * 2 ** attempt))
@@ -0,0 +1,535 @@
+# voice_assistant/hedging.py
+
+import asyncio
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from colorama import Fore
+
+from voice_assistant.api_key_manager import get_api_key
+from voice_assistant.async_providers import generate_response_stream_async, transcribe_audio_async
+from voice_assistant.backends import backend_class
+from voice_assistant.config import Config
+from voice_assistant.health import CircuitOpenError, get_health
+from voice_assistant.response_generation import generate_response_stream
+from voice_assistant.transcription import transcribe_audio
+
+# Losers keep their worker until their provider answers, so leave headroom for them
+_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="hedge")
+
+
+class HedgePolicy:
+    """
+    When to send a backup request, and when to give up.
+
+    The backup is sent once the primary has been slower than its recent `percentile`
+    latency, or than `delay` if that is sooner or there are fewer than `min_samples`
+    samples yet. A failure sends the next backup immediately.
+    """
+
+    def __init__(self, delay, timeout=None, percentile=95, min_samples=20):
+        """
+        Args:
+            delay (float): Longest wait (in seconds) before hedging.
+            timeout (float): Seconds after which every attempt is abandoned (None waits forever).
+            percentile (float): Recent-latency percentile to hedge at (None for the fixed delay only).
+            min_samples (int): Samples needed before the percentile is trusted.
+        """
+        self.delay = delay
+        self.timeout = timeout
+        self.percentile = percentile
+        self.min_samples = min_samples
+
+    def hedge_delay(self, health):
+        """Return the seconds to wait for a backend before sending a backup request."""
+        if self.percentile is not None and len(health.latency) >= self.min_samples:
+            return min(self.delay, health.latency.percentile(self.percentile))
+        return self.delay
+
+
+class _Attempts:
+    """
+    The candidates of one hedged request, launched in order of preference.
+
+    Candidates whose circuit is open are skipped, so a provider that is down costs
+    nothing and the next one becomes the primary. Each launched attempt's outcome is
+    recorded in its provider's health exactly once, whether it finishes, fails or is
+    given up on at the deadline.
+    """
+
+    def __init__(self, stage, candidates, policy):
+        self.stage = stage
+        self.policy = policy
+        self.deadline = None if policy.timeout is None else time.monotonic() + policy.timeout
+        self.waiting = list(candidates)
+        self.models = []  # launched models, by launch index
+        self.running = set()  # launch indexes still running
+        self.error = None
+        self.health = None  # health of the most recently launched candidate
+        self._recorded = set()  # launch indexes whose outcome is recorded
+        self._lock = threading.Lock()  # attempts report from worker threads
+
+    def next(self):
+        """Pop the next candidate whose circuit allows a call; return (index, model, call) or None."""
+        while self.waiting:
+            model, call = self.waiting.pop(0)
+            health = get_health(self.stage, model)
+            if health.allow_request():
+                self.health = health
+                self.models.append(model)
+                self.running.add(len(self.models) - 1)
+                return len(self.models) - 1, model, call
+            logging.info(Fore.YELLOW + f"{self.stage}: skipping {model}, circuit open" + Fore.RESET)
+        return None
+
+    def first(self, candidates):
+        """Like `next`, but raise CircuitOpenError if every circuit is open."""
+        launched = self.next()
+        if launched is None:
+            retry = min(get_health(self.stage, model).retry_after() for model, _ in candidates)
+            raise CircuitOpenError(f"Every {self.stage} backend is unavailable, retry in {retry:.1f}s")
+        return launched
+
+    def timeout(self):
+        """Seconds to wait for an event: until the hedge point or the deadline, whichever is first."""
+        timeout = None if self.deadline is None else max(0.0, self.deadline - time.monotonic())
+        if self.waiting:
+            delay = self.policy.hedge_delay(self.health)
+            timeout = delay if timeout is None else min(delay, timeout)
+        return timeout
+
+    def expired(self):
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    def failed(self, index, error):
+        self.running.discard(index)
+        self.error = error
+        logging.warning(Fore.RED + f"{self.stage}: {self.models[index]} failed: {error}" + Fore.RESET)
+
+    def record_success(self, index, latency):
+        """Record attempt `index` as a success, unless its outcome is already recorded."""
+        if self._settle(index):
+            get_health(self.stage, self.models[index]).record_success(latency)
+
+    def record_failure(self, index):
+        """Record attempt `index` as a failure, unless its outcome is already recorded."""
+        if self._settle(index):
+            get_health(self.stage, self.models[index]).record_failure()
+
+    def _settle(self, index):
+        with self._lock:
+            if index in self._recorded:
+                return False
+            self._recorded.add(index)
+            return True
+
+    def timed_out(self):
+        """Count the calls still running as failures and return the TimeoutError to raise."""
+        for index in self.running:
+            self.record_failure(index)
+        return TimeoutError(f"{self.stage} timed out after {self.policy.timeout:.1f}s")
+
+    def log_hedge(self):
+        slow = ", ".join(self.models[i] for i in sorted(self.running))
+        logging.info(Fore.YELLOW + f"{self.stage}: {slow} slower than {self.policy.hedge_delay(self.health):.2f}s, "
+                     f"also trying {self.waiting[0][0]}" + Fore.RESET)
+
+    def won(self, index):
+        if index:
+            logging.info(Fore.YELLOW + f"{self.stage}: answered by {self.models[index]}" + Fore.RESET)
+
+
+def _timed(attempts, index, call):
+    """Wrap `call` so its outcome and latency are recorded as attempt `index`."""
+    def run():
+        start = time.monotonic()
+        try:
+            result = call()
+        except Exception:
+            attempts.record_failure(index)
+            raise
+        attempts.record_success(index, time.monotonic() - start)
+        return result
+    return run
+
+
+def hedged_call(stage, candidates, policy):
+    """
+    Call the first candidate, and the next ones if it is slow or fails; return the first result.
+
+    Calls run on worker threads. Threads cannot be interrupted, so a losing call is
+    cancelled if it has not started yet and otherwise left to finish in the background,
+    its result discarded.
+
+    Args:
+        stage (str): Stage name, for health tracking and logs.
+        candidates (list): (model, callable) pairs in order of preference.
+        policy (HedgePolicy): When to hedge and when to give up.
+
+    Returns:
+        The first successful result.
+
+    Raises:
+        CircuitOpenError: If every candidate's circuit is open.
+        TimeoutError: If nothing succeeded within `policy.timeout`.
+        Exception: The last error, if every candidate failed.
+    """
+    attempts = _Attempts(stage, candidates, policy)
+    futures = {}
+
+    def launch(launched):
+        index, _, call = launched
+        futures[_executor.submit(_timed(attempts, index, call))] = index
+
+    launch(attempts.first(candidates))
+    try:
+        while futures:
+            done, _ = wait(futures, timeout=attempts.timeout(), return_when=FIRST_COMPLETED)
+            for future in done:
+                index = futures.pop(future)
+                if future.exception() is None:
+                    attempts.won(index)
+                    return future.result()
+                attempts.failed(index, future.exception())
+            if attempts.expired():
+                raise attempts.timed_out()
+            if attempts.waiting and (not done or not futures):
+                # Slow (nothing finished before the hedge point) or every running call failed
+                if not done:
+                    attempts.log_hedge()
+                launched = attempts.next()
+                if launched is not None:
+                    launch(launched)
+    finally:
+        for future in futures:
+            future.cancel()
+    raise attempts.error
+
+
+def hedged_stream(stage, candidates, policy):
+    """
+    Stream from the first candidate to produce output, hedging on time to first token.
+
+    Each candidate is a callable returning an iterator; it is consumed on a worker
+    thread. Once one yields, the others are cancelled: they stop and close their
+    streams at their next token.
+
+    Args:
+        stage (str): Stage name, for health tracking and logs.
+        candidates (list): (model, callable) pairs in order of preference.
+        policy (HedgePolicy): When to hedge; `timeout` bounds the wait for the first token.
+
+    Yields:
+        The winning stream's items.
+
+    Raises:
+        CircuitOpenError: If every candidate's circuit is open.
+        TimeoutError: If no stream produced anything within `policy.timeout`.
+        Exception: The last error, if every candidate failed before producing anything.
+    """
+    attempts = _Attempts(stage, candidates, policy)
+    events = queue.Queue()
+    cancels = []
+
+    def pump(index, call, cancel):
+        start = time.monotonic()
+        stream = None
+        first = True
+        try:
+            stream = iter(call())
+            for item in stream:
+                if cancel.is_set():
+                    break
+                if first:
+                    # Time to first token is what the hedge point is compared against
+                    attempts.record_success(index, time.monotonic() - start)
+                    first = False
+                events.put((index, "item", item))
+            events.put((index, "done", None))
+        except Exception as e:
+            if not cancel.is_set():
+                attempts.record_failure(index)
+            events.put((index, "error", e))
+        finally:
+            close = getattr(stream, "close", None)
+            if cancel.is_set() and callable(close):
+                close()
+
+    def launch(launched):
+        index, _, call = launched
+        cancel = threading.Event()
+        cancels.append(cancel)
+        _executor.submit(pump, index, call, cancel)
+
+    launch(attempts.first(candidates))
+    winner = None
+    try:
+        while winner is None:
+            try:
+                index, kind, value = events.get(timeout=attempts.timeout())
+            except queue.Empty:
+                if attempts.expired():
+                    raise attempts.timed_out()
+                attempts.log_hedge()
+                launched = attempts.next()
+                if launched is not None:
+                    launch(launched)
+                continue
+            if kind == "error":
+                attempts.failed(index, value)
+                if not attempts.running:
+                    launched = attempts.next()
+                    if launched is None:
+                        raise attempts.error
+                    launch(launched)
+                continue
+            winner = index
+            for i, cancel in enumerate(cancels):
+                if i != winner:
+                    cancel.set()
+            attempts.won(winner)
+            if kind == "done":
+                return
+            yield value
+
+        while True:
+            index, kind, value = events.get()
+            if index != winner:
+                continue
+            if kind == "done":
+                return
+            if kind == "error":
+                raise value
+            yield value
+    finally:
+        # Also reached when the consumer stops early, e.g. on barge-in
+        for cancel in cancels:
+            cancel.set()
+
+
+async def hedged_call_async(stage, candidates, policy):
+    """
+    Asyncio counterpart of hedged_call; losing calls are cancelled outright.
+
+    Args:
+        stage (str): Stage name, for health tracking and logs.
+        candidates (list): (model, coroutine function) pairs in order of preference.
+        policy (HedgePolicy): When to hedge and when to give up.
+
+    Returns:
+        The first successful result.
+    """
+    attempts = _Attempts(stage, candidates, policy)
+    tasks = {}
+
+    async def run(index, call):
+        start = time.monotonic()
+        try:
+            result = await call()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            attempts.record_failure(index)
+            raise
+        attempts.record_success(index, time.monotonic() - start)
+        return result
+
+    def launch(launched):
+        index, _, call = launched
+        tasks[asyncio.create_task(run(index, call))] = index
+
+    launch(attempts.first(candidates))
+    try:
+        while tasks:
+            done, _ = await asyncio.wait(tasks, timeout=attempts.timeout(), return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                index = tasks.pop(task)
+                if task.exception() is None:
+                    attempts.won(index)
+                    return task.result()
+                attempts.failed(index, task.exception())
+            if attempts.expired():
+                raise attempts.timed_out()
+            if attempts.waiting and (not done or not tasks):
+                if not done:
+                    attempts.log_hedge()
+                launched = attempts.next()
+                if launched is not None:
+                    launch(launched)
+    finally:
+        for task in tasks:
+            task.cancel()
+    raise attempts.error
+
+
+async def hedged_stream_async(stage, candidates, policy):
+    """
+    Asyncio counterpart of hedged_stream; losing streams are cancelled outright.
+
+    Args:
+        stage (str): Stage name, for health tracking and logs.
+        candidates (list): (model, callable returning an async iterator) pairs in order of preference.
+        policy (HedgePolicy): When to hedge; `timeout` bounds the wait for the first token.
+
+    Yields:
+        The winning stream's items.
+    """
+    attempts = _Attempts(stage, candidates, policy)
+    events = asyncio.Queue()
+    tasks = []
+
+    async def pump(index, call):
+        start = time.monotonic()
+        first = True
+        try:
+            async for item in call():
+                if first:
+                    attempts.record_success(index, time.monotonic() - start)
+                    first = False
+                await events.put((index, "item", item))
+            await events.put((index, "done", None))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            attempts.record_failure(index)
+            await events.put((index, "error", e))
+
+    def launch(launched):
+        index, _, call = launched
+        tasks.append(asyncio.create_task(pump(index, call)))
+
+    launch(attempts.first(candidates))
+    winner = None
+    try:
+        while winner is None:
+            try:
+                index, kind, value = await asyncio.wait_for(events.get(), attempts.timeout())
+            except asyncio.TimeoutError:
+                if attempts.expired():
+                    raise attempts.timed_out()
+                attempts.log_hedge()
+                launched = attempts.next()
+                if launched is not None:
+                    launch(launched)
+                continue
+            if kind == "error":
+                attempts.failed(index, value)
+                if not attempts.running:
+                    launched = attempts.next()
+                    if launched is None:
+                        raise attempts.error
+                    launch(launched)
+                continue
+            winner = index
+            for i, task in enumerate(tasks):
+                if i != winner:
+                    task.cancel()
+            attempts.won(winner)
+            if kind == "done":
+                return
+            yield value
+
+        while True:
+            index, kind, value = await events.get()
+            if index != winner:
+                continue
+            if kind == "done":
+                return
+            if kind == "error":
+                raise value
+            yield value
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def stage_policy(stage):
+    """Return the hedging policy configured for 'transcription' or 'response'."""
+    if stage == "transcription":
+        delay, timeout = Config.TRANSCRIPTION_HEDGE_DELAY, Config.TRANSCRIPTION_TIMEOUT
+    else:
+        delay, timeout = Config.RESPONSE_HEDGE_DELAY, Config.RESPONSE_TIMEOUT
+    return HedgePolicy(delay, timeout, Config.HEDGE_PERCENTILE, Config.HEDGE_MIN_SAMPLES)
+
+
+def stage_models(stage, model):
+    """
+    Return `model` followed by the configured backups that can be used.
+
+    Backups that need an API key which is not set are skipped.
+    """
+    backups = Config.TRANSCRIPTION_HEDGE_MODELS if stage == "transcription" else Config.RESPONSE_HEDGE_MODELS
+    models = [model]
+    for backup in backups:
+        if backup in models:
+            continue
+        try:
+            needs_key = backend_class(stage, backup).api_key_setting is not None
+        except ValueError as e:
+            logging.warning(f"Ignoring hedge backend: {e}")
+            continue
+        if needs_key and not get_api_key(stage, backup):
+            logging.debug(f"Not hedging with {backup}: no API key")
+            continue
+        models.append(backup)
+    return models
+
+
+def hedged_transcribe(model, audio, local_model_path=None):
+    """
+    Transcribe with `model`, hedging with Config.TRANSCRIPTION_HEDGE_MODELS.
+
+    Args:
+        model (str): The primary transcription model.
+        audio (str | bytes): The path to an audio file, or an in-memory WAV file.
+        local_model_path (str): The path to the local model (if applicable).
+
+    Returns:
+        str: The transcribed text.
+    """
+    candidates = [
+        (m, lambda m=m: transcribe_audio(m, get_api_key("transcription", m), audio, local_model_path))
+        for m in stage_models("transcription", model)
+    ]
+    return hedged_call("transcription", candidates, stage_policy("transcription"))
+
+
+def hedged_response_stream(model, chat_history, local_model_path=None):
+    """
+    Stream a reply from `model`, hedging with Config.RESPONSE_HEDGE_MODELS on time to first token.
+
+    Args:
+        model (str): The primary response model.
+        chat_history (list): The chat history as a list of messages.
+        local_model_path (str): The path to the local model (if applicable).
+
+    Yields:
+        str: The next piece of the generated response.
+    """
+    candidates = [
+        (m, lambda m=m: generate_response_stream(m, get_api_key("response", m), chat_history, local_model_path))
+        for m in stage_models("response", model)
+    ]
+    yield from hedged_stream("response", candidates, stage_policy("response"))
+
+
+async def hedged_transcribe_async(model, audio, local_model_path=None):
+    """Asyncio counterpart of hedged_transcribe."""
+    candidates = [
+        (m, lambda m=m: transcribe_audio_async(m, get_api_key("transcription", m), audio, local_model_path))
+        for m in stage_models("transcription", model)
+    ]
+    return await hedged_call_async("transcription", candidates, stage_policy("transcription"))
+
+
+async def hedged_response_stream_async(model, chat_history):
+    """Asyncio counterpart of hedged_response_stream."""
+    candidates = [
+        (m, lambda m=m: generate_response_stream_async(m, get_api_key("response", m), chat_history))
+        for m in stage_models("response", model)
+    ]
+    async for token in hedged_stream_async("response", candidates, stage_policy("response")):
+        yield token
@@ -0,0 +1,342 @@
+# voice_assistant/loadgen.py
+
+import argparse
+import asyncio
+import glob
+import json
+import logging
+import os
+import random
+import resource
+import sys
+import time
+import uuid
+
+from voice_assistant.benchmark import (DEFAULT_SAMPLES, MOCKED_MODELS, NullSink, ReplaySource, StandInTTS,
+                                       load_clip, use_mock_providers)
+from voice_assistant.clients import get_async_client
+from voice_assistant.config import Config
+from voice_assistant.memory import create_memory
+from voice_assistant.mock_providers import Latency, MockProviderServer
+from voice_assistant.pipeline import VoicePipeline
+from voice_assistant.tracing import FIRST_AUDIO, TOTAL, Histogram, Tracer
+
+DEFAULT_TEXTS = [
+    "Hello! How can I help you today?",
+    "The next bus leaves in about five minutes from the stop on your left.",
+    "It looks sunny and warm today, perfect for a short walk.",
+    "Sorry, I did not catch that. Could you say it again?",
+]
+
+
+def process_usage(pid=None):
+    """
+    Return the CPU time and resident memory of a process.
+
+    Uses /proc on Linux; elsewhere only the current process can be measured, and its
+    peak rather than current RSS is reported.
+
+    Args:
+        pid (int): The process to measure (None for this one).
+
+    Returns:
+        tuple: (cpu_seconds, rss_bytes).
+    """
+    proc = f"/proc/{pid or 'self'}"
+    if os.path.exists(proc):
+        with open(f"{proc}/stat") as f:
+            # The command name may contain spaces; fields after it are space separated
+            fields = f.read().rsplit(")", 1)[1].split()
+        with open(f"{proc}/statm") as f:
+            resident_pages = int(f.read().split()[1])
+        cpu = (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+        return cpu, resident_pages * os.sysconf("SC_PAGE_SIZE")
+    if pid is not None:
+        raise RuntimeError(f"Cannot measure process {pid} without /proc")
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    rss = usage.ru_maxrss if sys.platform == "darwin" else usage.ru_maxrss * 1024
+    return usage.ru_utime + usage.ru_stime, rss
+
+
+def think_time(mean):
+    """Return a pause (in seconds) drawn from an exponential distribution with the given mean."""
+    return random.expovariate(1 / mean) if mean > 0 else 0.0
+
+
+class LoadLevel:
+    """Measures one load level: request latencies, outcomes and the resources used."""
+
+    def __init__(self, users, pid=None):
+        """
+        Args:
+            users (int): Number of simulated users.
+            pid (int): Process whose CPU and memory are sampled (None for this one).
+        """
+        self.users = users
+        self.pid = pid
+        self.latency = Histogram(window=100000)
+        self.completed = 0
+        self.errors = 0
+        self._start = None
+        self._usage = None
+
+    def start(self):
+        self._start = time.perf_counter()
+        self._usage = process_usage(self.pid)
+
+    def finish(self):
+        """
+        Return the results of the level.
+
+        Returns:
+            dict: users, wall time, completed and failed requests, throughput (per
+            second), latency percentiles, and CPU (cores) and RSS growth (MB) per user.
+        """
+        wall = time.perf_counter() - self._start
+        cpu, rss = process_usage(self.pid)
+        summary = self.latency.snapshot()
+        return {
+            "users": self.users,
+            "wall": round(wall, 2),
+            "completed": self.completed,
+            "errors": self.errors,
+            "throughput": round(self.completed / wall, 3) if wall else 0.0,
+            "p50": summary["p50"],
+            "p95": summary["p95"],
+            "p99": summary["p99"],
+            "cpu_per_user": round((cpu - self._usage[0]) / wall / self.users, 4),
+            "rss_per_user_mb": round((rss - self._usage[1]) / self.users / 2 ** 20, 2),
+            "rss_mb": round(rss / 2 ** 20, 1),
+        }
+
+
+async def _pipeline_user(level, tracer, clips, server, deadline, think, speed):
+    source = ReplaySource(clips, Config.CAPTURE_SAMPLE_RATE, Config.CAPTURE_FRAME_MS, speed,
+                          first_clip=random.randrange(len(clips)))
+    tts = StandInTTS(server.url)
+    sink = NullSink(tts.sample_rate)
+    pipeline = VoicePipeline(source, sink, tts, create_memory(), barge_in=False, tracer=tracer)
+    # Stagger the users so they do not all start talking at once
+    await asyncio.sleep(random.uniform(0, think))
+    while time.perf_counter() < deadline:
+        try:
+            if await pipeline.run_turn():
+                level.completed += 1
+            else:
+                level.errors += 1
+        except Exception as e:
+            logging.debug(f"Simulated session failed: {e}")
+            level.errors += 1
+        await asyncio.sleep(think_time(think))
+
+
+async def run_pipeline_level(users, duration, clips, server, think=3.0, speed=1.0, metric=FIRST_AUDIO):
+    """
+    Run `users` concurrent conversations through the asyncio pipeline for `duration` seconds.
+
+    Every session has its own pipeline, memory, source and sink, as in server mode, and
+    they share this process's provider clients. Latency is the `metric` stage of each
+    completed turn; resources are those of this process, mock providers included.
+
+    Args:
+        users (int): Number of simulated users.
+        duration (float): Seconds during which new turns are started.
+        clips (list): int16 PCM clips to replay.
+        server (MockProviderServer): A running mock server (see benchmark.use_mock_providers).
+        think (float): Mean pause between turns (in seconds).
+        speed (float): Replay speed of the clips (1.0 is someone talking).
+        metric (str): The traced stage reported as the latency.
+
+    Returns:
+        dict: See LoadLevel.finish.
+    """
+    level = LoadLevel(users)
+    tracer = Tracer()
+    level.start()
+    deadline = time.perf_counter() + duration
+    await asyncio.gather(*(
+        _pipeline_user(level, tracer, clips, server, deadline, think, speed) for _ in range(users)))
+    # The percentiles of the stage rather than of whole turns, which include the user talking
+    level.latency = tracer.histograms[metric]
+    result = level.finish()
+    result["metric"] = metric
+    result["stages"] = {stage: tracer.histograms[stage].snapshot() for stage in (FIRST_AUDIO, TOTAL)}
+    return result
+
+
+async def _tts_request(client, url, text, stream):
+    if not stream:
+        response = await client.post(url, json={"text": text, "filename": f"loadtest-{uuid.uuid4()}.wav"})
+        response.raise_for_status()
+        return
+    # Drain the audio as the assistant would play it; nothing is written on the server
+    async with client.stream("POST", url, json={"text": text}) as response:
+        response.raise_for_status()
+        async for _ in response.aiter_bytes():
+            pass
+
+
+async def _tts_user(level, url, texts, deadline, think, stream):
+    client = get_async_client("httpx")
+    await asyncio.sleep(random.uniform(0, think))
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            await _tts_request(client, url, random.choice(texts), stream)
+            level.latency.observe(time.perf_counter() - start)
+            level.completed += 1
+        except Exception as e:
+            logging.debug(f"TTS request failed: {e}")
+            level.errors += 1
+        await asyncio.sleep(think_time(think))
+
+
+async def run_tts_level(users, duration, url, texts=None, think=1.0, pid=None, stream=True):
+    """
+    Send requests from `users` concurrent clients to the MeloTTS service for `duration` seconds.
+
+    Latency is measured until the whole response has been received.
+
+    Args:
+        users (int): Number of simulated clients.
+        duration (float): Seconds during which new requests are sent.
+        url (str): The service's /stream-audio/ endpoint, or /generate-audio/ without `stream`.
+        texts (list): Texts picked at random for each request.
+        think (float): Mean pause between a client's requests (in seconds).
+        pid (int): Process id of the service, to report its CPU and memory.
+        stream (bool): Whether to stream the audio, as the assistant does. Otherwise every
+            request has the server write a WAV file, which is left in its working directory.
+
+    Returns:
+        dict: See LoadLevel.finish.
+    """
+    level = LoadLevel(users, pid)
+    level.start()
+    deadline = time.perf_counter() + duration
+    await asyncio.gather(*(_tts_user(level, url, texts or DEFAULT_TEXTS, deadline, think, stream) for _ in range(users)))
+    return level.finish()
+
+
+def find_saturation(levels, slo, min_gain=0.1):
+    """
+    Return the index of the first saturated level, or None.
+
+    A level is saturated when its p95 latency exceeds `slo`, when requests fail, or when
+    it adds users but throughput grows less than `min_gain` of the proportional increase.
+    """
+    for i, level in enumerate(levels):
+        if level["p95"] is None or level["p95"] > slo or level["errors"] > level["completed"] * 0.01:
+            return i
+        if i:
+            previous = levels[i - 1]
+            expected = previous["throughput"] * (level["users"] / previous["users"] - 1)
+            if expected > 0 and level["throughput"] - previous["throughput"] < min_gain * expected:
+                return i
+    return None
+
+
+def format_report(levels, saturation, slo):
+    """Render the load levels as a plain-text table followed by the saturation verdict."""
+    lines = [f"  {'users':>5}{'done':>7}{'errors':>7}{'req/s':>8}{'p50':>8}{'p95':>8}{'p99':>8}"
+             f"{'cpu/user':>10}{'MB/user':>9}"]
+    for level in levels:
+        p50, p95, p99 = (f"{level[q]:.3f}" if level[q] is not None else "-" for q in ("p50", "p95", "p99"))
+        lines.append(f"  {level['users']:>5}{level['completed']:>7}{level['errors']:>7}{level['throughput']:>8.2f}"
+                     f"{p50:>8}{p95:>8}{p99:>8}{level['cpu_per_user']:>10.3f}{level['rss_per_user_mb']:>9.1f}")
+    if saturation is None:
+        lines.append(f"No saturation up to {levels[-1]['users']} users (p95 SLO {slo:.2f}s)")
+    elif saturation == 0:
+        lines.append(f"Saturated already at {levels[0]['users']} users (p95 SLO {slo:.2f}s)")
+    else:
+        lines.append(f"Saturates at {levels[saturation]['users']} users; "
+                     f"{levels[saturation - 1]['users']} sustainable (p95 SLO {slo:.2f}s)")
+    return "\n".join(lines)
+
+
+async def _ramp(run_level, user_counts, stop_at_saturation, slo):
+    levels = []
+    for users in user_counts:
+        level = await run_level(users)
+        levels.append(level)
+        logging.warning(f"{users} users: {level['throughput']:.2f} req/s, p95 {level['p95']}")
+        if stop_at_saturation and find_saturation(levels, slo) is not None:
+            break
+    return levels
+
+
+def main(argv=None):
+    """
+    Ramp up simulated users against the pipeline or the MeloTTS service and find where it saturates.
+
+    Usage:
+        python -m voice_assistant.loadgen pipeline --users 1,2,4,8,16 --duration 60
+        python -m voice_assistant.loadgen tts --users 1,2,4 --server-pid 12345 --json load.jsonl
+    """
+    parser = argparse.ArgumentParser(description="Load generator for the voice pipeline and the MeloTTS service.")
+    parser.add_argument("target", choices=("pipeline", "tts"))
+    parser.add_argument("--users", default="1,2,4,8,16", help="Comma-separated user counts to ramp through")
+    parser.add_argument("--duration", type=float, default=60.0, help="Seconds per load level")
+    parser.add_argument("--think", type=float, default=None,
+                        help="Mean think time between a user's requests (default: 3s pipeline, 1s tts)")
+    parser.add_argument("--slo", type=float, default=None,
+                        help="p95 latency limit in seconds (default: 1.5 pipeline first audio, 2.0 tts)")
+    parser.add_argument("--keep-going", action="store_true", help="Run every level even after saturation")
+    parser.add_argument("--json", metavar="PATH", help="Append the results as one JSON line")
+    pipeline = parser.add_argument_group("pipeline target")
+    pipeline.add_argument("--samples", default=DEFAULT_SAMPLES, help="Glob of audio clips to replay")
+    pipeline.add_argument("--speed", type=float, default=1.0, help="Replay speed of the clips (1 is real time)")
+    pipeline.add_argument("--transcription-model", default="groq", choices=MOCKED_MODELS["transcription"])
+    pipeline.add_argument("--response-model", default="groq", choices=MOCKED_MODELS["response"])
+    pipeline.add_argument("--stt-latency", type=Latency.parse, default=Latency(0.25, 0.05), metavar="BASE[:JITTER]")
+    pipeline.add_argument("--llm-first-token", type=Latency.parse, default=Latency(0.3, 0.08), metavar="BASE[:JITTER]")
+    pipeline.add_argument("--tts-first-byte", type=Latency.parse, default=Latency(0.15, 0.04), metavar="BASE[:JITTER]")
+    tts = parser.add_argument_group("tts target")
+    tts.add_argument("--url", help=f"MeloTTS endpoint (default: http://localhost:{Config.TTS_PORT_LOCAL}"
+                                   "/stream-audio/, or /generate-audio/ with --files)")
+    tts.add_argument("--files", action="store_true",
+                     help="Have the server write a WAV file per request instead of streaming the audio "
+                          "(the files are left in its working directory)")
+    tts.add_argument("--server-pid", type=int, help="Process id of the service, to report its CPU and memory")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s - %(levelname)s - %(message)s")
+    user_counts = [int(n) for n in args.users.split(",")]
+
+    if args.target == "pipeline":
+        think = 3.0 if args.think is None else args.think
+        slo = 1.5 if args.slo is None else args.slo
+        paths = sorted(glob.glob(args.samples))
+        if not paths:
+            parser.error(f"no clips match {args.samples}")
+        clips = [load_clip(path, Config.CAPTURE_SAMPLE_RATE) for path in paths]
+        server = MockProviderServer(
+            stt_latency=args.stt_latency,
+            llm_first_token=args.llm_first_token,
+            tts_first_byte=args.tts_first_byte
+        )
+        with server:
+            use_mock_providers(server, args.transcription_model, args.response_model)
+            levels = asyncio.run(_ramp(
+                lambda users: run_pipeline_level(users, args.duration, clips, server, think, args.speed),
+                user_counts, not args.keep_going, slo))
+    else:
+        think = 1.0 if args.think is None else args.think
+        slo = 2.0 if args.slo is None else args.slo
+        endpoint = "generate-audio" if args.files else "stream-audio"
+        url = args.url or f"http://localhost:{Config.TTS_PORT_LOCAL}/{endpoint}/"
+        levels = asyncio.run(_ramp(
+            lambda users: run_tts_level(users, args.duration, url, think=think, pid=args.server_pid,
+                                        stream=not args.files),
+            user_counts, not args.keep_going, slo))
+
+    saturation = find_saturation(levels, slo)
+    print(format_report(levels, saturation, slo))
+    if args.json:
+        entry = {"timestamp": time.time(), "target": args.target, "slo": slo, "levels": levels,
+                 "saturated_at": levels[saturation]["users"] if saturation is not None else None}
+        with open(args.json, "a") as f:
+            f.write(json.dumps(entry) + "\n")
+
+
+if __name__ == "__main__":
+    main()
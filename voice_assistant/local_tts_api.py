@@ -1,16 +1,25 @@
+import asyncio
+import gc
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
-from melo.api import TTS
 from config import Config
-import torch
-import uuid
 
 app = FastAPI()
 
 class TextToSpeechRequest(BaseModel):
     """
     Model representing a text-to-speech request.
-    
+
     Attributes:
         text (str): The text to convert to speech.
         language (str): The language of the text.
@@ -27,10 +36,11 @@ class TextToSpeechRequest(BaseModel):
 def get_device():
     """
     Determine the appropriate device for running the TTS model.
-    
+
     Returns:
         str: The device to use ('cuda', 'mps', or 'cpu').
     """
+    import torch
     if torch.cuda.is_available():
         return 'cuda'
     elif torch.backends.mps.is_available():
@@ -38,40 +48,689 @@ def get_device():
     else:
         return 'cpu'
 
-# Initialize the TTS model
-device = get_device()  # Determine the appropriate device
-model = TTS(language='EN', device=device)
-speaker_ids = model.hps.data.spk2id
+
+class PoolOverloaded(Exception):
+    """Raised when a request is shed: the queue is full, or it waited too long."""
+
+
+class InvalidRequest(ValueError):
+    """Raised when a request names a language or accent the server does not host."""
+
+
+# Spoken once by every model after it loads, so its first request does not pay for lazy set-up
+WARMUP_TEXT = {
+    "EN": "Hello there.",
+    "ES": "Hola.",
+    "FR": "Bonjour.",
+    "ZH": "你好。",
+    "JP": "こんにちは。",
+    "KR": "안녕하세요.",
+}
+
+
+class ModelRegistry:
+    """
+    The MeloTTS models of one replica, loaded on first use and evicted least recently used.
+
+    Models are keyed by the request's language. After loading, each model synthesizes a
+    short phrase, so its first real request does not also load the language's text
+    front-end. Before a model is loaded, and again once its size is known, the least
+    recently used models are dropped until the total fits `memory_budget_mb`; the model
+    being used is never dropped, so a single model larger than the budget still loads.
+    """
+
+    def __init__(self, specs, device, memory_budget_mb=None, on_load=None, on_evict=None):
+        """
+        Args:
+            specs (dict): Language -> options for melo.api.TTS ('language', 'config_path',
+                'ckpt_path') plus an optional 'warmup' phrase.
+            device (str): Device the models run on.
+            memory_budget_mb (float): Memory the loaded models may use, or None for no limit.
+            on_load (Callable): Called with (language, info) after a model is loaded.
+            on_evict (Callable): Called with the language of each evicted model.
+        """
+        self.specs = specs
+        self.device = device
+        self.memory_budget_mb = memory_budget_mb
+        self.on_load = on_load
+        self.on_evict = on_evict
+        self._models = OrderedDict()  # language -> (model, speaker_ids, memory_mb)
+        self._sizes = {}  # language -> memory_mb of the last load, to evict before reloading
+
+    def get(self, language):
+        """
+        Return the model for a language, loading it if needed.
+
+        Returns:
+            tuple: (model, speaker_ids).
+
+        Raises:
+            InvalidRequest: If the language is not configured.
+        """
+        entry = self._models.get(language)
+        if entry is not None:
+            self._models.move_to_end(language)
+            return entry[0], entry[1]
+        if language not in self.specs:
+            raise InvalidRequest(f"Unsupported language: {language}")
+        known = list(self._sizes.values())
+        self._evict(self._sizes.get(language, sum(known) / len(known) if known else 0))
+        model, speaker_ids, memory_mb = self._load(language)
+        self._models[language] = (model, speaker_ids, memory_mb)
+        self._sizes[language] = memory_mb
+        self._evict(0)
+        return model, speaker_ids
+
+    def _load(self, language):
+        from melo.api import TTS
+
+        options = dict(self.specs[language])
+        warmup = options.pop("warmup", WARMUP_TEXT.get(language))
+        options.setdefault("language", language)
+        started = time.perf_counter()
+        model = TTS(device=self.device, **options)
+        speaker_ids = {accent: speaker_id for accent, speaker_id in model.hps.data.spk2id.items()}
+        if warmup:
+            model.tts_to_file(warmup, next(iter(speaker_ids.values())), None, quiet=True)
+        memory_mb = sum(
+            t.numel() * t.element_size() for t in list(model.parameters()) + list(model.buffers())
+        ) / (1024 * 1024)
+        logging.info(f"MeloTTS {language} model loaded and warmed up in "
+                     f"{time.perf_counter() - started:.1f} seconds ({memory_mb:.0f} MB)")
+        if self.on_load is not None:
+            self.on_load(language, {
+                "speaker_ids": speaker_ids,
+                "sample_rate": model.hps.data.sampling_rate,
+                "memory_mb": memory_mb,
+            })
+        return model, speaker_ids, memory_mb
+
+    @property
+    def memory_mb(self):
+        """Memory used by the loaded models."""
+        return sum(memory_mb for _, _, memory_mb in self._models.values())
+
+    def _evict(self, needed_mb):
+        if self.memory_budget_mb is None:
+            return
+        # After a load (needed_mb == 0) keep the newest model: it is about to serve a request
+        keep = 0 if needed_mb else 1
+        while len(self._models) > keep and self.memory_mb + needed_mb > self.memory_budget_mb:
+            self._drop(next(iter(self._models)))
+
+    def _drop(self, language):
+        import torch
+
+        del self._models[language]
+        gc.collect()
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+        logging.info(f"MeloTTS {language} model evicted")
+        if self.on_evict is not None:
+            self.on_evict(language)
+
+
+def split_cores(replicas):
+    """
+    Divide the CPU cores this process may run on into one set per replica.
+
+    Returns:
+        list: A list of core ids for each replica (sets overlap only if there are more
+        replicas than cores).
+    """
+    if hasattr(os, "sched_getaffinity"):
+        cores = sorted(os.sched_getaffinity(0))
+    else:
+        cores = list(range(os.cpu_count() or 1))
+    per_replica = max(1, len(cores) // replicas)
+    return [[cores[(i * per_replica + j) % len(cores)] for j in range(per_replica)] for i in range(replicas)]
+
+
+def _replica_main(index, cores, pin_cores, models, preload, memory_budget_mb, tasks, cancels, results):
+    """
+    Worker process: host MeloTTS models and synthesize the batches sent to it.
+
+    Args:
+        index (int): The replica's number.
+        cores (list): CPU cores reserved for the replica.
+        pin_cores (bool): Whether to restrict the process to `cores`.
+        models (dict): Language -> model options (see ModelRegistry).
+        preload (list): Languages loaded before the replica reports ready.
+        memory_budget_mb (float): Memory the replica's models may use, or None for no limit.
+        tasks (multiprocessing.Queue): Batches of (job_id, text, language, accent, speed, filename);
+            None stops. Jobs without a filename are streamed: the audio of each sentence is
+            sent as soon as it is synthesized.
+        cancels (multiprocessing.Queue): Ids of jobs whose client went away; checked before
+            each job and between the sentences of a streamed one.
+        results (multiprocessing.Queue): Receives ('loaded', index, info) and ('evicted', index,
+            language) as models come and go, ('ready', index, None) once preloaded, then for
+            each streamed job ('start', job_id, sample_rate) and ('chunk', job_id, pcm) per
+            sentence, and for every job ('done', job_id, filename), ('invalid', job_id,
+            message) or ('error', job_id, message).
+    """
+    import numpy as np
+    import torch
+
+    if pin_cores and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cores)
+    # One intra-op thread per reserved core, so replicas do not compete for the same cores
+    torch.set_num_threads(len(cores))
+    registry = ModelRegistry(
+        models, get_device(), memory_budget_mb,
+        on_load=lambda language, info: results.put(("loaded", index, dict(info, language=language))),
+        on_evict=lambda language: results.put(("evicted", index, language))
+    )
+    for language in preload:
+        registry.get(language)
+    results.put(("ready", index, None))
+
+    cancelled = set()
+
+    def is_cancelled(job_id):
+        while True:
+            try:
+                cancelled.add(cancels.get_nowait())
+            except queue.Empty:
+                return job_id in cancelled
+
+    while True:
+        batch = tasks.get()
+        if batch is None:
+            return
+        # Cancels that arrived after their job finished are no longer needed
+        is_cancelled(None)
+        cancelled.intersection_update(job[0] for job in batch)
+        # MeloTTS has no batched inference API: the batch saves round trips, not model passes
+        for job_id, text, language, accent, speed, filename in batch:
+            try:
+                if is_cancelled(job_id):
+                    results.put(("done", job_id, None))
+                    continue
+                model, speaker_ids = registry.get(language)
+                if accent not in speaker_ids:
+                    raise InvalidRequest(f"Invalid accent for {language}: {accent}")
+                if filename:
+                    model.tts_to_file(text, speaker_ids[accent], filename, speed=speed)
+                else:
+                    results.put(("start", job_id, model.hps.data.sampling_rate))
+                    for sentence in model.split_sentences_into_pieces(text, model.language, quiet=True):
+                        if is_cancelled(job_id):
+                            break
+                        audio = model.tts_to_file(sentence, speaker_ids[accent], None, speed=speed, quiet=True)
+                        pcm = (np.clip(audio, -1.0, 1.0) * 32767).astype(np.int16).tobytes()
+                        results.put(("chunk", job_id, pcm))
+                results.put(("done", job_id, filename))
+            except InvalidRequest as e:
+                results.put(("invalid", job_id, str(e)))
+            except Exception as e:
+                results.put(("error", job_id, str(e)))
+
+
+class _Job:
+    """One request, from the queue until its replica reports it finished."""
+
+    def __init__(self, future, text, language, accent, speed, filename, chunks=None):
+        self.id = uuid.uuid4().hex
+        self.enqueued = time.monotonic()
+        self.future = future  # what the caller waits on; cancelled if the caller goes away
+        self.text = text
+        self.language = language
+        self.accent = accent
+        self.speed = speed
+        self.filename = filename
+        self.chunks = chunks  # ('start' | 'chunk' | 'end' | 'error', value) items of a streamed job
+        self.replica = None
+        self.finished = None  # resolved when the replica is done with the job, even if abandoned
+
+    def message(self):
+        return (self.id, self.text, self.language, self.accent, self.speed, self.filename)
+
+
+class ReplicaPool:
+    """
+    MeloTTS model replicas in worker processes, fed from one shared queue.
+
+    Requests wait in a bounded queue. Each replica has a dispatcher task that takes the
+    oldest request only once the replica is idle, so every request goes to a replica
+    with nothing else to do (the least loaded) and never waits behind another request
+    inside a busy one. MeloTTS has no batched inference, so by default requests are sent
+    one at a time. With `batching`, a dispatcher waits up to `max_wait` for more requests
+    (up to `max_batch_size`) and sends them together, which only pays off for a model
+    that synthesizes a batch in one pass. When the queue is full new requests are rejected, and requests that waited longer
+    than `queue_timeout` are dropped instead of being synthesized for a client that has
+    likely given up. A replica process that dies fails its batch and is restarted.
+
+    Each replica hosts the language models in `models` through a ModelRegistry. At most
+    `model_concurrency` replicas work on one language at a time, so a burst in one
+    language cannot take every replica, nor make every replica load its model.
+    """
+
+    def __init__(self, replicas=1, max_batch_size=1, max_wait=0.01, queue_size=64, queue_timeout=30.0,
+                 pin_cores=True, models=None, preload=None, memory_budget_mb=None, model_concurrency=None,
+                 batching=False):
+        """
+        Args:
+            replicas (int): Number of model replicas (processes).
+            max_batch_size (int): Most requests sent to a replica at once (with `batching`).
+            max_wait (float): Longest wait (in seconds) for a batch to fill once it has one request.
+            queue_size (int): Requests that may wait before new ones are rejected.
+            queue_timeout (float): Seconds a request may wait before it is dropped.
+            pin_cores (bool): Whether to pin each replica to its own share of the cores.
+            models (dict): Language -> model options (see ModelRegistry); English only by default.
+            preload (list): Languages each replica loads at start-up (the rest load on first use).
+            memory_budget_mb (float): Memory each replica's models may use, or None for no limit.
+            model_concurrency (int): Replicas that may work on one language at once, or None
+                for no limit.
+            batching (bool): Whether to group requests into batches of `max_batch_size`.
+        """
+        self.replicas = replicas
+        self.max_batch_size = max_batch_size if batching else 1
+        self.max_wait = max_wait
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.pin_cores = pin_cores
+        self.models = models or {"EN": {}}
+        self.preload = list(self.models)[:1] if preload is None else preload
+        self.memory_budget_mb = memory_budget_mb
+        self.model_concurrency = model_concurrency
+        self.model_info = {}  # language -> {'speaker_ids', 'sample_rate', 'memory_mb'}, once loaded
+        self.shed = 0
+        self._cores = split_cores(replicas)
+        self._context = multiprocessing.get_context("spawn")
+        self._processes = [None] * replicas
+        self._tasks = [None] * replicas
+        self._cancels = [None] * replicas
+        self._results = [None] * replicas
+        self._ready = {}
+        self._loaded = [set() for _ in range(replicas)]
+        self._model_slots = {}  # language -> asyncio.Semaphore
+        self._pending = {}  # job id -> _Job, while a replica works on it
+        self._queue = None
+        self._loop = None
+        self._dispatchers = []
+
+    async def start(self):
+        """Start the replicas, wait until their models are loaded and start dispatching."""
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(self.queue_size)
+        await asyncio.gather(*(self._start_replica(index) for index in range(self.replicas)))
+        self._dispatchers = [asyncio.create_task(self._dispatch(index)) for index in range(self.replicas)]
+        logging.info(f"MeloTTS pool ready: {self.replicas} replicas, up to {self.max_batch_size} requests at once")
+
+    async def _start_replica(self, index):
+        self._ready[index] = self._loop.create_future()
+        self._tasks[index] = self._context.Queue()
+        self._cancels[index] = self._context.Queue()
+        # A fresh queue per (re)start: a replica killed in the middle of a put can leave
+        # its queue locked for every other writer
+        self._results[index] = self._context.Queue()
+        threading.Thread(
+            target=self._collect, args=(index, self._results[index]), name=f"melotts-results-{index}", daemon=True
+        ).start()
+        process = self._context.Process(
+            target=_replica_main,
+            args=(index, self._cores[index], self.pin_cores, self.models, self.preload, self.memory_budget_mb,
+                  self._tasks[index], self._cancels[index], self._results[index]),
+            name=f"melotts-{index}",
+            daemon=True
+        )
+        process.start()
+        self._processes[index] = process
+        self._loaded[index] = set()
+        ready = self._ready[index]
+        while not ready.done():
+            await asyncio.wait({ready}, timeout=1.0)
+            if not ready.done() and not process.is_alive():
+                raise RuntimeError(f"MeloTTS replica {index} exited while loading the model")
+        logging.info(f"MeloTTS replica {index} ready on cores {self._cores[index]}")
+
+    def _collect(self, index, results):
+        # A replica's results arrive on this thread; futures are resolved on the loop.
+        # Once the replica has been restarted with a new queue, the thread exits
+        while True:
+            try:
+                message = results.get(timeout=1.0)
+            except queue.Empty:
+                if self._results[index] is not results:
+                    return
+                continue
+            if message is None:
+                return
+            self._loop.call_soon_threadsafe(self._resolve, *message)
+
+    def _resolve(self, kind, key, value):
+        if kind == "ready":
+            future = self._ready.get(key)
+            if future is not None and not future.done():
+                future.set_result(value)
+            return
+        if kind == "loaded":
+            info = dict(value)
+            self._loaded[key].add(info.pop("language"))
+            self.model_info[value["language"]] = info
+            return
+        if kind == "evicted":
+            self._loaded[key].discard(value)
+            return
+        if kind in ("start", "chunk"):
+            job = self._pending.get(key)
+            if job is not None and not job.future.done():
+                job.chunks.put_nowait((kind, value))
+            return
+        job = self._pending.pop(key, None)
+        if job is None:
+            return
+        job.finished.set_result(None)
+        if not job.future.done():
+            errors = {"error": RuntimeError, "invalid": InvalidRequest}
+            self._finish(job, errors[kind](value) if kind in errors else None, value)
+
+    @staticmethod
+    def _finish(job, error=None, result=None):
+        # A streamed job's future only tracks completion; its outcome goes through the chunk queue
+        if job.chunks is not None:
+            job.chunks.put_nowait(("error", error) if error is not None else ("end", None))
+            job.future.set_result(None)
+        elif error is not None:
+            job.future.set_exception(error)
+        else:
+            job.future.set_result(result)
+
+    def _cancel(self, job):
+        """Give up on a job whose caller went away, telling its replica to skip the rest."""
+        if job.future.done():
+            return
+        job.future.cancel()
+        if job.replica is not None:
+            self._cancels[job.replica].put(job.id)
+
+    def check(self, language, accent):
+        """
+        Reject a request the replicas would fail: an unknown language, or an accent the
+        language's model (if it has been loaded already) does not have.
+
+        Raises:
+            InvalidRequest: If the request is invalid.
+        """
+        if language not in self.models:
+            raise InvalidRequest(f"Unsupported language: {language}")
+        info = self.model_info.get(language)
+        if info is not None and accent not in info["speaker_ids"]:
+            raise InvalidRequest(f"Invalid accent for {language}: {accent}")
+
+    def _enqueue(self, text, language, accent, speed, filename, chunks=None):
+        self.check(language, accent)
+        job = _Job(self._loop.create_future(), text, language, accent, speed, filename, chunks)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            self.shed += 1
+            raise PoolOverloaded("TTS queue is full")
+        return job
+
+    async def submit(self, text, language, accent, speed, filename):
+        """
+        Queue a request and wait for its audio file.
+
+        Returns:
+            str: The path of the generated file.
+
+        Raises:
+            InvalidRequest: If the language or accent is not hosted.
+            PoolOverloaded: If the queue is full or the request waited too long.
+            RuntimeError: If synthesis failed.
+        """
+        job = self._enqueue(text, language, accent, speed, filename)
+        try:
+            return await asyncio.shield(job.future)
+        except asyncio.CancelledError:
+            self._cancel(job)
+            raise
+
+    async def stream(self, text, language, accent, speed):
+        """
+        Queue a request whose audio is streamed sentence by sentence, and wait until a
+        replica has started on it.
+
+        Returns:
+            tuple: The sample rate, and an async iterator over int16 PCM chunks (one per
+                sentence). Closing the iterator early abandons the rest of the request.
+
+        Raises:
+            InvalidRequest: If the language or accent is not hosted.
+            PoolOverloaded: If the queue is full or the request waited too long.
+            RuntimeError: If the model could not be loaded; later failures are raised
+                while iterating.
+        """
+        job = self._enqueue(text, language, accent, speed, None, asyncio.Queue())
+        try:
+            kind, value = await job.chunks.get()
+        except asyncio.CancelledError:
+            self._cancel(job)
+            raise
+        if kind == "error":
+            raise value
+        return value, self._iterate(job)
+
+    async def _iterate(self, job):
+        try:
+            while True:
+                kind, value = await job.chunks.get()
+                if kind == "end":
+                    return
+                if kind == "error":
+                    raise value
+                yield value
+        finally:
+            # Stopped early (e.g. the client disconnected)
+            self._cancel(job)
+
+    async def _next_batch(self):
+        batch = [await self._queue.get()]
+        deadline = self._loop.time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            timeout = deadline - self._loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _dispatch(self, index):
+        while True:
+            batch = await self._next_batch()
+            now = time.monotonic()
+            jobs = []
+            for job in batch:
+                if job.future.done():
+                    # The client went away while the request was queued
+                    continue
+                if now - job.enqueued > self.queue_timeout:
+                    self.shed += 1
+                    self._finish(job, PoolOverloaded("Request waited too long in the TTS queue"))
+                    continue
+                job.replica = index
+                job.finished = self._loop.create_future()
+                self._pending[job.id] = job
+                jobs.append(job)
+            if not jobs:
+                continue
+            # Take the slots of every language in the batch, in a fixed order so that
+            # dispatchers never wait on each other in a cycle
+            slots = [self._model_slot(language) for language in sorted({job.language for job in jobs})]
+            for slot in slots:
+                await slot.acquire()
+            try:
+                self._tasks[index].put([job.message() for job in jobs])
+                await self._wait_for_batch(index, jobs)
+            finally:
+                for slot in slots:
+                    slot.release()
+
+    def _model_slot(self, language):
+        slot = self._model_slots.get(language)
+        if slot is None:
+            slot = asyncio.Semaphore(self.model_concurrency or self.replicas)
+            self._model_slots[language] = slot
+        return slot
+
+    async def _wait_for_batch(self, index, jobs):
+        # Wait for the replica itself, not the callers: an abandoned job still occupies it
+        pending = {job.finished for job in jobs}
+        while pending:
+            _, pending = await asyncio.wait(pending, timeout=1.0)
+            if pending and not self._processes[index].is_alive():
+                logging.error(f"MeloTTS replica {index} died, restarting it")
+                for job in jobs:
+                    if self._pending.pop(job.id, None) is None:
+                        continue
+                    job.finished.set_result(None)
+                    if not job.future.done():
+                        self._finish(job, RuntimeError(f"TTS replica {index} crashed"))
+                await self._start_replica(index)
+                return
+
+    def status(self):
+        """
+        Return the queue depth, in-flight requests, shed requests, live replicas and, for
+        each loaded language, the replicas holding its model.
+        """
+        models = {}
+        for index, languages in enumerate(self._loaded):
+            for language in languages:
+                models.setdefault(language, []).append(index)
+        return {
+            "queued": self._queue.qsize() if self._queue else 0,
+            "in_flight": len(self._pending),
+            "shed": self.shed,
+            "replicas_alive": sum(1 for p in self._processes if p is not None and p.is_alive()),
+            "models": {language: sorted(replicas) for language, replicas in sorted(models.items())},
+        }
+
+    async def stop(self):
+        """Stop dispatching and shut the replicas down."""
+        for task in self._dispatchers:
+            task.cancel()
+        await asyncio.gather(*self._dispatchers, return_exceptions=True)
+        for tasks in self._tasks:
+            if tasks is not None:
+                tasks.put(None)
+        for process in self._processes:
+            if process is not None:
+                await asyncio.to_thread(process.join, 5)
+        for results in self._results:
+            if results is not None:
+                results.put(None)
+
+
+pool = ReplicaPool(
+    replicas=Config.MELOTTS_REPLICAS,
+    max_batch_size=Config.MELOTTS_MAX_BATCH_SIZE,
+    batching=Config.MELOTTS_BATCHING,
+    max_wait=Config.MELOTTS_MAX_BATCH_WAIT_MS / 1000,
+    queue_size=Config.MELOTTS_QUEUE_SIZE,
+    queue_timeout=Config.MELOTTS_QUEUE_TIMEOUT,
+    pin_cores=Config.MELOTTS_PIN_CORES,
+    models=Config.MELOTTS_MODELS,
+    preload=Config.MELOTTS_PRELOAD,
+    memory_budget_mb=Config.MELOTTS_MEMORY_BUDGET_MB,
+    model_concurrency=Config.MELOTTS_MODEL_CONCURRENCY
+)
+
+
+@app.on_event("startup")
+async def start_pool():
+    await pool.start()
+
+
+@app.on_event("shutdown")
+async def stop_pool():
+    await pool.stop()
 
 
 @app.post("/generate-audio/")
-def generate_audio(request: TextToSpeechRequest):
+async def generate_audio(request: TextToSpeechRequest):
     """
     Generate an audio file from the given text.
 
+    The request is queued for the next free model replica, so concurrent requests run in
+    parallel instead of blocking each other. The language's model is loaded on first use.
+
     Args:
         request (TextToSpeechRequest): The request containing text and other parameters.
 
     Returns:
         dict: A dictionary containing a message and the file path of the generated audio.
-    
+
     Raises:
-        HTTPException: If the specified accent is invalid or if there is an error during audio generation.
+        HTTPException: If the language or accent is invalid (400), the server is overloaded
+            (503, with Retry-After) or there is an error during audio generation (500).
     """
-    if request.accent not in speaker_ids:
-        raise HTTPException(status_code=400, detail="Invalid accent specified")
-    
     try:
         # Use the provided filename or generate a unique one
-        output_filename = request.filename
-        
-        # Generate the audio file
-        model.tts_to_file(request.text, speaker_ids[request.accent], output_filename, speed=request.speed)
-        
+        output_filename = await pool.submit(
+            request.text, request.language, request.accent, request.speed, request.filename)
         return {"message": "Audio file generated successfully", "file_path": output_filename}
+    except InvalidRequest as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except PoolOverloaded as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+
+@app.post("/stream-audio/")
+async def stream_audio(request: TextToSpeechRequest):
+    """
+    Stream the speech for the given text as it is synthesized, one sentence at a time.
+
+    The body is raw 16-bit little-endian mono PCM sent with chunked transfer encoding;
+    its sample rate is in the X-Sample-Rate header. Nothing is written to disk, so the
+    client does not need to share a filesystem with the server.
+
+    Args:
+        request (TextToSpeechRequest): The request (the filename is ignored).
+
+    The response starts once a replica has loaded the model and begun synthesis; if a
+    later sentence fails, the stream is cut short.
+
+    Returns:
+        StreamingResponse: The audio stream.
+
+    Raises:
+        HTTPException: If the language or accent is invalid (400), the server is overloaded
+            (503, with Retry-After) or the model cannot be loaded (500).
+    """
+    try:
+        sample_rate, chunks = await pool.stream(request.text, request.language, request.accent, request.speed)
+    except InvalidRequest as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except PoolOverloaded as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    async def body():
+        try:
+            async for chunk in chunks:
+                yield chunk
+        finally:
+            await chunks.aclose()
+
+    headers = {"X-Sample-Rate": str(sample_rate), "X-Sample-Format": "int16"}
+    return StreamingResponse(body(), media_type="application/octet-stream", headers=headers)
+
+
+@app.get("/status")
+def status():
+    """Return the state of the replica pool (queue depth, in-flight and shed requests, loaded models)."""
+    return pool.status()
+
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=Config.TTS_PORT_LOCAL)
\ No newline at end of file
+    uvicorn.run(app, host="0.0.0.0", port=Config.TTS_PORT_LOCAL)
@@ -1,4 +1,4 @@
-import requests
+from voice_assistant.clients import get_client
 from voice_assistant.config import Config
 
 
@@ -17,7 +17,7 @@ def generate_audio_file_melotts(text, language='EN', accent='EN-US', speed=1.0,
         dict: A dictionary containing the message and the file path of the generated audio.
     """
     # Define the API endpoint
-    url = f"http://localhost:{Config.TTS_PORT_LOCAL}/generate-audio/"
+    url = f"http://{Config.MELOTTS_HOST}:{Config.TTS_PORT_LOCAL}/generate-audio/"
 
     # Define the payload
     payload = {
@@ -36,7 +36,7 @@ def generate_audio_file_melotts(text, language='EN', accent='EN-US', speed=1.0,
     }
 
     # Make the POST request
-    response = requests.post(url, json=payload, headers=headers)
+    response = get_client("requests").post(url, json=payload, headers=headers)
 
     # Check the response
     if response.status_code == 200:
@@ -44,8 +44,59 @@ def generate_audio_file_melotts(text, language='EN', accent='EN-US', speed=1.0,
     else:
         response.raise_for_status()
 
+
+def stream_audio_melotts(text, language='EN', accent='EN-US', speed=1.0):
+    """
+    Stream speech for the given text from the FastAPI endpoint, one sentence at a time.
+
+    Unlike generate_audio_file_melotts, the audio comes back in the response body, so the
+    server can run on another machine (Config.MELOTTS_HOST) and playback can start as
+    soon as the first sentence is synthesized.
+
+    Args:
+        text (str): The text to convert to speech.
+        language (str): The language of the text. Default is 'EN'.
+        accent (str): The accent to use for the speech. Default is 'EN-US'.
+        speed (float): The speed of the speech. Default is 1.0.
+
+    Returns:
+        tuple: The sample rate, and an iterator over 16-bit mono PCM chunks.
+
+    Raises:
+        requests.HTTPError: If the server rejects the request (e.g. 503 when overloaded).
+    """
+    url = f"http://{Config.MELOTTS_HOST}:{Config.TTS_PORT_LOCAL}/stream-audio/"
+    payload = {
+        "text": text,
+        "language": language,
+        "accent": accent,
+        "speed": speed
+    }
+    response = get_client("requests").post(url, json=payload, stream=True)
+    if response.status_code != 200:
+        response.close()
+        response.raise_for_status()
+    sample_rate = int(response.headers.get("X-Sample-Rate", 44100))
+
+    def chunks():
+        # Network reads can split a sample; carry the odd byte over to the next chunk
+        pending = b""
+        try:
+            for data in response.iter_content(chunk_size=None):
+                data = pending + data
+                split = len(data) - len(data) % 2
+                pending = data[split:]
+                if split:
+                    yield data[:split]
+        finally:
+            response.close()
+
+    return sample_rate, chunks()
+
 # Example usage of the function
 if __name__ == "__main__":
+    import requests
+
     try:
         result = generate_audio_file_melotts(
             text="What is the purpose of life?",
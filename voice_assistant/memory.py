@@ -0,0 +1,193 @@
+# voice_assistant/memory.py
+
+import logging
+import threading
+from functools import lru_cache
+
+from colorama import Fore
+
+from voice_assistant.api_key_manager import get_response_api_key
+from voice_assistant.config import Config
+from voice_assistant.response_generation import generate_response_stream
+
+# Tokens added per message by the chat format (role, separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+SUMMARY_PROMPT = (
+    "You maintain the memory of a voice assistant. Merge the previous summary and the new "
+    "conversation turns into one short summary of the facts, requests and preferences the "
+    "assistant should remember. Write plain sentences, under 80 words, without preamble."
+)
+
+
+@lru_cache(maxsize=None)
+def _get_encoding():
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        logging.debug("tiktoken not available, estimating token counts")
+        return None
+
+
+def count_tokens(text):
+    """
+    Count the tokens in `text`.
+
+    Uses tiktoken's cl100k_base encoding when it is installed, otherwise estimates four
+    characters per token, which is close enough for budgeting.
+    """
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+    return (len(text) + 3) // 4
+
+
+def message_tokens(message):
+    """Count the tokens of one chat message, including the per-message overhead."""
+    return count_tokens(message.get("content") or "") + MESSAGE_OVERHEAD_TOKENS
+
+
+def summarize_turns(previous_summary, turns):
+    """
+    Fold conversation turns into a running summary with the configured response model.
+
+    Args:
+        previous_summary (str): The summary so far ('' if none).
+        turns (list): The messages to fold in.
+
+    Returns:
+        str: The new summary.
+    """
+    transcript = "\n".join(f"{m['role']}: {m['content']}" for m in turns)
+    request = [
+        {"role": "system", "content": SUMMARY_PROMPT},
+        {"role": "user", "content": f"Previous summary:\n{previous_summary or '(none)'}\n\nNew turns:\n{transcript}"},
+    ]
+    return "".join(generate_response_stream(
+        Config.RESPONSE_MODEL, get_response_api_key(), request, Config.LOCAL_MODEL_PATH, use_cache=False)).strip()
+
+
+class ConversationMemory:
+    """
+    Chat history bounded by a token budget.
+
+    The system prompt and the most recent turns are always sent verbatim. Once the
+    history exceeds `max_tokens`, older turns are folded into a compact summary on a
+    background thread, so the reply that triggered it is not delayed. Until the summary
+    is ready, the oldest turns are dropped from what is sent, keeping every request within
+    the budget.
+
+    Usage:
+        memory = ConversationMemory(Config.SYSTEM_PROMPT)
+        memory.append({"role": "user", "content": user_input})
+        reply = generate_response(model, api_key, memory.messages)
+    """
+
+    def __init__(self, system_prompt, max_tokens=1500, keep_recent=6, summarize=summarize_turns):
+        """
+        Args:
+            system_prompt (str): The system prompt that starts every request.
+            max_tokens (int): Token budget for the messages sent to the model.
+            keep_recent (int): Number of most recent messages that are never summarized.
+            summarize (Callable): `summarize(previous_summary, turns) -> str`, or None to
+                drop old turns without summarizing them.
+        """
+        self.system_message = {"role": "system", "content": system_prompt}
+        self.max_tokens = max_tokens
+        self.keep_recent = keep_recent
+        self.summarize = summarize
+        self.summary = ""
+        self._turns = []
+        self._lock = threading.Lock()
+        self._summarizing = False
+
+    def append(self, message):
+        """
+        Add a message to the conversation.
+
+        Args:
+            message (dict): A chat message with 'role' and 'content'.
+        """
+        with self._lock:
+            self._turns.append(message)
+            start = not self._summarizing and self._over_budget()
+            if start:
+                self._summarizing = True
+        if start:
+            threading.Thread(target=self._summarize_older_turns, name="memory-summary", daemon=True).start()
+
+    @property
+    def messages(self):
+        """The messages to send to the model: system prompt, summary and recent turns."""
+        with self._lock:
+            header = [self.system_message]
+            if self.summary:
+                header.append({"role": "system", "content": f"Summary of the conversation so far: {self.summary}"})
+            budget = self.max_tokens - sum(message_tokens(m) for m in header)
+            recent = []
+            for message in reversed(self._turns):
+                cost = message_tokens(message)
+                # The latest message is always sent, even if it alone exceeds the budget
+                if recent and cost > budget:
+                    break
+                recent.append(message)
+                budget -= cost
+            return header + recent[::-1]
+
+    @property
+    def token_count(self):
+        """Tokens of the full (unbounded) history held in memory."""
+        with self._lock:
+            return self._token_count()
+
+    def _token_count(self):
+        total = message_tokens(self.system_message) + sum(message_tokens(m) for m in self._turns)
+        if self.summary:
+            total += count_tokens(self.summary) + MESSAGE_OVERHEAD_TOKENS
+        return total
+
+    def _over_budget(self):
+        return len(self._turns) > self.keep_recent and self._token_count() > self.max_tokens
+
+    def _summarize_older_turns(self):
+        while True:
+            with self._lock:
+                older = self._turns[:len(self._turns) - self.keep_recent]
+                previous = self.summary
+            summary = previous
+            if self.summarize is not None:
+                try:
+                    summary = self.summarize(previous, older)
+                except Exception as e:
+                    # Keep the old turns; the next append retries
+                    logging.warning(Fore.RED + f"Conversation summary failed: {e}" + Fore.RESET)
+                    with self._lock:
+                        self._summarizing = False
+                    return
+            with self._lock:
+                # Turns appended meanwhile are after `older`, so it is still a prefix
+                del self._turns[:len(older)]
+                self.summary = summary
+                logging.info(Fore.MAGENTA + f"Folded {len(older)} messages into the conversation summary" + Fore.RESET)
+                if not self._over_budget():
+                    self._summarizing = False
+                    return
+
+
+def create_memory(system_prompt=None):
+    """
+    Create a conversation memory with the budget configured in Config.
+
+    Args:
+        system_prompt (str): Defaults to Config.SYSTEM_PROMPT.
+
+    Returns:
+        ConversationMemory: An empty conversation.
+    """
+    return ConversationMemory(
+        system_prompt or Config.SYSTEM_PROMPT,
+        max_tokens=Config.MEMORY_MAX_TOKENS,
+        keep_recent=Config.MEMORY_KEEP_RECENT,
+        summarize=summarize_turns if Config.MEMORY_SUMMARIZE else None
+    )
@@ -0,0 +1,257 @@
+# voice_assistant/mock_providers.py
+
+import json
+import logging
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_TRANSCRIPT = "What is the weather like today?"
+DEFAULT_REPLY = ("It looks sunny and warm today, perfect for a short walk. "
+                 "Remember your sunglasses, and maybe some water too!")
+
+# Roughly how long speech lasts per character of text, for the TTS stand-in
+SECONDS_PER_CHAR = 0.06
+
+
+class Latency:
+    """A simulated delay: `base` seconds with normally distributed jitter, never negative."""
+
+    def __init__(self, base=0.0, jitter=0.0):
+        """
+        Args:
+            base (float): Mean delay in seconds.
+            jitter (float): Standard deviation of the delay in seconds.
+        """
+        self.base = base
+        self.jitter = jitter
+
+    @classmethod
+    def parse(cls, text):
+        """Build a Latency from 'base' or 'base:jitter' (in seconds), e.g. '0.3:0.05'."""
+        base, _, jitter = text.partition(":")
+        return cls(float(base), float(jitter or 0))
+
+    def sample(self):
+        """Return one delay in seconds."""
+        if not self.jitter:
+            return self.base
+        return max(0.0, random.gauss(self.base, self.jitter))
+
+    def sleep(self):
+        time.sleep(self.sample())
+
+    def __repr__(self):
+        return f"Latency({self.base}, {self.jitter})"
+
+
+class MockProviderServer:
+    """
+    Local stand-ins for the provider APIs, for benchmarking without network access or keys.
+
+    One HTTP server answers the requests the SDKs make once their base URL points at it
+    (Config.OPENAI_BASE_URL, GROQ_BASE_URL, DEEPGRAM_BASE_URL):
+
+        POST .../audio/transcriptions   OpenAI and Groq Whisper
+        POST /v1/listen                 Deepgram pre-recorded
+        POST .../chat/completions       OpenAI and Groq chat, streamed as server-sent events
+        POST /tts/stream                int16 PCM streamed in chunks (see StandInTTS in benchmark.py)
+
+    Each answer is delayed by its Latency, and a fraction `error_rate` of requests fail
+    with a 503, so retries, hedging and circuit breakers can be exercised too.
+
+    Usage:
+        with MockProviderServer(llm_first_token=Latency(0.3, 0.05)) as server:
+            Config.GROQ_BASE_URL = server.url
+    """
+
+    def __init__(self, transcript=DEFAULT_TRANSCRIPT, reply=DEFAULT_REPLY, stt_latency=None,
+                 llm_first_token=None, llm_token=None, tts_first_byte=None, tts_realtime_factor=5.0,
+                 tts_chunk_ms=50, error_rate=0.0, host="127.0.0.1", port=0):
+        """
+        Args:
+            transcript (str): Text returned by every transcription request.
+            reply (str): Text streamed by every chat completion.
+            stt_latency (Latency): Time to answer a transcription request.
+            llm_first_token (Latency): Time to the first token of a completion.
+            llm_token (Latency): Time between the following tokens.
+            tts_first_byte (Latency): Time to the first audio chunk.
+            tts_realtime_factor (float): How much faster than real time audio is generated.
+            tts_chunk_ms (int): Duration of each audio chunk in milliseconds.
+            error_rate (float): Fraction of requests answered with a 503.
+            host (str): Interface to listen on.
+            port (int): Port to listen on (0 picks a free one).
+        """
+        self.transcript = transcript
+        self.reply = reply
+        self.stt_latency = stt_latency or Latency(0.25, 0.05)
+        self.llm_first_token = llm_first_token or Latency(0.3, 0.08)
+        self.llm_token = llm_token or Latency(0.02, 0.005)
+        self.tts_first_byte = tts_first_byte or Latency(0.15, 0.04)
+        self.tts_realtime_factor = tts_realtime_factor
+        self.tts_chunk_ms = tts_chunk_ms
+        self.error_rate = error_rate
+        self.host = host
+        self.port = port
+        self.requests = {}  # route -> count
+        self._server = None
+        self._lock = threading.Lock()
+
+    @property
+    def url(self):
+        """Base URL of the running server, e.g. 'http://127.0.0.1:53211'."""
+        return f"http://{self.host}:{self.port}"
+
+    def start(self):
+        """Start serving from a daemon thread."""
+        self._server = ThreadingHTTPServer((self.host, self.port), _make_handler(self))
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        threading.Thread(target=self._server.serve_forever, name="mock-providers", daemon=True).start()
+        logging.info(f"Mock providers listening on {self.url}")
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _count(self, route):
+        with self._lock:
+            self.requests[route] = self.requests.get(route, 0) + 1
+
+    def _should_fail(self):
+        return self.error_rate > 0 and random.random() < self.error_rate
+
+
+def _make_handler(mock):
+    class ProviderHandler(BaseHTTPRequestHandler):
+        # Keep-alive, so the SDKs' connection pools behave as they do against the real APIs
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            path = self.path.split("?")[0].rstrip("/")
+            body = self._read_body()
+            if path.endswith("/audio/transcriptions"):
+                route = "transcription"
+            elif path.endswith("/listen"):
+                route = "deepgram"
+            elif path.endswith("/chat/completions"):
+                route = "chat"
+            elif path.endswith("/tts/stream"):
+                route = "tts"
+            else:
+                self.send_error(404)
+                return
+            mock._count(route)
+            if mock._should_fail():
+                self._send_json({"error": {"message": "Injected failure", "type": "server_error"}}, 503)
+                return
+            getattr(self, f"_{route}")(body)
+
+        def _read_body(self):
+            if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+                data = b""
+                while True:
+                    size = int(self.rfile.readline().strip() or b"0", 16)
+                    if size == 0:
+                        self.rfile.readline()
+                        return data
+                    data += self.rfile.read(size)
+                    self.rfile.readline()
+            return self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+        def _send_json(self, payload, status=200):
+            data = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _start_chunked(self, content_type):
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+
+        def _write_chunk(self, data):
+            self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+            self.wfile.flush()
+
+        def _end_chunked(self):
+            self.wfile.write(b"0\r\n\r\n")
+            self.wfile.flush()
+
+        def _transcription(self, body):
+            mock.stt_latency.sleep()
+            self._send_json({"text": mock.transcript})
+
+        def _deepgram(self, body):
+            mock.stt_latency.sleep()
+            self._send_json({
+                "metadata": {"request_id": str(uuid.uuid4()), "channels": 1, "duration": 0.0},
+                "results": {"channels": [{"alternatives": [
+                    {"transcript": mock.transcript, "confidence": 0.99, "words": []}
+                ]}]}
+            })
+
+        def _chat(self, body):
+            request = json.loads(body or b"{}")
+            model = request.get("model", "mock")
+            completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+            mock.llm_first_token.sleep()
+            if not request.get("stream"):
+                self._send_json({
+                    "id": completion_id, "object": "chat.completion", "created": int(time.time()), "model": model,
+                    "choices": [{"index": 0, "message": {"role": "assistant", "content": mock.reply},
+                                 "finish_reason": "stop"}],
+                    "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+                })
+                return
+
+            def event(delta, finish_reason=None):
+                chunk = {
+                    "id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()),
+                    "model": model, "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]
+                }
+                self._write_chunk(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+
+            self._start_chunked("text/event-stream")
+            tokens = re.findall(r"\S+\s*", mock.reply)
+            for i, token in enumerate(tokens):
+                if i:
+                    mock.llm_token.sleep()
+                event({"role": "assistant", "content": token} if i == 0 else {"content": token})
+            event({}, "stop")
+            self._write_chunk(b"data: [DONE]\n\n")
+            self._end_chunked()
+
+        def _tts(self, body):
+            request = json.loads(body or b"{}")
+            sample_rate = int(request.get("sample_rate", 22050))
+            duration = len(request.get("transcript", "")) * SECONDS_PER_CHAR
+            chunk_bytes = sample_rate * mock.tts_chunk_ms // 1000 * 2
+            chunks = max(1, int(duration * 1000 / mock.tts_chunk_ms))
+            mock.tts_first_byte.sleep()
+            self._start_chunked("application/octet-stream")
+            for i in range(chunks):
+                if i:
+                    time.sleep(mock.tts_chunk_ms / 1000 / mock.tts_realtime_factor)
+                self._write_chunk(bytes(chunk_bytes))
+            self._end_chunked()
+
+        def log_message(self, format, *args):
+            logging.debug(f"mock providers: {format % args}")
+
+    return ProviderHandler
@@ -0,0 +1,129 @@
+# voice_assistant/pcm.py
+
+import numpy as np
+
+# Bytes per sample for each supported sample format
+SAMPLE_WIDTHS = {
+    "float32": 4,
+    "int16": 2,
+}
+
+# Raw PCM encoding names used by Cartesia for each sample format
+PCM_ENCODINGS = {
+    "float32": "pcm_f32le",
+    "int16": "pcm_s16le",
+}
+
+# Output sample rates Cartesia can synthesize at
+CARTESIA_SAMPLE_RATES = (8000, 16000, 22050, 24000, 44100, 48000)
+
+_DTYPES = {
+    "float32": np.float32,
+    "int16": np.int16,
+}
+
+
+def convert_sample_format(data, from_format, to_format):
+    """
+    Convert mono PCM between 'float32' and 'int16'.
+
+    Args:
+        data (bytes): The PCM samples.
+        from_format (str): Format of `data`.
+        to_format (str): Desired format.
+
+    Returns:
+        bytes: The converted samples (`data` itself if the formats match).
+    """
+    if from_format == to_format:
+        return data
+    if from_format == "float32" and to_format == "int16":
+        # One scratch array, scaled and clipped in place
+        samples = np.frombuffer(data, dtype=np.float32) * 32767
+        np.clip(samples, -32768, 32767, out=samples)
+        return samples.astype(np.int16).tobytes()
+    if from_format == "int16" and to_format == "float32":
+        samples = np.frombuffer(data, dtype=np.int16).astype(np.float32)
+        samples *= 1 / 32768
+        return samples.tobytes()
+    raise ValueError(f"Unsupported conversion: {from_format} -> {to_format}")
+
+
+def nearest_rate(rate, supported_rates):
+    """Return the supported rate closest to `rate`, preferring higher rates on a tie."""
+    return min(supported_rates, key=lambda r: (abs(r - rate), -r))
+
+
+class PcmConverter:
+    """
+    Convert a stream of mono PCM chunks to another sample format and rate.
+
+    When the formats and rates already match, `process` returns its input untouched (only
+    whole samples, if a chunk splits one), so the common case (the provider produces
+    exactly what the device plays) costs nothing.
+    Resampling is linear interpolation that carries its position across chunks, so chunk
+    boundaries do not click. Call `reset` between utterances.
+    """
+
+    def __init__(self, from_rate, from_format, to_rate, to_format):
+        """
+        Args:
+            from_rate (int): Sample rate of the input.
+            from_format (str): Sample format of the input, 'float32' or 'int16'.
+            to_rate (int): Sample rate of the output.
+            to_format (str): Sample format of the output, 'float32' or 'int16'.
+        """
+        self.from_rate = from_rate
+        self.from_format = from_format
+        self.to_rate = to_rate
+        self.to_format = to_format
+        self.passthrough = from_rate == to_rate and from_format == to_format
+        self._step = from_rate / to_rate
+        self.reset()
+
+    def reset(self):
+        """Forget the resampler state at the start of a new stream."""
+        self._position = 0.0  # position of the next output sample, relative to _previous
+        self._previous = None  # last input sample of the previous chunk
+        self._pending = b""  # trailing bytes of an incomplete sample
+
+    def process(self, chunk):
+        """
+        Convert one chunk.
+
+        Args:
+            chunk (bytes): PCM in the input format and rate.
+
+        Returns:
+            bytes: PCM in the output format and rate (may be empty).
+        """
+        # Network reads can split a sample: carry its bytes over to the next chunk
+        width = SAMPLE_WIDTHS[self.from_format]
+        if self._pending or len(chunk) % width:
+            data = self._pending + chunk
+            usable = len(data) - len(data) % width
+            data, self._pending = data[:usable], data[usable:]
+        else:
+            data = chunk
+        if self.passthrough:
+            return data
+        if self.from_rate == self.to_rate:
+            return convert_sample_format(data, self.from_format, self.to_format)
+
+        samples = np.frombuffer(data, dtype=_DTYPES[self.from_format]).astype(np.float32)
+        if self.from_format == "int16":
+            samples *= 1 / 32768
+        if self._previous is not None:
+            # Index 0 is the last sample of the previous chunk
+            samples = np.concatenate(([self._previous], samples))
+        if samples.size < 2:
+            if samples.size:
+                self._previous = samples[-1]
+            return b""
+
+        positions = np.arange(self._position, samples.size - 1, self._step)
+        resampled = np.interp(positions, np.arange(samples.size), samples).astype(np.float32)
+        # The last sample becomes index 0 of the next chunk
+        self._position += positions.size * self._step - (samples.size - 1)
+        self._previous = samples[-1]
+        return convert_sample_format(resampled.tobytes(), "float32", self.to_format)
@@ -0,0 +1,448 @@
+# voice_assistant/pipeline.py
+
+import asyncio
+import logging
+import threading
+
+from colorama import Fore
+
+from voice_assistant.api_key_manager import get_tts_api_key
+from voice_assistant.async_providers import create_async_tts
+from voice_assistant.audio_output import get_output_engine, negotiate_output_format
+from voice_assistant.backends import get_tts_backend
+from voice_assistant.capture import MicrophoneCapture, pcm_to_wav
+from voice_assistant.config import Config
+from voice_assistant.health import CircuitOpenError, backoff_delay
+from voice_assistant.hedging import hedged_response_stream_async, hedged_transcribe_async
+from voice_assistant.pcm import PcmConverter
+from voice_assistant.response_generation import FALLBACK_RESPONSE
+from voice_assistant.segmentation import SentenceSegmenter
+from voice_assistant.tracing import (FIRST_AUDIO, LLM_COMPLETE, LLM_FIRST_TOKEN, PLAYBACK_END, STT,
+                                     TTS_FIRST_BYTE, get_tracer)
+
+# Sentinel marking the end of a stage's output on its queue
+END = object()
+
+
+class InputClosed(Exception):
+    """Raised by a source's `read_utterance` once no more audio will arrive (e.g. the client left)."""
+
+
+class MicrophoneSource:
+    """Async audio source reading utterances from a local MicrophoneCapture."""
+
+    def __init__(self, capture):
+        self.capture = capture
+        self.sample_rate = capture.sample_rate
+        self._prefix = None
+
+    @property
+    def last_endpoint_delay(self):
+        """Trailing silence (in seconds) before the last utterance was endpointed."""
+        return self.capture.last_endpoint_delay
+
+    async def read_utterance(self):
+        """
+        Wait for the next utterance.
+
+        If a barge-in was detected, the utterance continues from the speech that
+        triggered it.
+
+        Returns:
+            bytes: 16-bit PCM at `sample_rate`, or None if nothing was said.
+        """
+        prefix, self._prefix = self._prefix, None
+        return await asyncio.to_thread(self.capture.record_utterance, prefix=prefix)
+
+    async def wait_for_speech(self, stop_event):
+        """
+        Wait until the user starts talking over the assistant.
+
+        Args:
+            stop_event (threading.Event): Set to stop watching; cancelling the wait sets it.
+
+        Returns:
+            bool: True if speech was detected, False if stopped first.
+        """
+        watch = asyncio.ensure_future(asyncio.to_thread(
+            self.capture.wait_for_speech, stop_event,
+            Config.BARGE_IN_THRESHOLD_MULTIPLIER, Config.BARGE_IN_MIN_SPEECH_MS))
+        try:
+            frames = await asyncio.shield(watch)
+        except asyncio.CancelledError:
+            # The thread cannot be interrupted: wait until it lets go of the microphone,
+            # so that the next read does not compete with it for frames
+            stop_event.set()
+            await asyncio.gather(watch, return_exceptions=True)
+            raise
+        if frames:
+            self._prefix = frames
+            return True
+        return False
+
+    async def close(self):
+        await asyncio.to_thread(self.capture.close)
+
+
+class SpeakerSink:
+    """Async audio sink playing through a local AudioOutputEngine."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.sample_rate = engine.sample_rate
+        self.sample_format = engine.sample_format
+
+    async def write(self, chunk):
+        """Queue a chunk of PCM for playback (waits while the ring buffer is full)."""
+        await asyncio.to_thread(self.engine.write, chunk)
+
+    async def drain(self):
+        """Wait until everything written so far has been played."""
+        await asyncio.to_thread(self.engine.wait_until_done)
+
+    def clear(self):
+        """Drop audio that has been queued but not yet played."""
+        self.engine.clear()
+
+    def call_when_audio_starts(self, callback):
+        """Call `callback` once, from the player thread, when the next audio is audible."""
+        self.engine.call_when_audio_starts(callback)
+
+    async def close(self):
+        await asyncio.to_thread(self.engine.close)
+
+
+def _end_nowait(queue):
+    """
+    Best-effort END after a stage failed or was cancelled.
+
+    respond() cancels every stage as soon as one fails, so a full queue here just means
+    the consumer is about to be cancelled too.
+    """
+    try:
+        queue.put_nowait(END)
+    except asyncio.QueueFull:
+        pass
+
+
+async def _iterate_queue(queue):
+    """Yield items from a queue until the END sentinel."""
+    while True:
+        item = await queue.get()
+        if item is END:
+            return
+        yield item
+
+
+class VoicePipeline:
+    """
+    An asyncio voice pipeline: record -> STT -> LLM -> TTS -> playback.
+
+    Within a reply the LLM, TTS and playback stages run as concurrent tasks connected by
+    bounded queues (tokens -> clauses -> audio chunks), so each stage starts as soon as
+    the previous one has produced its first item and a slow consumer applies
+    backpressure upstream. Blocking work (microphone, speaker, SDKs without async
+    support) runs on worker threads so the loop stays free to serve other sessions.
+    """
+
+    def __init__(self, source, sink, tts, memory, queue_size=None,
+                 transcription_model=None, response_model=None, barge_in=None, on_event=None, tracer=None):
+        """
+        Args:
+            source: Audio source with `async read_utterance()` and `sample_rate`;
+                `read_utterance` raises InputClosed when the input has ended.
+            sink: Audio sink with `async write()`, `async drain()`, `clear()`,
+                `sample_rate` and `sample_format`.
+            tts (AsyncTTS): The TTS adapter.
+            memory (ConversationMemory): The conversation so far.
+            queue_size (int): Capacity of the inter-stage queues.
+            transcription_model (str): Defaults to Config.TRANSCRIPTION_MODEL.
+            response_model (str): Defaults to Config.RESPONSE_MODEL.
+            barge_in (bool): Stop the reply when the user starts talking. Requires a source
+                with `async wait_for_speech(stop_event)`, which the pipeline both signals and
+                cancels once the reply is over. Defaults to Config.BARGE_IN.
+            on_event (Callable): Optional coroutine function called as
+                `on_event(kind, text)` for 'transcript', 'response' and 'barge_in' events.
+            tracer (Tracer): Collects the timings of each turn. Defaults to the process-wide tracer.
+        """
+        self.source = source
+        self.sink = sink
+        self.tts = tts
+        self.memory = memory
+        self.queue_size = queue_size or Config.PIPELINE_QUEUE_SIZE
+        self.transcription_model = transcription_model or Config.TRANSCRIPTION_MODEL
+        self.response_model = response_model or Config.RESPONSE_MODEL
+        if barge_in is None:
+            barge_in = Config.BARGE_IN
+        self.barge_in = barge_in and hasattr(source, "wait_for_speech")
+        self.on_event = on_event
+        self.tracer = tracer or get_tracer()
+
+    async def _notify(self, kind, text=""):
+        if self.on_event is None:
+            return
+        try:
+            await self.on_event(kind, text)
+        except Exception as e:
+            logging.debug(f"Pipeline event handler failed: {e}")
+
+    async def transcribe(self, pcm):
+        """Transcribe an utterance, retrying up to 3 times with backoff."""
+        wav = pcm_to_wav(pcm, self.source.sample_rate)
+        for attempt in range(3):
+            try:
+                text = await hedged_transcribe_async(self.transcription_model, wav, Config.LOCAL_MODEL_PATH)
+                if text:
+                    return text
+            except CircuitOpenError as e:
+                logging.warning(Fore.RED + f"Transcription unavailable: {e}" + Fore.RESET)
+                break
+            except Exception as e:
+                logging.warning(Fore.RED + f"Transcription attempt {attempt+1} failed: {e}" + Fore.RESET)
+                if attempt < 2:
+                    await asyncio.sleep(backoff_delay(attempt))
+        return ""
+
+    async def _generate(self, tokens, turn):
+        """LLM stage: stream tokens into the `tokens` queue."""
+        produced = False
+        turn.start(LLM_FIRST_TOKEN)
+        turn.start(LLM_COMPLETE)
+        try:
+            try:
+                for attempt in range(3):
+                    try:
+                        async for token in hedged_response_stream_async(self.response_model, self.memory.messages):
+                            if not produced:
+                                turn.stop(LLM_FIRST_TOKEN)
+                            produced = True
+                            await tokens.put(token)
+                        if produced:
+                            break
+                    except CircuitOpenError as e:
+                        logging.warning(Fore.RED + f"Response generation unavailable: {e}" + Fore.RESET)
+                        break
+                    except Exception as e:
+                        logging.warning(Fore.RED + f"Response attempt {attempt+1} failed: {e}" + Fore.RESET)
+                        if produced:
+                            break
+                        if attempt < 2:
+                            await asyncio.sleep(backoff_delay(attempt))
+            finally:
+                # Also when the stream broke off or was cancelled after producing tokens
+                if produced:
+                    turn.stop(LLM_COMPLETE)
+            if not produced:
+                await tokens.put(FALLBACK_RESPONSE)
+            await tokens.put(END)
+        except BaseException:
+            _end_nowait(tokens)
+            raise
+
+    async def _segment(self, tokens, clauses, spoken, turn):
+        """Segmentation stage: turn tokens into complete clauses."""
+        segmenter = SentenceSegmenter()
+        try:
+            async for token in _iterate_queue(tokens):
+                for clause in segmenter.feed(token):
+                    turn.start(TTS_FIRST_BYTE)
+                    spoken.append(clause)
+                    await clauses.put(clause)
+            for clause in segmenter.flush():
+                turn.start(TTS_FIRST_BYTE)
+                spoken.append(clause)
+                await clauses.put(clause)
+            await clauses.put(END)
+        except BaseException:
+            _end_nowait(clauses)
+            raise
+
+    async def _synthesize(self, clauses, audio, turn):
+        """TTS stage: synthesize clauses into the `audio` queue."""
+        # A no-op when the TTS already produces the sink's format, as negotiated in run_local
+        converter = PcmConverter(self.tts.sample_rate, self.tts.sample_format,
+                                 self.sink.sample_rate, self.sink.sample_format)
+        try:
+            async for chunk in self.tts.stream(_iterate_queue(clauses)):
+                turn.stop(TTS_FIRST_BYTE)
+                chunk = converter.process(chunk)
+                if chunk:
+                    await audio.put(chunk)
+            await audio.put(END)
+        except BaseException:
+            _end_nowait(audio)
+            raise
+
+    async def _play(self, audio, turn):
+        """Playback stage: write audio chunks to the sink."""
+        # Sinks that know when audio is actually audible report it; otherwise the first write counts
+        on_audio_start = getattr(self.sink, "call_when_audio_starts", None)
+        if on_audio_start:
+            on_audio_start(lambda: turn.stop(FIRST_AUDIO))
+        async for chunk in _iterate_queue(audio):
+            await self.sink.write(chunk)
+            if not on_audio_start:
+                turn.stop(FIRST_AUDIO)
+        await self.sink.drain()
+        turn.stop(PLAYBACK_END)
+
+    async def respond(self, turn=None):
+        """
+        Generate and speak a reply to the current chat history.
+
+        Args:
+            turn (Turn): The trace of the current turn (a new one is started if omitted).
+
+        Returns:
+            str: The text that was sent to TTS (cut short if the user barged in).
+        """
+        turn = turn or self.tracer.start_turn()
+        tokens = asyncio.Queue(self.queue_size)
+        clauses = asyncio.Queue(self.queue_size)
+        audio = asyncio.Queue(self.queue_size)
+        spoken = []
+        tasks = [
+            asyncio.create_task(self._generate(tokens, turn)),
+            asyncio.create_task(self._segment(tokens, clauses, spoken, turn)),
+            asyncio.create_task(self._synthesize(clauses, audio, turn)),
+            asyncio.create_task(self._play(audio, turn)),
+        ]
+        reply = asyncio.gather(*tasks)
+        stop_monitor = threading.Event()
+        monitor = asyncio.create_task(self.source.wait_for_speech(stop_monitor)) if self.barge_in else None
+        barged_in = False
+        try:
+            if monitor:
+                await asyncio.wait({reply, monitor}, return_when=asyncio.FIRST_COMPLETED)
+                if not reply.done() and monitor.exception() is not None:
+                    # Without barge-in detection the reply still plays to the end
+                    logging.warning(Fore.RED + f"Barge-in detection failed: {monitor.exception()}" + Fore.RESET)
+                elif not reply.done() and monitor.result():
+                    # The user is talking: silence the speaker and abandon the LLM and TTS requests
+                    logging.info(Fore.MAGENTA + "User barged in, stopping reply" + Fore.RESET)
+                    barged_in = True
+                    self.sink.clear()
+                    reply.cancel()
+                    await self._notify("barge_in")
+            await reply
+        except asyncio.CancelledError:
+            if not barged_in:
+                raise
+        except Exception as e:
+            logging.error(Fore.RED + f"Reply failed: {e}" + Fore.RESET)
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            if monitor:
+                # A source may only look at the event when its next frame arrives, and a
+                # client that mutes its microphone while the assistant speaks sends none
+                stop_monitor.set()
+                monitor.cancel()
+                await asyncio.gather(monitor, return_exceptions=True)
+        return " ".join(spoken)
+
+    async def run_turn(self):
+        """
+        Run one full turn.
+
+        Returns:
+            str: The user's transcribed input ('' if nothing was understood).
+        """
+        turn = self.tracer.start_turn()
+        status = "error"
+        try:
+            try:
+                pcm = await self.source.read_utterance()
+            except InputClosed:
+                status = "closed"
+                raise
+            turn.end_capture(getattr(self.source, "last_endpoint_delay", 0.0))
+            if not pcm:
+                status = "no_input"
+                return ""
+            with turn.span(STT):
+                user_input = await self.transcribe(pcm)
+            if not user_input:
+                status = "no_input"
+                return ""
+            logging.info(Fore.GREEN + f"You said: {user_input}" + Fore.RESET)
+            await self._notify("transcript", user_input)
+            if is_goodbye(user_input):
+                status = "goodbye"
+                return user_input
+
+            self.memory.append({"role": "user", "content": user_input})
+            response_text = await self.respond(turn)
+            logging.info(Fore.CYAN + f"Response: {response_text}" + Fore.RESET)
+            await self._notify("response", response_text)
+            self.memory.append({"role": "assistant", "content": response_text})
+            status = "ok"
+            return user_input
+        finally:
+            turn.finish(status)
+
+    async def run(self):
+        """Run turns until the user says goodbye or the input is closed."""
+        await self.tts.connect()
+        consecutive_errors = 0
+        while True:
+            try:
+                user_input = await self.run_turn()
+                if is_goodbye(user_input):
+                    logging.info(Fore.MAGENTA + "Assistant session ended." + Fore.RESET)
+                    self.tracer.log_summary()
+                    return
+                consecutive_errors = 0
+            except InputClosed:
+                logging.info(Fore.MAGENTA + "Audio input closed, ending session." + Fore.RESET)
+                return
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logging.error(Fore.RED + f"Critical Error: {e}" + Fore.RESET)
+                # Back off further while the errors keep coming, instead of a fixed pause
+                await asyncio.sleep(backoff_delay(consecutive_errors))
+                consecutive_errors += 1
+
+
+def is_goodbye(user_input):
+    """Return whether the user asked to end the session."""
+    text = user_input.lower()
+    return "goodbye" in text or "arrivederci" in text
+
+
+async def run_local(memory):
+    """
+    Run the asyncio pipeline on the local microphone and speaker.
+
+    Args:
+        memory (ConversationMemory): The conversation so far.
+    """
+    # Synthesize straight into the device's native int16 format when the backend can
+    rates = get_tts_backend(Config.TTS_MODEL, get_tts_api_key()).capabilities.sample_rates
+    if rates:
+        sample_rate, sample_format = negotiate_output_format(rates)
+        tts = create_async_tts(Config.TTS_MODEL, get_tts_api_key(), sample_rate, sample_format)
+    else:
+        tts = create_async_tts(Config.TTS_MODEL, get_tts_api_key())
+    capture = MicrophoneCapture(
+        sample_rate=Config.CAPTURE_SAMPLE_RATE,
+        frame_ms=Config.CAPTURE_FRAME_MS,
+        energy_threshold=Config.VAD_ENERGY_THRESHOLD,
+        pause_threshold=Config.VAD_PAUSE_THRESHOLD,
+        adaptive_threshold=Config.VAD_ADAPTIVE_THRESHOLD,
+        noise_multiplier=Config.VAD_NOISE_MULTIPLIER
+    )
+    engine = get_output_engine(tts.sample_rate, tts.sample_format)
+    capture.playback_active = lambda: engine.is_playing
+    source, sink = MicrophoneSource(capture), SpeakerSink(engine)
+    capture.start()
+    engine.start()
+    try:
+        await VoicePipeline(source, sink, tts, memory).run()
+    finally:
+        await tts.close()
+        await source.close()
+        await sink.close()
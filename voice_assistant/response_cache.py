@@ -0,0 +1,163 @@
+# voice_assistant/response_cache.py
+
+import hashlib
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from functools import lru_cache
+
+import numpy as np
+
+from voice_assistant.config import Config
+
+
+def normalize_query(text):
+    """Lower-case `text` and strip punctuation and extra whitespace."""
+    return re.sub(r"\s+", " ", re.sub(r"[^\w\s]", " ", text.casefold())).strip()
+
+
+def embed(text, dims=256):
+    """
+    Embed text as a hashed bag of words and character trigrams.
+
+    This is a small local model: near-identical questions ("what time is it" and
+    "what time is it now") land close together, without a network call or an
+    embedding model download.
+
+    Args:
+        text (str): Normalized text.
+        dims (int): Size of the vector.
+
+    Returns:
+        np.ndarray: An L2-normalized float32 vector.
+    """
+    vector = np.zeros(dims, dtype=np.float32)
+    padded = f" {text} "
+    features = text.split() + [padded[i:i + 3] for i in range(len(padded) - 2)]
+    for feature in features:
+        # crc32 is stable across processes, unlike hash()
+        h = zlib.crc32(feature.encode("utf-8"))
+        vector[h % dims] += 1.0 if (h >> 16) & 1 else -1.0
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def _last_user_turn(chat_history):
+    for message in reversed(chat_history):
+        if message.get("role") == "user":
+            return message.get("content") or ""
+    return ""
+
+
+def _namespace(model, chat_history):
+    """Hash of the model and system prompt; answers are only shared within one namespace."""
+    # Only the leading system prompt: later system messages (e.g. a conversation summary) change every few turns
+    system = ""
+    if chat_history and chat_history[0].get("role") == "system":
+        system = chat_history[0].get("content") or ""
+    return hashlib.sha256(f"{model}\x1f{system}".encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Cache of LLM replies keyed by the last user turn, with a similarity fallback.
+
+    Lookups first try an exact match on the normalized question, then the nearest
+    cached question by cosine similarity within the same model and system prompt.
+    Entries expire after `ttl` seconds and the least recently used are evicted once
+    `max_entries` is reached.
+
+    Replies are short enough to also be in the TTS audio cache, so a cache hit that is
+    spoken with TextToSpeech.generate_audio skips synthesis as well.
+    """
+
+    def __init__(self, similarity_threshold=0.9, ttl=3600, max_entries=512):
+        """
+        Args:
+            similarity_threshold (float): Minimum cosine similarity for a fuzzy hit.
+            ttl (float): Seconds an entry stays valid.
+            max_entries (int): Maximum number of cached replies.
+        """
+        self.similarity_threshold = similarity_threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        # (namespace, normalized question) -> (embedding, reply, stored_at)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def lookup(self, model, chat_history):
+        """
+        Return a cached reply to the last user turn.
+
+        Args:
+            model (str): The response model.
+            chat_history (list): The conversation, ending with the user's turn.
+
+        Returns:
+            str | None: The cached reply, or None on a miss.
+        """
+        query = normalize_query(_last_user_turn(chat_history))
+        if not query:
+            return None
+        namespace = _namespace(model, chat_history)
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            entry = self._entries.get((namespace, query))
+            if entry is not None:
+                self._entries.move_to_end((namespace, query))
+                return entry[1]
+            candidates = [(key, entry) for key, entry in self._entries.items() if key[0] == namespace]
+            if not candidates:
+                return None
+            vectors = np.stack([entry[0] for _, entry in candidates])
+            similarities = vectors @ embed(query)
+            best = int(np.argmax(similarities))
+            if similarities[best] < self.similarity_threshold:
+                return None
+            key, entry = candidates[best]
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def store(self, model, chat_history, reply):
+        """
+        Cache the reply to the last user turn.
+
+        Args:
+            model (str): The response model.
+            chat_history (list): The conversation the reply answers.
+            reply (str): The generated reply.
+        """
+        query = normalize_query(_last_user_turn(chat_history))
+        if not query or not reply:
+            return
+        key = (_namespace(model, chat_history), query)
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (embed(query), reply, time.monotonic())
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _expire(self, now):
+        expired = [key for key, entry in self._entries.items() if now - entry[2] > self.ttl]
+        for key in expired:
+            del self._entries[key]
+
+
+@lru_cache(maxsize=None)
+def get_response_cache():
+    """
+    Return the shared response cache configured in Config.
+
+    Returns:
+        ResponseCache | None: The cache, or None if Config.RESPONSE_CACHE is disabled.
+    """
+    if not Config.RESPONSE_CACHE:
+        return None
+    return ResponseCache(
+        similarity_threshold=Config.RESPONSE_CACHE_SIMILARITY,
+        ttl=Config.RESPONSE_CACHE_TTL,
+        max_entries=Config.RESPONSE_CACHE_MAX_ENTRIES
+    )
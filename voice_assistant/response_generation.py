@@ -2,12 +2,13 @@
 
 import logging
 
-from openai import OpenAI
-from groq import Groq
-import ollama
-
+from voice_assistant.backends import Capabilities, ResponseBackend, get_response_backend, register_backend
+from voice_assistant.clients import get_async_client, get_client
 from voice_assistant.config import Config
+from voice_assistant.response_cache import get_response_cache
 
+# Spoken when every attempt to generate a response has failed
+FALLBACK_RESPONSE = "I'm having a little technical hiccup right now, but I'm still here for you!"
 
 def generate_response(model:str, api_key:str, chat_history:list, local_model_path:str=None):
     """
@@ -22,44 +23,144 @@ def generate_response(model:str, api_key:str, chat_history:list, local_model_pat
     Returns:
     str: The generated response text.
     """
+    cache = get_response_cache()
+    if cache is not None:
+        cached = cache.lookup(model, chat_history)
+        if cached is not None:
+            logging.info("Response cache hit")
+            return cached
     try:
-        if model == 'openai':
-            return _generate_openai_response(api_key, chat_history)
-        elif model == 'groq':
-            return _generate_groq_response(api_key, chat_history)
-        elif model == 'ollama':
-            return _generate_ollama_response(chat_history)
-        elif model == 'local':
-            # Placeholder for local LLM response generation
-            return "Generated response from local model"
-        else:
-            raise ValueError("Unsupported response generation model")
+        response = get_response_backend(model, api_key, local_model_path).generate(chat_history)
     except Exception as e:
         logging.error(f"Failed to generate response: {e}")
         return "Error in generating response"
+    if cache is not None:
+        cache.store(model, chat_history, response)
+    return response
+
+
+def generate_response_stream(model:str, api_key:str, chat_history:list, local_model_path:str=None,
+                             use_cache:bool=True):
+    """
+    Generate a response using the specified model, yielding text tokens as they arrive.
+
+    Unlike generate_response, errors are propagated to the caller so that it can
+    decide whether to retry or fall back, since part of the reply may already have
+    been consumed.
+
+    Args:
+    model (str): The model to use for response generation ('openai', 'groq', 'ollama', 'local').
+    api_key (str): The API key for the response generation service.
+    chat_history (list): The chat history as a list of messages.
+    local_model_path (str): The path to the local model (if applicable).
+    use_cache (bool): Whether to consult the response cache (if enabled).
+
+    Yields:
+    str: The next piece of the generated response.
+    """
+    cache = get_response_cache() if use_cache else None
+    if cache is not None:
+        cached = cache.lookup(model, chat_history)
+        if cached is not None:
+            logging.info("Response cache hit")
+            yield cached
+            return
+    parts = []
+    for token in get_response_backend(model, api_key, local_model_path).stream(chat_history):
+        parts.append(token)
+        yield token
+    # Only complete replies are cached; an abandoned stream never reaches this point
+    if cache is not None:
+        cache.store(model, chat_history, "".join(parts))
+
+
+class OpenAICompatibleResponse(ResponseBackend):
+    """Chat completions through an OpenAI-compatible SDK; the registry shares its client."""
+
+    capabilities = Capabilities(streaming=True, async_native=True)
+    model_setting = None
+
+    def generate(self, chat_history):
+        client = get_client(self.name, self.api_key)
+        response = client.chat.completions.create(
+            model=getattr(Config, self.model_setting),
+            messages=chat_history
+        )
+        return response.choices[0].message.content
+
+    def stream(self, chat_history):
+        client = get_client(self.name, self.api_key)
+        stream = client.chat.completions.create(
+            model=getattr(Config, self.model_setting),
+            messages=chat_history,
+            stream=True
+        )
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+    async def stream_async(self, chat_history):
+        client = get_async_client(self.name, self.api_key)
+        stream = await client.chat.completions.create(
+            model=getattr(Config, self.model_setting),
+            messages=chat_history,
+            stream=True
+        )
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+
+@register_backend("response", "openai")
+class OpenAIResponse(OpenAICompatibleResponse):
+    api_key_setting = "OPENAI_API_KEY"
+    model_setting = "OPENAI_LLM"
+    sdk_modules = ("openai",)
+
+
+@register_backend("response", "groq")
+class GroqResponse(OpenAICompatibleResponse):
+    api_key_setting = "GROQ_API_KEY"
+    model_setting = "GROQ_LLM"
+    sdk_modules = ("groq",)
+
+
+@register_backend("response", "ollama")
+class OllamaResponse(ResponseBackend):
+    """A local Ollama server."""
+
+    capabilities = Capabilities(streaming=True, async_native=True)
+    sdk_modules = ("ollama",)
+
+    def generate(self, chat_history):
+        response = get_client("ollama").chat(
+            model=Config.OLLAMA_LLM,
+            messages=chat_history,
+        )
+        return response['message']['content']
+
+    def stream(self, chat_history):
+        stream = get_client("ollama").chat(
+            model=Config.OLLAMA_LLM,
+            messages=chat_history,
+            stream=True,
+        )
+        for chunk in stream:
+            content = chunk['message']['content']
+            if content:
+                yield content
+
+    async def stream_async(self, chat_history):
+        client = get_async_client("ollama")
+        async for chunk in await client.chat(model=Config.OLLAMA_LLM, messages=chat_history, stream=True):
+            content = chunk['message']['content']
+            if content:
+                yield content
+
+
+@register_backend("response", "local")
+class LocalResponse(ResponseBackend):
+    """Placeholder for a local LLM."""
 
-def _generate_openai_response(api_key, chat_history):
-    client = OpenAI(api_key=api_key)
-    response = client.chat.completions.create(
-        model=Config.OPENAI_LLM,
-        messages=chat_history
-    )
-    return response.choices[0].message.content
-
-
-def _generate_groq_response(api_key, chat_history):
-    client = Groq(api_key=api_key)
-    response = client.chat.completions.create(
-        model=Config.GROQ_LLM,
-        messages=chat_history
-    )
-    print("heiiiii : ", response.choices[0].message.content)
-    return response.choices[0].message.content
-
-
-def _generate_ollama_response(chat_history):
-    response = ollama.chat(
-        model=Config.OLLAMA_LLM,
-        messages=chat_history,
-    )
-    return response['message']['content']
\ No newline at end of file
+    def generate(self, chat_history):
+        return "Generated response from local model"
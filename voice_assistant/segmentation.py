@@ -0,0 +1,112 @@
+# voice_assistant/segmentation.py
+
+import re
+
+# Sentence terminators, including the Devanagari danda used in Hindi replies
+SENTENCE_END = re.compile(r'([.!?;:।॥]+["\')\]]*)(\s+)')
+
+# Abbreviations that end in a period but do not end a sentence
+ABBREVIATIONS = {"mr.", "mrs.", "ms.", "dr.", "st.", "vs.", "etc.", "e.g.", "i.e.", "no."}
+
+
+class SentenceSegmenter:
+    """
+    Incrementally split a stream of text tokens into speakable clauses.
+
+    Tokens are fed as they arrive from the language model; complete sentences are
+    returned as soon as their terminating punctuation (followed by whitespace) is seen,
+    so that synthesis of the first sentence can start while the rest is still generating.
+    """
+
+    def __init__(self, min_chars=12, max_chars=200):
+        """
+        Args:
+            min_chars (int): Minimum clause length before a sentence boundary is honoured.
+                Prevents very short fragments (e.g. "Hi!") from being sent on their own.
+            max_chars (int): Clause length after which the buffer is split at the last
+                comma or space even without a sentence terminator.
+        """
+        self.min_chars = min_chars
+        self.max_chars = max_chars
+        self._buffer = ""
+
+    def feed(self, token):
+        """
+        Add a token to the buffer.
+
+        Args:
+            token (str): The next piece of generated text.
+
+        Returns:
+            list: The clauses completed by this token (possibly empty).
+        """
+        if not token:
+            return []
+        self._buffer += token
+        clauses = []
+        start = 0
+        for match in SENTENCE_END.finditer(self._buffer):
+            end = match.end(1)
+            clause = self._buffer[start:end].strip()
+            if len(clause) < self.min_chars or self._is_abbreviation(clause):
+                continue
+            clauses.append(clause)
+            start = match.end()
+        self._buffer = self._buffer[start:]
+
+        while len(self._buffer) > self.max_chars:
+            split_at = self._buffer.rfind(",", 0, self.max_chars)
+            if split_at == -1:
+                split_at = self._buffer.rfind(" ", 0, self.max_chars)
+            if split_at <= 0:
+                break
+            clauses.append(self._buffer[:split_at + 1].strip())
+            self._buffer = self._buffer[split_at + 1:]
+        return clauses
+
+    def flush(self):
+        """
+        Return whatever text remains in the buffer once the token stream has ended.
+
+        Returns:
+            list: The final clause, or an empty list if nothing is left.
+        """
+        remainder = self._buffer.strip()
+        self._buffer = ""
+        return [remainder] if remainder else []
+
+    @staticmethod
+    def _is_abbreviation(clause):
+        last_word = clause.rsplit(None, 1)[-1].lower()
+        return last_word in ABBREVIATIONS
+
+
+def segment_sentences(tokens, min_chars=12, max_chars=200):
+    """
+    Turn an iterable of text tokens into a generator of complete clauses.
+
+    Args:
+        tokens (iterable): Text tokens, e.g. from generate_response_stream.
+        min_chars (int): See SentenceSegmenter.
+        max_chars (int): See SentenceSegmenter.
+
+    Yields:
+        str: Each complete clause as soon as it is available.
+    """
+    segmenter = SentenceSegmenter(min_chars=min_chars, max_chars=max_chars)
+    for token in tokens:
+        yield from segmenter.feed(token)
+    yield from segmenter.flush()
+
+
+def split_sentences(text, min_chars=12, max_chars=200):
+    """
+    Split a complete piece of text into clauses.
+
+    Args:
+        text (str): The text to split.
+
+    Returns:
+        list: The clauses in order.
+    """
+    return list(segment_sentences([text], min_chars=min_chars, max_chars=max_chars))
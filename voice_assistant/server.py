@@ -0,0 +1,242 @@
+# voice_assistant/server.py
+
+import asyncio
+import logging
+from collections import deque
+
+from colorama import Fore
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+
+from voice_assistant.api_key_manager import get_tts_api_key
+from voice_assistant.async_providers import create_async_tts
+from voice_assistant.capture import BargeInDetector, EnergyVAD, NoiseFloorEstimator, UtteranceEndpointer, frame_energy
+from voice_assistant.config import Config
+from voice_assistant.memory import create_memory
+from voice_assistant.pipeline import InputClosed, VoicePipeline
+
+app = FastAPI()
+
+# Limits concurrent conversations per process; provider clients are shared by all of them
+_session_slots = asyncio.Semaphore(Config.SERVER_MAX_SESSIONS)
+
+
+class WebSocketSource:
+    """
+    Audio source for one connection: 16-bit mono PCM arriving as binary WebSocket messages.
+
+    Incoming bytes are re-framed to the VAD frame size. While the pipeline is not
+    listening, frames only update the session's noise floor and a short pre-roll buffer;
+    while it is, they go through a bounded queue, so a session that falls behind pushes
+    back on its own socket instead of growing without limit.
+    """
+
+    def __init__(self, sample_rate=None, frame_ms=None, queue_size=None):
+        self.sample_rate = sample_rate or Config.CAPTURE_SAMPLE_RATE
+        self.frame_ms = frame_ms or Config.CAPTURE_FRAME_MS
+        self.frame_bytes = self.sample_rate * self.frame_ms // 1000 * 2
+        self.noise_floor = NoiseFloorEstimator(
+            initial_floor=Config.VAD_ENERGY_THRESHOLD / Config.VAD_NOISE_MULTIPLIER,
+            multiplier=Config.VAD_NOISE_MULTIPLIER) if Config.VAD_ADAPTIVE_THRESHOLD else None
+        self.vad = EnergyVAD(
+            energy_threshold=Config.VAD_ENERGY_THRESHOLD,
+            start_frames=max(1, 90 // self.frame_ms),
+            end_frames=max(1, int(Config.VAD_PAUSE_THRESHOLD * 1000) // self.frame_ms),
+            noise_floor=self.noise_floor
+        )
+        self.pre_roll_frames = max(1, 300 // self.frame_ms)
+        self._frames = asyncio.Queue(queue_size or Config.SERVER_INPUT_QUEUE_SIZE)
+        self._recent = deque(maxlen=self.pre_roll_frames)
+        self._pending = b""
+        self._listening = False
+        self._closed = False
+        self._prefix = None
+        self.playing = False
+        self.last_endpoint_delay = 0.0
+
+    async def push(self, data):
+        """Add bytes received from the client."""
+        self._pending += data
+        while len(self._pending) >= self.frame_bytes:
+            frame, self._pending = self._pending[:self.frame_bytes], self._pending[self.frame_bytes:]
+            if self._listening:
+                await self._frames.put(frame)
+            else:
+                self._recent.append(frame)
+                if self.noise_floor is not None and not self.playing:
+                    self.noise_floor.update(frame_energy(frame))
+
+    def close(self):
+        """Mark the input as finished; pending reads return."""
+        self._closed = True
+        try:
+            self._frames.put_nowait(None)
+        except asyncio.QueueFull:
+            # The reader checks _closed before every wait
+            pass
+
+    async def _iter_frames(self, replay_recent=True):
+        while not self._frames.empty():
+            self._frames.get_nowait()
+        recent = list(self._recent) if replay_recent else []
+        self._recent.clear()
+        self._listening = True
+        try:
+            for frame in recent:
+                yield frame
+            while not self._closed:
+                frame = await self._frames.get()
+                if frame is None:
+                    return
+                yield frame
+        finally:
+            self._listening = False
+
+    async def read_utterance(self):
+        """
+        Wait for the next utterance from the client.
+
+        Returns:
+            bytes: 16-bit PCM at `sample_rate`, or None if nothing was said.
+
+        Raises:
+            InputClosed: If the client disconnected before finishing an utterance.
+        """
+        if self._closed:
+            raise InputClosed("Client disconnected")
+        prefix, self._prefix = self._prefix, None
+        endpointer = UtteranceEndpointer(self.vad, self.frame_ms, self.pre_roll_frames, prefix=prefix)
+        frames = self._iter_frames()
+        status = None
+        try:
+            async for frame in frames:
+                status = endpointer.push(frame)
+                if status == "timeout":
+                    return None
+                if status == "done":
+                    break
+        finally:
+            await frames.aclose()
+        if status != "done":
+            # The frames ran out: nobody is left to answer
+            raise InputClosed("Client disconnected")
+        self.last_endpoint_delay = endpointer.endpoint_delay
+        return endpointer.pcm or None
+
+    async def wait_for_speech(self, stop_event):
+        """
+        Wait until the user starts talking over the reply.
+
+        Args:
+            stop_event (threading.Event): Set to stop watching.
+
+        Returns:
+            bool: True if speech was detected, False if stopped first.
+        """
+        detector = BargeInDetector(
+            self.vad, self.frame_ms, Config.BARGE_IN_THRESHOLD_MULTIPLIER, Config.BARGE_IN_MIN_SPEECH_MS)
+        frames = self._iter_frames(replay_recent=False)
+        try:
+            async for frame in frames:
+                if stop_event.is_set():
+                    return False
+                speech = detector.push(frame)
+                if speech:
+                    self._prefix = speech
+                    return True
+        finally:
+            await frames.aclose()
+        return False
+
+
+class WebSocketSink:
+    """
+    Audio sink for one connection: PCM is sent to the client as binary messages.
+
+    Sending awaits the socket, so a slow client back-pressures its own TTS stage only.
+    """
+
+    def __init__(self, websocket, sample_rate, sample_format):
+        self.websocket = websocket
+        self.sample_rate = sample_rate
+        self.sample_format = sample_format
+
+    async def write(self, chunk):
+        await self.websocket.send_bytes(chunk)
+
+    async def drain(self):
+        # Playback happens on the client; tell it the reply is complete
+        await self.websocket.send_json({"type": "end_of_reply"})
+
+    def clear(self):
+        # The client is told to drop its buffered audio through the 'barge_in' event
+        pass
+
+
+@app.websocket("/ws")
+async def voice_session(websocket: WebSocket):
+    """
+    Run one conversation over a WebSocket.
+
+    Protocol:
+        - The server first sends {"type": "config", ...} with the expected input and the
+          produced output audio formats.
+        - The client streams 16-bit mono PCM at `input_sample_rate` as binary messages.
+        - The server sends reply audio as binary messages, and JSON messages of type
+          'transcript', 'response', 'clear' (drop buffered audio: the user barged in)
+          and 'end_of_reply'.
+    """
+    await websocket.accept()
+    if _session_slots.locked():
+        logging.warning(Fore.RED + "Session limit reached, rejecting connection" + Fore.RESET)
+        await websocket.close(code=1013, reason="Server busy")
+        return
+
+    async with _session_slots:
+        tts = create_async_tts(Config.TTS_MODEL, get_tts_api_key())
+        source = WebSocketSource()
+        sink = WebSocketSink(websocket, tts.sample_rate, tts.sample_format)
+
+        async def on_event(kind, text):
+            if kind == "barge_in":
+                await websocket.send_json({"type": "clear"})
+            else:
+                await websocket.send_json({"type": kind, "text": text})
+            source.playing = kind == "transcript"
+
+        await websocket.send_json({
+            "type": "config",
+            "input_sample_rate": source.sample_rate,
+            "input_format": "int16",
+            "output_sample_rate": tts.sample_rate,
+            "output_format": tts.sample_format,
+        })
+
+        async def receive():
+            try:
+                while True:
+                    await source.push(await websocket.receive_bytes())
+            except WebSocketDisconnect:
+                pass
+            finally:
+                source.close()
+
+        pipeline = VoicePipeline(source, sink, tts, create_memory(), on_event=on_event)
+        receiver = asyncio.create_task(receive())
+        runner = asyncio.create_task(pipeline.run())
+        try:
+            await asyncio.wait({receiver, runner}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in (receiver, runner):
+                task.cancel()
+            await asyncio.gather(receiver, runner, return_exceptions=True)
+            await tts.close()
+            logging.info(Fore.MAGENTA + "Session closed" + Fore.RESET)
+        try:
+            await websocket.close()
+        except Exception:
+            pass
+
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(app, host=Config.SERVER_HOST, port=Config.SERVER_PORT)
@@ -0,0 +1,140 @@
+# voice_assistant/startup_report.py
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+# "import time:      self [us] |  cumulative | imported package"
+_IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_STATEMENT = "import voice"
+PRELOAD_STATEMENT = "from voice_assistant.backends import preload_backends; preload_backends()"
+
+
+def parse_importtime(output):
+    """
+    Parse the report written to stderr by `python -X importtime`.
+
+    Args:
+        output (str): The stderr of the interpreter.
+
+    Returns:
+        list: (module, self_us, cumulative_us, depth) for each imported module.
+    """
+    records = []
+    for line in output.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            records.append((module, int(self_us), int(cumulative_us), len(indent) // 2))
+    return records
+
+
+def measure_imports(statement=DEFAULT_STATEMENT, python=sys.executable, cwd=ROOT):
+    """
+    Run `statement` in a fresh interpreter and record what it imports.
+
+    A fresh process is the only honest measurement: in this one most modules are
+    already in sys.modules.
+
+    Args:
+        statement (str): Python code to time, e.g. 'import voice'.
+        python (str): The interpreter to run.
+        cwd (str): Working directory (the repository root, so 'voice' is importable).
+
+    Returns:
+        tuple: (records, wall_time) where records is the output of parse_importtime and
+        wall_time the seconds the whole process took.
+
+    Raises:
+        RuntimeError: If the statement fails.
+    """
+    start = time.perf_counter()
+    result = subprocess.run(
+        [python, "-X", "importtime", "-c", statement],
+        cwd=cwd, capture_output=True, text=True
+    )
+    wall_time = time.perf_counter() - start
+    if result.returncode != 0:
+        errors = [line for line in result.stderr.splitlines() if not line.startswith("import time:")]
+        raise RuntimeError(f"'{statement}' failed:\n" + "\n".join(errors[-10:]))
+    return parse_importtime(result.stderr), wall_time
+
+
+def summarize(records, top=15):
+    """
+    Break the import time down by top-level package.
+
+    Self times are summed per package, so a package's share does not include the
+    other packages it pulls in.
+
+    Args:
+        records (list): Output of parse_importtime.
+        top (int): Number of packages to keep.
+
+    Returns:
+        dict: 'total_ms', 'modules' and 'packages', a list of (package, ms) sorted
+        slowest first.
+    """
+    packages = defaultdict(int)
+    for module, self_us, _, _ in records:
+        packages[module.split(".")[0]] += self_us
+    total_us = sum(packages.values())
+    slowest = sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]
+    return {
+        "total_ms": round(total_us / 1000, 1),
+        "modules": len(records),
+        "packages": [(package, round(us / 1000, 1)) for package, us in slowest],
+    }
+
+
+def format_report(summary, wall_time=None):
+    """Render a summary as a plain-text table."""
+    lines = [f"Imports: {summary['total_ms']:.1f} ms across {summary['modules']} modules"]
+    if wall_time is not None:
+        lines[0] += f" (process wall time {wall_time * 1000:.0f} ms)"
+    width = max((len(package) for package, _ in summary["packages"]), default=0)
+    for package, ms in summary["packages"]:
+        share = 100 * ms / summary["total_ms"] if summary["total_ms"] else 0
+        lines.append(f"  {package:<{width}}  {ms:>8.1f} ms  {share:5.1f}%")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    """
+    Print the import-time breakdown of the assistant's startup.
+
+    Usage:
+        python -m voice_assistant.startup_report
+        python -m voice_assistant.startup_report --preload --json startup.jsonl
+    """
+    parser = argparse.ArgumentParser(description="Import-time breakdown of the voice assistant's startup.")
+    parser.add_argument("--statement", default=DEFAULT_STATEMENT, help="Python code to time (default: %(default)r)")
+    parser.add_argument("--preload", action="store_true",
+                        help="Also import the SDKs of the configured backends, as the first request would")
+    parser.add_argument("--top", type=int, default=15, help="Number of packages to list")
+    parser.add_argument("--json", metavar="PATH", help="Append the summary as one JSON line, to track regressions")
+    args = parser.parse_args(argv)
+
+    statement = args.statement
+    if args.preload:
+        statement = f"{statement}; {PRELOAD_STATEMENT}"
+    records, wall_time = measure_imports(statement)
+    summary = summarize(records, args.top)
+    print(format_report(summary, wall_time))
+
+    if args.json:
+        entry = dict(summary, statement=statement, wall_ms=round(wall_time * 1000, 1), timestamp=time.time())
+        with open(args.json, "a") as f:
+            f.write(json.dumps(entry) + "\n")
+
+
+if __name__ == "__main__":
+    main()
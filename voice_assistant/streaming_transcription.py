@@ -0,0 +1,267 @@
+# voice_assistant/streaming_transcription.py
+
+import logging
+import threading
+import time
+
+from colorama import Fore
+
+from voice_assistant.backends import get_transcription_backend
+from voice_assistant.capture import frame_energy, pcm_to_wav
+from voice_assistant.clients import get_client
+from voice_assistant.health import CircuitOpenError, backoff_delay
+from voice_assistant.hedging import hedged_transcribe
+
+
+class StreamingTranscriber:
+    """
+    Base class for transcribers that accept audio while the user is still talking.
+
+    Usage:
+        transcriber.start()
+        for frame in frames:
+            transcriber.feed(frame)
+        text = transcriber.finish()
+
+    Partial hypotheses are reported through the `on_partial` callback as they arrive.
+    """
+
+    def __init__(self, sample_rate=16000, on_partial=None):
+        """
+        Args:
+            sample_rate (int): Sample rate of the 16-bit mono PCM frames.
+            on_partial (Callable): Called with each new partial transcript.
+        """
+        self.sample_rate = sample_rate
+        self.on_partial = on_partial
+
+    def start(self):
+        """Prepare to receive audio."""
+
+    def feed(self, frame):
+        """
+        Add a frame of 16-bit PCM.
+
+        Args:
+            frame (bytes): The next frame of audio.
+        """
+        raise NotImplementedError
+
+    def finish(self, timeout=5.0):
+        """
+        Signal end of speech and return the final transcript.
+
+        Args:
+            timeout (float): Maximum time to wait for the final transcript (in seconds).
+
+        Returns:
+            str: The transcribed text.
+        """
+        raise NotImplementedError
+
+    def _emit_partial(self, text):
+        if self.on_partial and text:
+            try:
+                self.on_partial(text)
+            except Exception as e:
+                logging.debug(f"Partial transcript callback failed: {e}")
+
+
+class DeepgramStreamingTranscriber(StreamingTranscriber):
+    """
+    Stream audio to Deepgram's live transcription WebSocket.
+
+    Finalized segments accumulate while the user talks, so at end of speech only the
+    last segment needs to be flushed (via Finalize) before the transcript is complete.
+    """
+
+    def __init__(self, api_key, sample_rate=16000, on_partial=None, model="nova-2", language="en"):
+        super().__init__(sample_rate=sample_rate, on_partial=on_partial)
+        self.api_key = api_key
+        self.model = model
+        self.language = language
+        self._final_segments = []
+        self._interim = ""
+        self._finalized = threading.Event()
+        self._lock = threading.Lock()
+        self._connection = None
+
+    def start(self):
+        from deepgram import LiveOptions, LiveTranscriptionEvents
+        client = get_client("deepgram", self.api_key)
+        self._connection = client.listen.websocket.v("1")
+        self._connection.on(LiveTranscriptionEvents.Transcript, self._on_transcript)
+        options = LiveOptions(
+            model=self.model,
+            language=self.language,
+            encoding="linear16",
+            sample_rate=self.sample_rate,
+            channels=1,
+            interim_results=True,
+            smart_format=True,
+        )
+        if not self._connection.start(options):
+            raise Exception("Failed to start Deepgram live transcription")
+
+    def _on_transcript(self, _connection, result, **kwargs):
+        transcript = result.channel.alternatives[0].transcript
+        with self._lock:
+            if result.is_final:
+                if transcript:
+                    self._final_segments.append(transcript)
+                self._interim = ""
+                if getattr(result, "from_finalize", False):
+                    self._finalized.set()
+            else:
+                self._interim = transcript
+            partial = " ".join(self._final_segments + ([self._interim] if self._interim else []))
+        self._emit_partial(partial)
+
+    def feed(self, frame):
+        self._connection.send(frame)
+
+    def finish(self, timeout=5.0):
+        try:
+            self._connection.finalize()
+            if not self._finalized.wait(timeout):
+                logging.warning(f"{Fore.RED}Deepgram finalize timed out{Fore.RESET}")
+        finally:
+            self._connection.finish()
+        with self._lock:
+            return " ".join(self._final_segments)
+
+
+class ChunkedWhisperTranscriber(StreamingTranscriber):
+    """
+    Incremental transcription on top of any whole-file backend (Groq, OpenAI, FastWhisperAPI).
+
+    A worker thread transcribes the audio captured so far after each short pause in
+    speech. The utterance endpoint only fires after a longer pause, so by the time
+    finish() is called the last hypothesis usually already covers all of the speech and
+    is returned at once. Every pause re-uploads the whole utterance, so each utterance
+    costs one request per pause (see Config.CHUNKED_TRANSCRIPTION). Requests go through
+    hedged_transcribe, so they respect the hedging policy and circuit breakers, and after
+    a failure the worker backs off before trying again.
+    """
+
+    def __init__(self, model, sample_rate=16000, on_partial=None, speech_threshold=None,
+                 frame_ms=30, early_pause_ms=300, local_model_path=None):
+        """
+        Args:
+            model (str): The whole-file transcription model (see hedged_transcribe).
+            sample_rate (int): Sample rate of the 16-bit mono PCM frames.
+            on_partial (Callable): Called with each new partial transcript.
+            speech_threshold (Callable): Returns the current RMS speech threshold, e.g. the
+                capture VAD's. Frames above it count as speech.
+            frame_ms (int): Duration of each fed frame in milliseconds.
+            early_pause_ms (int): Silence after speech that triggers a transcription
+                ahead of the utterance endpoint.
+            local_model_path (str): The path to the local model (if applicable).
+        """
+        super().__init__(sample_rate=sample_rate, on_partial=on_partial)
+        self.model = model
+        self.local_model_path = local_model_path
+        self.speech_threshold = speech_threshold or (lambda: 500)
+        self.early_pause_frames = max(1, early_pause_ms // frame_ms)
+
+        self._frames = []
+        self._last_speech = 0  # number of frames up to and including the last speech frame
+        self._hypothesis = ""
+        self._covered = 0  # frames covered by the current hypothesis
+        self._cond = threading.Condition()
+        self._finished = False
+        self._in_flight = 0  # frames covered by the transcription currently running, if any
+        self._failures = 0  # consecutive failed partial transcriptions
+        self._retry_at = 0.0  # monotonic time before which no partial is attempted
+        self._worker = None
+
+    def start(self):
+        self._worker = threading.Thread(target=self._run, name="chunked-stt", daemon=True)
+        self._worker.start()
+
+    def feed(self, frame):
+        with self._cond:
+            self._frames.append(frame)
+            if frame_energy(frame) > self.speech_threshold():
+                self._last_speech = len(self._frames)
+            self._cond.notify_all()
+
+    def _transcribe(self, frame_count):
+        with self._cond:
+            pcm = b"".join(self._frames[:frame_count])
+        text = hedged_transcribe(self.model, pcm_to_wav(pcm, self.sample_rate), self.local_model_path)
+        with self._cond:
+            if frame_count > self._covered:
+                self._hypothesis = text
+                self._covered = frame_count
+            self._cond.notify_all()
+        self._emit_partial(text)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait(timeout=0.05)
+                if self._finished:
+                    return
+                target = self._last_speech
+                paused = len(self._frames) - target >= self.early_pause_frames
+                if target <= self._covered or not paused or time.monotonic() < self._retry_at:
+                    continue
+                self._in_flight = target
+            try:
+                self._transcribe(target)
+                self._failures = 0
+            except Exception as e:
+                if isinstance(e, CircuitOpenError):
+                    logging.debug(f"Partial transcription skipped: {e}")
+                else:
+                    logging.warning(f"{Fore.RED}Partial transcription failed: {e}{Fore.RESET}")
+                self._retry_at = time.monotonic() + backoff_delay(self._failures)
+                self._failures += 1
+            finally:
+                with self._cond:
+                    self._in_flight = 0
+                    self._cond.notify_all()
+
+    def finish(self, timeout=5.0):
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            # Wait for an in-flight transcription that already covers all the speech
+            while (self._covered < self._last_speech <= self._in_flight
+                   and time.monotonic() < deadline):
+                self._cond.wait(timeout=max(0, deadline - time.monotonic()))
+            self._finished = True
+            self._cond.notify_all()
+            covered, last_speech = self._covered, self._last_speech
+        if covered < last_speech:
+            # No usable hypothesis yet, transcribe everything captured
+            self._transcribe(len(self._frames))
+        with self._cond:
+            return self._hypothesis
+
+
+def create_streaming_transcriber(model, api_key, sample_rate=16000, on_partial=None,
+                                 speech_threshold=None, frame_ms=30, local_model_path=None):
+    """
+    Create the streaming transcriber best suited to the configured model.
+
+    Backends with a native live API (Deepgram) provide their own; every other backend
+    is wrapped in a ChunkedWhisperTranscriber if Config.CHUNKED_TRANSCRIPTION is set.
+
+    Args:
+        model (str): The transcription model ('openai', 'groq', 'deepgram', 'fastwhisperapi', 'local').
+        api_key (str): The API key for the transcription service.
+        sample_rate (int): Sample rate of the 16-bit mono PCM frames.
+        on_partial (Callable): Called with each new partial transcript.
+        speech_threshold (Callable): Returns the current RMS speech threshold.
+        frame_ms (int): Duration of each fed frame in milliseconds.
+        local_model_path (str): The path to the local model (if applicable).
+
+    Returns:
+        StreamingTranscriber: An unstarted transcriber, or None if the model cannot
+        transcribe incrementally.
+    """
+    backend = get_transcription_backend(model, api_key, local_model_path)
+    return backend.create_streaming(
+        sample_rate=sample_rate, on_partial=on_partial, speech_threshold=speech_threshold, frame_ms=frame_ms
+    )
@@ -1,23 +1,29 @@
 # voice_assistant/text_to_speech.py
 import logging
-import json
-import pyaudio
-import elevenlabs
-import soundfile as sf
-import numpy as np
-from pydub import AudioSegment
+import os
+import wave
 
-from openai import OpenAI
-from deepgram import DeepgramClient, SpeakOptions
-from elevenlabs.client import ElevenLabs
-from cartesia import Cartesia
+from voice_assistant.audio_archive import AudioArchiveWriter
+from voice_assistant.backends import Capabilities, TTSBackend, get_tts_backend, register_backend
+from voice_assistant.clients import get_client
+from voice_assistant.config import Config
+from voice_assistant.local_tts_generation import stream_audio_melotts
+from voice_assistant.pcm import CARTESIA_SAMPLE_RATES
+from voice_assistant.tts_cache import get_audio_cache
 
-from voice_assistant.local_tts_generation import generate_audio_file_melotts
+def _cache_key(backend, text, output_file_path):
+    """Return the audio cache key for a request, or None if it should not be cached."""
+    cache = get_audio_cache()
+    if cache is None or backend.model_id is None or not cache.cacheable(text):
+        return None
+    # Each provider writes its own container, so the output extension is part of the key
+    encoding = os.path.splitext(output_file_path)[1].lower()
+    return cache.make_key(text, backend.voice, f"{backend.name}/{backend.model_id}", encoding=encoding)
 
 def text_to_speech(model: str, api_key: str, text: str, output_file_path: str, local_model_path: str = None):
     """
     Convert text to speech using the specified model.
-    
+
     Args:
         model (str): The model to use for TTS ('openai', 'deepgram', 'elevenlabs', 'local', 'cartesia', 'melotts').
         api_key (str): The API key for the TTS service.
@@ -25,91 +31,198 @@ def text_to_speech(model: str, api_key: str, text: str, output_file_path: str, l
         output_file_path (str): The path to save the generated speech audio file.
         local_model_path (str): The path to the local model (if applicable).
     """
-    
     try:
-        if model == 'openai':
-            client = OpenAI(api_key=api_key)
-            speech_response = client.audio.speech.create(
-                model="tts-1",
-                voice="nova",
-                input=text
-            )
-            speech_response.stream_to_file(output_file_path)
-
-        elif model == 'deepgram':
-            client = DeepgramClient(api_key=api_key)
-            options = SpeakOptions(
-                model="aura-arcas-en",
-                encoding="linear16",
-                container="wav"
-            )
-            SPEAK_OPTIONS = {"text": text}
-            response = client.speak.v("1").save(output_file_path, SPEAK_OPTIONS, options)
-        
-        elif model == 'elevenlabs':
-            client = ElevenLabs(api_key=api_key)
-            audio = client.generate(
-                text=text, 
-                voice="Paul J.", 
-                output_format="mp3_22050_32", 
-                model="eleven_turbo_v2"
-            )
-            elevenlabs.save(audio, output_file_path)
-        
-        elif model == "cartesia":
-            client = Cartesia(api_key="sk_car_k8LE35ATLhXQXE4vQibQ4q")
-            voice_id = "cb605424-d682-48e9-94db-34cc567cf1c6"  # Your voice ID
-            model_id = "sonic-2"
-            output_format = {
-                "container": "raw",
-                "encoding": "pcm_f32le",
-                "sample_rate": 44100,
-            }
-            audio_buffers = []
-            # Collect audio chunks from the SSE generator
+        backend = get_tts_backend(model, api_key, local_model_path)
+        key = _cache_key(backend, text, output_file_path)
+        if key:
+            cached = get_audio_cache().get(key)
+            if cached is not None:
+                with open(output_file_path, "wb") as f:
+                    f.write(cached)
+                logging.info(f"Audio for cached phrase written to {output_file_path}")
+                return
+            # Remove a stale file so a failed request is not mistaken for new audio
+            if os.path.exists(output_file_path):
+                os.remove(output_file_path)
+
+        backend.synthesize_to_file(text, output_file_path)
+
+        if key and os.path.exists(output_file_path):
+            with open(output_file_path, "rb") as f:
+                get_audio_cache().put(key, f.read())
+
+    except Exception as e:
+        logging.error(f"Failed to convert text to speech: {e}")
+
+
+@register_backend("tts", "openai")
+class OpenAITTS(TTSBackend):
+    api_key_setting = "OPENAI_API_KEY"
+    sdk_modules = ("openai",)
+    model_id = "tts-1"
+    voice = "nova"
+    file_extension = ".mp3"
+
+    def synthesize_to_file(self, text, output_file_path):
+        client = get_client("openai", self.api_key)
+        speech_response = client.audio.speech.create(
+            model=self.model_id,
+            voice=self.voice,
+            input=text
+        )
+        speech_response.stream_to_file(output_file_path)
+
+
+@register_backend("tts", "deepgram")
+class DeepgramTTS(TTSBackend):
+    capabilities = Capabilities(sample_formats=("int16",), languages=("en",))
+    api_key_setting = "DEEPGRAM_API_KEY"
+    sdk_modules = ("deepgram",)
+    model_id = "aura-arcas-en"
+    voice = "aura-arcas-en"
+
+    def synthesize_to_file(self, text, output_file_path):
+        from deepgram import SpeakOptions
+        client = get_client("deepgram", self.api_key)
+        options = SpeakOptions(
+            model=self.model_id,
+            encoding="linear16",
+            container="wav"
+        )
+        SPEAK_OPTIONS = {"text": text}
+        client.speak.v("1").save(output_file_path, SPEAK_OPTIONS, options)
+
+
+@register_backend("tts", "elevenlabs")
+class ElevenLabsTTS(TTSBackend):
+    api_key_setting = "ELEVENLABS_API_KEY"
+    sdk_modules = ("elevenlabs",)
+    model_id = "eleven_turbo_v2"
+    voice = "Paul J."
+    file_extension = ".mp3"
+
+    def synthesize_to_file(self, text, output_file_path):
+        import elevenlabs
+        client = get_client("elevenlabs", self.api_key)
+        audio = client.generate(
+            text=text,
+            voice=self.voice,
+            output_format="mp3_22050_32",
+            model=self.model_id
+        )
+        elevenlabs.save(audio, output_file_path)
+
+
+@register_backend("tts", "cartesia")
+class CartesiaTTS(TTSBackend):
+    """Cartesia: SSE for whole files, a persistent WebSocket for streaming sessions."""
+
+    capabilities = Capabilities(
+        streaming=True, async_native=True, sample_formats=("int16", "float32"),
+        sample_rates=CARTESIA_SAMPLE_RATES,
+        languages=("en", "fr", "de", "es", "pt", "zh", "ja", "hi", "it", "ko", "nl", "pl", "ru", "sv", "tr")
+    )
+    api_key_setting = "CARTESIA_API_KEY"
+    sdk_modules = ("cartesia",)
+    model_id = "sonic-2"
+    voice = "cb605424-d682-48e9-94db-34cc567cf1c6"
+
+    def synthesize_to_file(self, text, output_file_path):
+        client = get_client("cartesia", self.api_key)
+        output_format = {
+            "container": "raw",
+            "encoding": "pcm_s16le",  # half the payload of pcm_f32le, and what the file stores
+            "sample_rate": 44100,
+        }
+        # Stream the chunks into the file as they arrive instead of buffering the whole reply
+        archive = AudioArchiveWriter(output_file_path, output_format["sample_rate"], "int16")
+        received = 0
+        try:
             for output in client.tts.sse(
-                model_id=model_id,
+                model_id=self.model_id,
                 transcript=text,
-                voice={"id": voice_id},
+                voice={"id": self.voice},
                 language="en",
                 output_format=output_format,
             ):
-                audio_buffers.append(output.data)  # Use output.data to get bytes
-            if audio_buffers:
-                # Combine all chunks into a single bytes object
-                audio_data = b''.join(audio_buffers)
-                # Convert raw PCM float32 to int16 for MP3 compatibility
-                audio_array = np.frombuffer(audio_data, dtype=np.float32)
-                audio_array_int16 = (audio_array * 32767).astype(np.int16)
-                # Create an AudioSegment object
-                audio_segment = AudioSegment(
-                    audio_array_int16.tobytes(),
-                    frame_rate=44100,
-                    sample_width=2,  # 16-bit = 2 bytes
-                    channels=1       # Mono audio
-                )
-                # Export to MP3
-                audio_segment.export(output_file_path, format="mp3")
-                logging.info(f"Audio saved to {output_file_path}")
-            else:
-                logging.error("No audio buffers received from Cartesia API.")
-        
-        elif model == "melotts":  # this is a local model
-            generate_audio_file_melotts(text=text, filename=output_file_path)
-        
-        elif model == 'local':
-            with open(output_file_path, "wb") as f:
-                f.write(b"Local TTS audio data")
-        
-        else:
-            raise ValueError("Unsupported TTS model")
-        
-    except Exception as e:
-        logging.error(f"Failed to convert text to speech: {e}")
+                archive.write(output.data)  # Use output.data to get bytes
+                received += 1
+        finally:
+            # The caller plays the file next, so it must be complete on return
+            archive.close(wait=True)
+        if not received:
+            logging.error("No audio buffers received from Cartesia API.")
+
+    def create_session(self, **kwargs):
+        # tts.py lives at the repository root, next to voice.py
+        from tts import TextToSpeech
+        kwargs.setdefault("voice_id", Config.CARTESIA_VOICE_ID)
+        kwargs.setdefault("model_id", Config.CARTESIA_MODEL_ID)
+        return TextToSpeech(api_key=self.api_key, **kwargs)
+
+    def create_async(self, sample_rate=22050, sample_format="int16"):
+        from voice_assistant.async_providers import CartesiaAsyncTTS
+        return CartesiaAsyncTTS(self.api_key, sample_rate=sample_rate, sample_format=sample_format)
+
+
+@register_backend("tts", "playht")
+class PlayHTTTS(TTSBackend):
+    """Play.ht, available in the async pipeline only."""
+
+    capabilities = Capabilities(streaming=True, async_native=True, sample_formats=("int16",), sample_rates=(24000,))
+    api_key_setting = "PLAY_HT_API_KEY"
+    sdk_modules = ("pyht",)
+
+    def synthesize_to_file(self, text, output_file_path):
+        raise ValueError("playht is only supported by the async pipeline")
+
+    def create_async(self, sample_rate=22050, sample_format="int16"):
+        from voice_assistant.async_providers import PlayHTAsyncTTS
+        return PlayHTAsyncTTS(self.api_key)
+
+
+@register_backend("tts", "melotts")
+class MeloTTS(TTSBackend):
+    """A MeloTTS server (see local_tts_api.py), streaming int16 PCM one sentence at a time."""
+
+    capabilities = Capabilities(streaming=True, async_native=True, sample_formats=("int16",), sample_rates=(44100,))
+    sdk_modules = ("requests",)
+    model_id = "melotts"
+
+    @property
+    def voice(self):
+        return Config.MELOTTS_ACCENT
+
+    def synthesize_to_file(self, text, output_file_path):
+        # The audio comes back over HTTP, so the server need not share this machine's disk
+        sample_rate, chunks = stream_audio_melotts(text=text, language=Config.MELOTTS_LANGUAGE, accent=self.voice)
+        with wave.open(output_file_path, "wb") as f:
+            f.setnchannels(1)
+            f.setsampwidth(2)
+            f.setframerate(sample_rate)
+            for chunk in chunks:
+                f.writeframes(chunk)
+
+    def synthesize_stream(self, text):
+        sample_rate, chunks = stream_audio_melotts(text=text, language=Config.MELOTTS_LANGUAGE, accent=self.voice)
+        return sample_rate, "int16", chunks
+
+    def create_async(self, sample_rate=44100, sample_format="int16"):
+        from voice_assistant.async_providers import MeloAsyncTTS
+        return MeloAsyncTTS(Config.MELOTTS_LANGUAGE, self.voice, sample_rate=sample_rate, sample_format=sample_format)
+
+
+@register_backend("tts", "local")
+class LocalTTS(TTSBackend):
+    """Placeholder for a local TTS model."""
+
+    def synthesize_to_file(self, text, output_file_path):
+        with open(output_file_path, "wb") as f:
+            f.write(b"Local TTS audio data")
 
 # Example usage (if needed)
 if __name__ == "__main__":
     text = "Hi Daniel! Thanks for the meeting wrap-up! It was great chatting with you. Good day!"
     api_key = "your_cartesia_api_key_here"
     output_file = "output.mp3"
-    text_to_speech("cartesia", api_key, text, output_file)
\ No newline at end of file
+    text_to_speech("cartesia", api_key, text, output_file)
@@ -0,0 +1,308 @@
+# voice_assistant/tracing.py
+
+import itertools
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from colorama import Fore
+
+from voice_assistant.config import Config
+from voice_assistant.health import LatencyTracker
+
+# Stages of a turn, in the order they happen
+CAPTURE = "capture"  # listening, until the VAD endpoints the utterance
+VAD_ENDPOINT = "vad_endpoint"  # trailing silence the VAD waited for before endpointing
+STT = "stt"  # transcription after the endpoint
+LLM_FIRST_TOKEN = "llm_first_token"  # LLM request to first token
+LLM_COMPLETE = "llm_complete"  # LLM request to last token
+TTS_FIRST_BYTE = "tts_first_byte"  # first clause sent to TTS to first audio received
+FIRST_AUDIO = "first_audio"  # end of the user's speech to the first audio out of the speaker
+PLAYBACK_END = "playback_end"  # end of the user's speech to the end of the reply
+TOTAL = "total"  # the whole turn (completed turns only)
+
+STAGES = (CAPTURE, VAD_ENDPOINT, STT, LLM_FIRST_TOKEN, LLM_COMPLETE, TTS_FIRST_BYTE, FIRST_AUDIO, PLAYBACK_END, TOTAL)
+
+# Stages measured from the end of the user's speech rather than from their own start
+_FROM_END_OF_SPEECH = (FIRST_AUDIO, PLAYBACK_END)
+
+# Upper bounds (in seconds) of the Prometheus histogram buckets
+BUCKETS = (0.05, 0.1, 0.25, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 10.0, 30.0)
+
+QUANTILES = (50, 95, 99)
+
+
+class Histogram:
+    """Latency histogram: cumulative buckets for Prometheus, recent samples for percentiles."""
+
+    def __init__(self, buckets=BUCKETS, window=1000):
+        """
+        Args:
+            buckets (tuple): Bucket upper bounds in seconds.
+            window (int): Number of recent samples kept for percentiles.
+        """
+        self.buckets = buckets
+        self.bucket_counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.recent = LatencyTracker(window)
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        """Add a sample (in seconds)."""
+        with self._lock:
+            self.count += 1
+            self.sum += seconds
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    self.bucket_counts[i] += 1
+        self.recent.record(seconds)
+
+    def snapshot(self):
+        """Return the count, mean and recent p50/p95/p99 as a dict."""
+        with self._lock:
+            count, total = self.count, self.sum
+        summary = {"count": count, "mean": total / count if count else None}
+        for q in QUANTILES:
+            summary[f"p{q}"] = self.recent.percentile(q)
+        return summary
+
+
+class Turn:
+    """
+    The timeline of one conversational turn.
+
+    Stages are started and stopped from whichever thread or task sees them happen;
+    both are idempotent, so only the first occurrence counts (e.g. the first token of
+    the first successful attempt). Times are perf_counter timestamps.
+
+    Usage:
+        turn = get_tracer().start_turn()
+        with turn.span(STT):
+            ...
+        turn.start(LLM_FIRST_TOKEN)
+        ...
+        turn.stop(LLM_FIRST_TOKEN)
+        turn.finish()
+    """
+
+    def __init__(self, tracer, turn_id):
+        self.tracer = tracer
+        self.turn_id = turn_id
+        self.started_at = time.perf_counter()
+        self.timestamp = time.time()
+        self.speech_end = None
+        self.status = None
+        self._starts = {}
+        self._spans = {}  # name -> (start, end)
+        self._lock = threading.Lock()
+
+    def start(self, name):
+        """Start a stage now, unless it was already started."""
+        now = time.perf_counter()
+        with self._lock:
+            self._starts.setdefault(name, now)
+
+    def stop(self, name):
+        """
+        Stop a stage now, unless it was already stopped.
+
+        Stages that were never started are measured from the start of the turn, or
+        from the end of the user's speech for FIRST_AUDIO and PLAYBACK_END.
+        """
+        now = time.perf_counter()
+        with self._lock:
+            if name in self._spans:
+                return
+            default = self.speech_end if name in _FROM_END_OF_SPEECH and self.speech_end else self.started_at
+            self._spans[name] = (self._starts.get(name, default), now)
+
+    def add(self, name, start, end):
+        """Record a stage with explicit perf_counter timestamps."""
+        with self._lock:
+            self._spans.setdefault(name, (start, end))
+
+    @contextmanager
+    def span(self, name):
+        """Context manager timing a stage."""
+        self.start(name)
+        try:
+            yield self
+        finally:
+            self.stop(name)
+
+    def end_capture(self, endpoint_delay=0.0):
+        """
+        Mark the utterance as endpointed now.
+
+        Args:
+            endpoint_delay (float): Trailing silence (in seconds) the VAD waited for, so
+                the user actually stopped speaking that long ago.
+        """
+        now = time.perf_counter()
+        self.stop(CAPTURE)
+        with self._lock:
+            self.speech_end = now - endpoint_delay
+        self.add(VAD_ENDPOINT, self.speech_end, now)
+
+    def durations(self):
+        """Return the duration (in seconds) of every stage recorded so far."""
+        with self._lock:
+            return {name: end - start for name, (start, end) in self._spans.items()}
+
+    def finish(self, status="ok"):
+        """
+        End the turn and hand it to the tracer.
+
+        Args:
+            status (str): 'ok' for a completed turn; anything else (e.g. 'no_input', 'error')
+                keeps the turn out of the TOTAL histogram.
+        """
+        if self.status is not None:
+            return
+        self.status = status
+        if status == "ok":
+            self.stop(TOTAL)
+        self.tracer.record(self)
+
+    def to_dict(self):
+        with self._lock:
+            spans = {
+                name: {"start": round(start - self.started_at, 4), "duration": round(end - start, 4)}
+                for name, (start, end) in self._spans.items()
+            }
+        return {"turn": self.turn_id, "timestamp": self.timestamp, "status": self.status, "spans": spans}
+
+
+class Tracer:
+    """
+    Collects finished turns into per-stage histograms, and optionally appends each
+    turn to a JSON Lines file.
+
+    Each stage has its own sample count, so turns that fail part-way through only
+    contribute the stages they reached.
+    """
+
+    def __init__(self, trace_file=None):
+        """
+        Args:
+            trace_file (str): JSON Lines file each finished turn is appended to (None disables).
+        """
+        self.trace_file = trace_file
+        self.histograms = {name: Histogram() for name in STAGES}
+        self.turns = {}  # status -> count
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def start_turn(self):
+        """Return a new Turn, started now."""
+        return Turn(self, next(self._ids))
+
+    def record(self, turn):
+        """Add a finished turn to the histograms and the trace file."""
+        durations = turn.durations()
+        for name, seconds in durations.items():
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms.setdefault(name, Histogram())
+            histogram.observe(seconds)
+        with self._lock:
+            self.turns[turn.status] = self.turns.get(turn.status, 0) + 1
+            if self.trace_file:
+                try:
+                    with open(self.trace_file, "a") as f:
+                        f.write(json.dumps(turn.to_dict()) + "\n")
+                except OSError as e:
+                    logging.warning(f"Could not write trace: {e}")
+        stages = ", ".join(f"{name} {durations[name]:.3f}s" for name in self.histograms if name in durations)
+        logging.info(Fore.YELLOW + f"Turn {turn.turn_id} ({turn.status}): {stages}" + Fore.RESET)
+
+    def summary(self):
+        """Return the snapshot of every stage that has samples."""
+        return {name: h.snapshot() for name, h in self.histograms.items() if h.count}
+
+    def log_summary(self):
+        """Log count, p50, p95 and p99 of every stage."""
+        logging.info(Fore.MAGENTA + f"Latency summary ({sum(self.turns.values())} turns: {self.turns}):" + Fore.RESET)
+        for name, s in self.summary().items():
+            logging.info(Fore.MAGENTA + f"  {name}: n={s['count']} p50 {s['p50']:.3f}s p95 {s['p95']:.3f}s "
+                         f"p99 {s['p99']:.3f}s" + Fore.RESET)
+
+    def prometheus_text(self):
+        """Render the histograms in the Prometheus text exposition format."""
+        lines = [
+            "# HELP voice_turns_total Finished turns by status.",
+            "# TYPE voice_turns_total counter",
+        ]
+        with self._lock:
+            turns = dict(self.turns)
+        for status, count in sorted(turns.items()):
+            lines.append(f'voice_turns_total{{status="{status}"}} {count}')
+
+        lines += [
+            "# HELP voice_stage_seconds Duration of each stage of a turn.",
+            "# TYPE voice_stage_seconds histogram",
+        ]
+        for name, h in self.histograms.items():
+            with h._lock:
+                bucket_counts, count, total = list(h.bucket_counts), h.count, h.sum
+            for bound, bucket_count in zip(h.buckets, bucket_counts):
+                lines.append(f'voice_stage_seconds_bucket{{stage="{name}",le="{bound}"}} {bucket_count}')
+            lines.append(f'voice_stage_seconds_bucket{{stage="{name}",le="+Inf"}} {count}')
+            lines.append(f'voice_stage_seconds_sum{{stage="{name}"}} {total}')
+            lines.append(f'voice_stage_seconds_count{{stage="{name}"}} {count}')
+
+        lines += [
+            "# HELP voice_stage_recent_seconds Percentiles of each stage over recent turns.",
+            "# TYPE voice_stage_recent_seconds gauge",
+        ]
+        for name, h in self.histograms.items():
+            for q in QUANTILES:
+                value = h.recent.percentile(q)
+                if value is not None:
+                    lines.append(f'voice_stage_recent_seconds{{stage="{name}",quantile="{q / 100}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+
+def serve_metrics(tracer, host="127.0.0.1", port=9100):
+    """
+    Serve `tracer.prometheus_text()` at http://host:port/metrics from a daemon thread.
+
+    Returns:
+        ThreadingHTTPServer: The server (call shutdown() to stop it).
+    """
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.rstrip("/") != "/metrics":
+                self.send_error(404)
+                return
+            body = tracer.prometheus_text().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            logging.debug(f"metrics: {format % args}")
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    logging.info(f"Serving metrics on http://{host}:{port}/metrics")
+    return server
+
+
+@lru_cache(maxsize=None)
+def get_tracer():
+    """Return the process-wide tracer configured in Config, starting the metrics endpoint if enabled."""
+    tracer = Tracer(Config.TRACE_FILE)
+    if Config.METRICS_PORT:
+        try:
+            serve_metrics(tracer, Config.METRICS_HOST, Config.METRICS_PORT)
+        except OSError as e:
+            logging.warning(f"Could not start the metrics endpoint: {e}")
+    return tracer
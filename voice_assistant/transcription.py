@@ -2,13 +2,13 @@
 
 import json
 import logging
-import requests
+import os
 import time
 
 from colorama import Fore, init
-from openai import OpenAI
-from groq import Groq
-from deepgram import DeepgramClient,PrerecordedOptions,FileSource
+
+from voice_assistant.backends import Capabilities, TranscriptionBackend, get_transcription_backend, register_backend
+from voice_assistant.clients import get_async_client, get_client
 
 fast_url = "http://localhost:8000"
 checked_fastwhisperapi = False
@@ -19,71 +19,159 @@ def check_fastwhisperapi():
     if not checked_fastwhisperapi:
         infopoint = f"{fast_url}/info"
         try:
-            response = requests.get(infopoint)
+            response = get_client("requests").get(infopoint)
             if response.status_code != 200:
                 raise Exception("FastWhisperAPI is not running")
         except Exception:
             raise Exception("FastWhisperAPI is not running")
         checked_fastwhisperapi = True
 
+def read_audio(audio):
+    """
+    Normalize an audio argument to a (filename, bytes) pair for upload.
+
+    Args:
+        audio (str | bytes): A path to an audio file, or an in-memory WAV file.
+
+    Returns:
+        tuple: (filename, data) suitable for the providers' multipart uploads.
+    """
+    if isinstance(audio, (bytes, bytearray, memoryview)):
+        return "audio.wav", bytes(audio)
+    with open(audio, "rb") as audio_file:
+        return os.path.basename(audio), audio_file.read()
+
 def transcribe_audio(model, api_key, audio_file_path, local_model_path=None):
     """
-    Transcribe an audio file using the specified model.
+    Transcribe audio using the specified model.
     
     Args:
         model (str): The model to use for transcription ('openai', 'groq', 'deepgram', 'fastwhisper', 'local').
         api_key (str): The API key for the transcription service.
-        audio_file_path (str): The path to the audio file to transcribe.
+        audio_file_path (str | bytes): The path to the audio file to transcribe, or an
+            in-memory WAV file (see capture.pcm_to_wav).
         local_model_path (str): The path to the local model (if applicable).
 
     Returns:
         str: The transcribed text.
     """
     try:
-        if model == 'openai':
-            return _transcribe_with_openai(api_key, audio_file_path)
-        elif model == 'groq':
-            return _transcribe_with_groq(api_key, audio_file_path)
-        elif model == 'deepgram':
-            return _transcribe_with_deepgram(api_key, audio_file_path)
-        elif model == 'fastwhisperapi':
-            return _transcribe_with_fastwhisperapi(audio_file_path)
-        elif model == 'local':
-            # Placeholder for local STT model transcription
-            return "Transcribed text from local model"
-        else:
-            raise ValueError("Unsupported transcription model")
+        return get_transcription_backend(model, api_key, local_model_path).transcribe(audio_file_path)
     except Exception as e:
         logging.error(f"{Fore.RED}Failed to transcribe audio: {e}{Fore.RESET}")
         raise Exception("Error in transcribing audio")
 
-def _transcribe_with_openai(api_key, audio_file_path):
-    client = OpenAI(api_key=api_key)
-    with open(audio_file_path, "rb") as audio_file:
-        transcription = client.audio.transcriptions.create(
+
+@register_backend("transcription", "openai")
+class OpenAITranscription(TranscriptionBackend):
+    """OpenAI Whisper over the REST API."""
+
+    capabilities = Capabilities(async_native=True)
+    api_key_setting = "OPENAI_API_KEY"
+    sdk_modules = ("openai",)
+
+    def transcribe(self, audio):
+        return _transcribe_with_openai(self.api_key, audio)
+
+    async def transcribe_async(self, audio):
+        client = get_async_client("openai", self.api_key)
+        transcription = await client.audio.transcriptions.create(
             model="whisper-1",
-            file=audio_file,
+            file=read_audio(audio),
             language='en'
         )
-    return transcription.text
+        return transcription.text
 
 
-def _transcribe_with_groq(api_key, audio_file_path):
-    client = Groq(api_key=api_key)
-    with open(audio_file_path, "rb") as audio_file:
-        transcription = client.audio.transcriptions.create(
+@register_backend("transcription", "groq")
+class GroqTranscription(TranscriptionBackend):
+    """Whisper large-v3 on Groq."""
+
+    capabilities = Capabilities(async_native=True)
+    api_key_setting = "GROQ_API_KEY"
+    sdk_modules = ("groq",)
+
+    def transcribe(self, audio):
+        return _transcribe_with_groq(self.api_key, audio)
+
+    async def transcribe_async(self, audio):
+        client = get_async_client("groq", self.api_key)
+        transcription = await client.audio.transcriptions.create(
             model="whisper-large-v3",
-            file=audio_file,
+            file=read_audio(audio),
             language='en'
         )
+        return transcription.text
+
+
+@register_backend("transcription", "deepgram")
+class DeepgramTranscription(TranscriptionBackend):
+    """Deepgram nova-2, with a native live-streaming API."""
+
+    capabilities = Capabilities(streaming=True, async_native=True, sample_formats=("int16",))
+    api_key_setting = "DEEPGRAM_API_KEY"
+    sdk_modules = ("deepgram",)
+
+    def transcribe(self, audio):
+        return _transcribe_with_deepgram(self.api_key, audio)
+
+    async def transcribe_async(self, audio):
+        from deepgram import PrerecordedOptions
+        client = get_async_client("deepgram", self.api_key)
+        _, buffer_data = read_audio(audio)
+        options = PrerecordedOptions(model="nova-2", smart_format=True)
+        response = await client.listen.asyncrest.v("1").transcribe_file({"buffer": buffer_data}, options)
+        data = json.loads(response.to_json())
+        return data['results']['channels'][0]['alternatives'][0]['transcript']
+
+    def create_streaming(self, sample_rate=16000, on_partial=None, speech_threshold=None, frame_ms=30):
+        from voice_assistant.streaming_transcription import DeepgramStreamingTranscriber
+        return DeepgramStreamingTranscriber(self.api_key, sample_rate=sample_rate, on_partial=on_partial)
+
+
+@register_backend("transcription", "fastwhisperapi")
+class FastWhisperAPITranscription(TranscriptionBackend):
+    """A local FastWhisperAPI server."""
+
+    sdk_modules = ("requests",)
+
+    def transcribe(self, audio):
+        return _transcribe_with_fastwhisperapi(audio)
+
+
+@register_backend("transcription", "local")
+class LocalTranscription(TranscriptionBackend):
+    """Placeholder for a local STT model."""
+
+    def transcribe(self, audio):
+        return "Transcribed text from local model"
+
+
+def _transcribe_with_openai(api_key, audio_file_path):
+    client = get_client("openai", api_key)
+    transcription = client.audio.transcriptions.create(
+        model="whisper-1",
+        file=read_audio(audio_file_path),
+        language='en'
+    )
+    return transcription.text
+
+
+def _transcribe_with_groq(api_key, audio_file_path):
+    client = get_client("groq", api_key)
+    transcription = client.audio.transcriptions.create(
+        model="whisper-large-v3",
+        file=read_audio(audio_file_path),
+        language='en'
+    )
     return transcription.text
 
 
 def _transcribe_with_deepgram(api_key, audio_file_path):
-    deepgram = DeepgramClient(api_key)
+    from deepgram import PrerecordedOptions
+    deepgram = get_client("deepgram", api_key)
     try:
-        with open(audio_file_path, "rb") as file:
-            buffer_data = file.read()
+        _, buffer_data = read_audio(audio_file_path)
 
         payload = {"buffer": buffer_data}
         options = PrerecordedOptions(model="nova-2", smart_format=True)
@@ -101,7 +189,7 @@ def _transcribe_with_fastwhisperapi(audio_file_path):
     check_fastwhisperapi()
     endpoint = f"{fast_url}/v1/transcriptions"
 
-    files = {'file': (audio_file_path, open(audio_file_path, 'rb'))}
+    files = {'file': read_audio(audio_file_path)}
     data = {
         'model': "base",
         'language': "en",
@@ -110,6 +198,6 @@ def _transcribe_with_fastwhisperapi(audio_file_path):
     }
     headers = {'Authorization': 'Bearer dummy_api_key'}
 
-    response = requests.post(endpoint, files=files, data=data, headers=headers)
+    response = get_client("requests").post(endpoint, files=files, data=data, headers=headers)
     response_json = response.json()
     return response_json.get('text', 'No text found in the response.')
\ No newline at end of file
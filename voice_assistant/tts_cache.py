@@ -0,0 +1,177 @@
+# voice_assistant/tts_cache.py
+
+import hashlib
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+from voice_assistant.config import Config
+
+
+def normalize_text(text):
+    """
+    Normalize text for use in a cache key.
+
+    Case and runs of whitespace do not change how a phrase is spoken, so "Hello  there!"
+    and "hello there!" share one entry. Punctuation is kept because it changes prosody.
+    """
+    return re.sub(r"\s+", " ", text).strip().casefold()
+
+
+class AudioCache:
+    """
+    Content-addressed cache of synthesized speech with a memory and a disk tier.
+
+    Entries are keyed by everything that changes the audio (normalized text, voice,
+    model, sample rate, speed and encoding). The memory tier is an LRU bounded in bytes;
+    the disk tier keeps entries across restarts, so fixed phrases like the fallback
+    response are synthesized once and then played without touching the network.
+    """
+
+    def __init__(self, directory=None, max_memory_bytes=32 * 1024 * 1024, max_disk_bytes=256 * 1024 * 1024,
+                 max_chars=200):
+        """
+        Args:
+            directory (str): Directory of the disk tier (None keeps the cache in memory only).
+            max_memory_bytes (int): Size limit of the in-memory tier.
+            max_disk_bytes (int): Size limit of the disk tier.
+            max_chars (int): Longest text worth caching; longer replies are rarely repeated.
+        """
+        self.directory = directory
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.max_chars = max_chars
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def make_key(text, voice_id, model_id, sample_rate=None, speed=None, encoding=None):
+        """
+        Build the cache key for a phrase.
+
+        Args:
+            text (str): The text to speak.
+            voice_id (str): Voice used by the provider.
+            model_id (str): Provider model.
+            sample_rate (int): Output sample rate.
+            speed (str | float): Speaking rate (None for the provider default).
+            encoding (str): Output encoding or container, e.g. 'pcm_f32le' or 'mp3'.
+
+        Returns:
+            str: A hex digest identifying the audio.
+        """
+        parts = [normalize_text(text), voice_id, model_id, sample_rate, speed or "normal", encoding]
+        return hashlib.sha256("\x1f".join(str(part) for part in parts).encode("utf-8")).hexdigest()
+
+    def cacheable(self, text):
+        """Return whether `text` is short enough to be cached."""
+        return bool(text and text.strip()) and len(text) <= self.max_chars
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.audio")
+
+    def get(self, key):
+        """
+        Look up audio by key.
+
+        Args:
+            key (str): A key from make_key.
+
+        Returns:
+            bytes | None: The cached audio, or None on a miss.
+        """
+        with self._lock:
+            audio = self._memory.get(key)
+            if audio is not None:
+                self._memory.move_to_end(key)
+                return audio
+        if not self.directory:
+            return None
+        try:
+            with open(self._path(key), "rb") as f:
+                audio = f.read()
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            logging.debug(f"Failed to read cached audio {key}: {e}")
+            return None
+        self._remember(key, audio)
+        return audio
+
+    def put(self, key, audio):
+        """
+        Store audio under a key in both tiers.
+
+        Args:
+            key (str): A key from make_key.
+            audio (bytes): The synthesized audio.
+        """
+        if not audio:
+            return
+        self._remember(key, audio)
+        if not self.directory:
+            return
+        path = self._path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(audio)
+            # Atomic, so a concurrent reader never sees a partial file
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logging.warning(f"Failed to write cached audio {key}: {e}")
+            return
+        self._prune_disk()
+
+    def _remember(self, key, audio):
+        with self._lock:
+            previous = self._memory.pop(key, None)
+            if previous is not None:
+                self._memory_bytes -= len(previous)
+            self._memory[key] = audio
+            self._memory_bytes += len(audio)
+            while self._memory_bytes > self.max_memory_bytes and len(self._memory) > 1:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_bytes -= len(evicted)
+
+    def _prune_disk(self):
+        """Delete the least recently written files once the disk tier is over its limit."""
+        try:
+            entries = [entry for entry in os.scandir(self.directory) if entry.name.endswith(".audio")]
+            stats = [(entry.stat().st_mtime, entry.stat().st_size, entry.path) for entry in entries]
+        except OSError as e:
+            logging.debug(f"Failed to scan audio cache: {e}")
+            return
+        total = sum(size for _, size, _ in stats)
+        for _, size, path in sorted(stats):
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+
+@lru_cache(maxsize=None)
+def get_audio_cache():
+    """
+    Return the shared audio cache configured in Config.
+
+    Returns:
+        AudioCache | None: The cache, or None if Config.TTS_CACHE is disabled.
+    """
+    if not Config.TTS_CACHE:
+        return None
+    return AudioCache(
+        directory=Config.TTS_CACHE_DIR,
+        max_memory_bytes=Config.TTS_CACHE_MEMORY_MB * 1024 * 1024,
+        max_disk_bytes=Config.TTS_CACHE_DISK_MB * 1024 * 1024,
+        max_chars=Config.TTS_CACHE_MAX_CHARS
+    )